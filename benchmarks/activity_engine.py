@@ -0,0 +1,158 @@
+"""
+Бенчмарк движка активности на синтетическом Telegram (без реальных аккаунтов).
+
+Запуск из корня проекта:
+    python -m benchmarks.activity_engine --scenario 1k --rounds 3 --latency 0.01
+
+Каждый прогон создает временную базу SQLite, заполняет ее пользователями, аккаунтами
+и каналами, а затем несколько раундов подряд публикует новые посты и прогоняет
+цикл активности всех аккаунтов (UserActivityManager._perform_activity) через FakeTelegramClient.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+
+from benchmarks.harness import (
+    prepare_environment,
+    create_schema,
+    seed_database,
+    QueryCounter,
+    percentile,
+    peak_rss_mb
+)
+
+DATABASE_PATH = prepare_environment()
+
+from benchmarks.fake_telegram import FakeTelegram, FakeTelegramClient  # noqa: E402
+from config_data.config import ENCRYPTION_KEY  # noqa: E402
+from database.models import engine  # noqa: E402
+from loader import app_logger  # noqa: E402
+from services.account_manager import AccountService, UserActivityManager  # noqa: E402
+from services.account_runtime import AccountRuntime  # noqa: E402
+
+# Сценарии: число аккаунтов, аккаунтов на пользователя и каналов на пользователя
+SCENARIOS = {
+    "100": {"accounts": 100, "accounts_per_user": 10, "channels_per_user": 5},
+    "1k": {"accounts": 1_000, "accounts_per_user": 10, "channels_per_user": 5},
+    "10k": {"accounts": 10_000, "accounts_per_user": 10, "channels_per_user": 5},
+}
+
+
+class BenchAccountService(AccountService):
+    """AccountService, который вместо подключения к Telegram создает клиентов синтетического Telegram"""
+
+    def __init__(self, encryption_key: str, world: FakeTelegram):
+        super().__init__(encryption_key)
+        self.world = world
+
+    async def _create_client(self, session_str: str) -> FakeTelegramClient:
+        return FakeTelegramClient(self.world, session_str)
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    scenario = dict(SCENARIOS[args.scenario])
+    if args.accounts:
+        scenario["accounts"] = args.accounts
+    users = max(1, scenario["accounts"] // scenario["accounts_per_user"])
+
+    random.seed(args.seed)
+    world = FakeTelegram(
+        seed=args.seed,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        flood_rate=args.flood_rate
+    )
+
+    await create_schema()
+    data = await seed_database(users, scenario["accounts_per_user"], scenario["channels_per_user"], ENCRYPTION_KEY)
+    for channel in data["channels"]:
+        world.add_channel(channel.channel_id, channel.channel_username, channel.channel_title)
+
+    service = BenchAccountService(ENCRYPTION_KEY, world)
+    manager = UserActivityManager(reaction_delay=(args.reaction_delay, args.reaction_delay))
+    queries = QueryCounter(engine)
+    semaphore = asyncio.Semaphore(args.concurrency or len(data["accounts"]))
+
+    cycle_latencies = []
+    failed_cycles = 0
+
+    accounts = [AccountRuntime.from_account(account) for account in data["accounts"]]
+
+    async def run_cycle(account):
+        nonlocal failed_cycles
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await manager._perform_activity(account, service)
+            except Exception as e:
+                failed_cycles += 1
+                app_logger.error(f"Ошибка цикла аккаунта {account.phone}: {e}")
+            cycle_latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        world.publish(args.posts)
+        await asyncio.gather(*(run_cycle(account) for account in accounts))
+    elapsed = time.perf_counter() - started
+
+    await engine.dispose()
+
+    reactions = world.reactions
+    return {
+        "scenario": args.scenario,
+        "accounts": len(data["accounts"]),
+        "channels": len(data["channels"]),
+        "rounds": args.rounds,
+        "seed": args.seed,
+        "cycles": len(cycle_latencies),
+        "failed_cycles": failed_cycles,
+        "elapsed_s": round(elapsed, 3),
+        "reactions": reactions,
+        "views": world.views,
+        "reactions_per_s": round(reactions / elapsed, 2) if elapsed else 0,
+        "rpc_per_reaction": round(sum(world.requests.values()) / reactions, 2) if reactions else None,
+        "db_ops_per_reaction": round(queries.total / reactions, 2) if reactions else None,
+        "db_ops": dict(queries.counts),
+        "cycle_p50_ms": round(percentile(cycle_latencies, 50) * 1000, 2),
+        "cycle_p99_ms": round(percentile(cycle_latencies, 99) * 1000, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rpc": dict(world.requests),
+        "rpc_errors": dict(world.errors),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк движка активности на синтетическом Telegram")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="100", help="Набор аккаунтов и каналов")
+    parser.add_argument("--accounts", type=int, default=0, help="Переопределить число аккаунтов сценария")
+    parser.add_argument("--rounds", type=int, default=3, help="Сколько циклов активности выполняет каждый аккаунт")
+    parser.add_argument("--posts", type=int, default=2, help="Новых постов в каждом канале за раунд")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="Сколько аккаунтов выполняют цикл одновременно (0 - все, как в боте)")
+    parser.add_argument("--latency", type=float, default=0.005, help="Средняя задержка запроса к Telegram, сек")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля запросов с RPCError")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="Доля запросов с FloodWaitError")
+    parser.add_argument("--reaction-delay", type=float, default=0.0, help="Пауза после реакции, сек")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING", help="Уровень логов бота во время прогона")
+    parser.add_argument("--json", help="Сохранить отчет в JSON-файл")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    app_logger.setLevel(getattr(logging, args.log_level.upper()))
+
+    report = asyncio.run(run_benchmark(args))
+    for key, value in report.items():
+        print(f"{key:>22}: {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import asyncio
+import random
+from collections import Counter
+from datetime import datetime, UTC
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from telethon.errors import FloodWaitError, RPCError
+from telethon.tl import functions, types
+from telethon.tl.types import messages as messages_types
+from telethon.tl.types import updates as updates_types
+
+from services.quarantine import QuarantinedError, quarantine
+
+
+class FakeChannel:
+    """Канал синтетического Telegram: посты, реакции и просмотры"""
+
+    def __init__(self, channel_id: int, username: str, title: str):
+        self.id = channel_id
+        self.username = username
+        self.title = title
+        self.access_hash = channel_id * 7919
+        self.next_id = 1
+        self.posts: Dict[int, dict] = {}  # id поста -> {"date", "reactions": {эмодзи: кол-во}, "views"}
+
+    def publish(self, count: int = 1):
+        for _ in range(count):
+            self.posts[self.next_id] = {"date": datetime.now(UTC), "reactions": {}, "views": 0}
+            self.next_id += 1
+
+    def entity(self) -> types.Channel:
+        return types.Channel(
+            id=self.id,
+            title=self.title,
+            photo=types.ChatPhotoEmpty(),
+            date=None,
+            broadcast=True,
+            access_hash=self.access_hash,
+            username=self.username
+        )
+
+    def message(self, post_id: int) -> Optional[types.Message]:
+        post = self.posts.get(post_id)
+        if post is None:
+            return None
+        reactions = types.MessageReactions(results=[
+            types.ReactionCount(reaction=types.ReactionEmoji(emoticon=emoji), count=count)
+            for emoji, count in post["reactions"].items()
+        ])
+        return types.Message(
+            id=post_id,
+            peer_id=types.PeerChannel(self.id),
+            date=post["date"],
+            message=f"Пост {post_id}",
+            post=True,
+            views=post["views"],
+            reactions=reactions
+        )
+
+
+class FakeTelegram:
+    """
+    Синтетический Telegram в памяти процесса: каналы, задержки и ошибки запросов.
+
+    Все случайности берутся из одного генератора с заданным seed, поэтому
+    прогоны с одинаковыми параметрами воспроизводимы.
+    """
+
+    def __init__(self, seed: int = 0, latency: float = 0.0, error_rate: float = 0.0,
+                 flood_rate: float = 0.0, flood_seconds: int = 5):
+        self.rng = random.Random(seed)
+        self.latency = latency            # Средняя задержка запроса, сек
+        self.error_rate = error_rate      # Доля запросов, завершающихся RPCError
+        self.flood_rate = flood_rate      # Доля запросов, завершающихся FloodWaitError
+        self.flood_seconds = flood_seconds
+        self.channels: Dict[int, FakeChannel] = {}
+        self.usernames: Dict[str, FakeChannel] = {}
+        self.requests: Counter = Counter()  # Запросы по методам
+        self.errors: Counter = Counter()    # Ошибки по методам
+        self.reactions = 0
+        self.views = 0
+
+    def add_channel(self, channel_id: int, username: str, title: str) -> FakeChannel:
+        channel = FakeChannel(channel_id, username, title)
+        self.channels[channel_id] = channel
+        self.usernames[username.lower()] = channel
+        return channel
+
+    def publish(self, posts_per_channel: int = 1):
+        """Публикует новые посты во всех каналах"""
+        for channel in self.channels.values():
+            channel.publish(posts_per_channel)
+
+    def resolve(self, peer) -> FakeChannel:
+        """Находит канал по username, ссылке t.me, ID (в т.ч. с префиксом -100) или TL-объекту"""
+        if isinstance(peer, FakeChannel):
+            return peer
+        if isinstance(peer, (types.Channel, types.PeerChannel, types.InputPeerChannel, types.InputChannel)):
+            peer = getattr(peer, "channel_id", None) or peer.id
+        if isinstance(peer, str):
+            name = peer.rsplit("/", 1)[-1].lstrip("@").lower()
+            if name in self.usernames:
+                return self.usernames[name]
+            peer = int(name) if name.lstrip("-").isdigit() else name
+        if isinstance(peer, int):
+            channel_id = int(str(abs(peer))[3:]) if str(peer).startswith("-100") else abs(peer)
+            if channel_id in self.channels:
+                return self.channels[channel_id]
+        raise ValueError(f'Cannot find any entity corresponding to "{peer}"')
+
+    async def call(self, method: str, request=None):
+        """Имитирует сетевой запрос: задержка и случайные ошибки"""
+        self.requests[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.latency)
+        roll = self.rng.random()
+        if roll < self.flood_rate:
+            self.errors[method] += 1
+            raise FloodWaitError(request, capture=self.flood_seconds)
+        if roll < self.flood_rate + self.error_rate:
+            self.errors[method] += 1
+            raise RPCError(request, "INTERNAL_SERVER_ERROR", 500)
+
+
+class FakeTelegramClient:
+    """
+    Замена TelegramClient для бенчмарков: реализует методы, которые использует движок
+    активности, и отвечает настоящими TL-объектами Telethon.
+    """
+
+    def __init__(self, world: FakeTelegram, session_str: str):
+        self.world = world
+        self.session_str = session_str
+        self.connected = False
+        self.cycle_report = None  # CycleReport цикла активности, как у InstrumentedTelegramClient
+        self.account_id = None    # Аккаунт для карантина после FloodWait, как у InstrumentedTelegramClient
+
+    async def _call(self, method: str, request=None):
+        if self.account_id is not None:
+            seconds, scope = quarantine.remaining(self.account_id, method)
+            if seconds:
+                raise QuarantinedError(request, seconds, scope)
+
+        outcome, flood_seconds = "ok", 0
+        try:
+            await self.world.call(method, request)
+        except FloodWaitError as e:
+            outcome, flood_seconds = "flood_wait", e.seconds
+            if self.account_id is not None:
+                quarantine.add(self.account_id, method, e.seconds)
+            raise
+        except RPCError:
+            outcome = "rpc_error"
+            raise
+        finally:
+            if self.cycle_report is not None:
+                self.cycle_report.record_request(outcome, flood_seconds)
+
+    async def connect(self):
+        await self._call("connect")
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def is_user_authorized(self) -> bool:
+        return True
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        await self._call(type(request).__name__, request)
+
+        if isinstance(request, functions.account.UpdateStatusRequest):
+            return True
+        if isinstance(request, functions.messages.GetMessagesViewsRequest):
+            channel = self.world.resolve(request.peer)
+            views = []
+            for post_id in request.id:
+                post = channel.posts.get(post_id)
+                if post is not None and request.increment:
+                    post["views"] += 1
+                    self.world.views += 1
+                views.append(types.MessageViews(views=post["views"] if post else None))
+            return messages_types.MessageViews(views=views, chats=[], users=[])
+        if isinstance(request, functions.messages.SendReactionRequest):
+            channel = self.world.resolve(request.peer)
+            post = channel.posts.get(request.msg_id)
+            if post is None:
+                raise RPCError(request, "The message ID is invalid", 400)
+            for reaction in request.reaction or []:
+                post["reactions"][reaction.emoticon] = post["reactions"].get(reaction.emoticon, 0) + 1
+                self.world.reactions += 1
+            return types.Updates(updates=[], users=[], chats=[], date=datetime.now(UTC), seq=0)
+        if isinstance(request, functions.messages.GetHistoryRequest):
+            channel = self.world.resolve(request.peer)
+            post_ids = sorted(channel.posts, reverse=True)
+            if request.min_id:
+                post_ids = [post_id for post_id in post_ids if post_id > request.min_id]
+            if request.offset_id:
+                post_ids = [post_id for post_id in post_ids if post_id < request.offset_id]
+            post_ids = post_ids[request.add_offset:request.add_offset + request.limit]
+            return messages_types.ChannelMessages(
+                pts=channel.next_id,
+                count=len(channel.posts),
+                messages=[channel.message(post_id) for post_id in post_ids],
+                topics=[],
+                chats=[channel.entity()],
+                users=[]
+            )
+        if isinstance(request, functions.updates.GetChannelDifferenceRequest):
+            # pts канала равен ID следующего поста: каждый пост сдвигает pts на 1
+            channel = self.world.resolve(request.channel)
+            post_ids = [post_id for post_id in sorted(channel.posts) if post_id >= request.pts]
+            if not post_ids:
+                return updates_types.ChannelDifferenceEmpty(pts=channel.next_id, final=True)
+            if len(post_ids) > request.limit:
+                return updates_types.ChannelDifferenceTooLong(
+                    dialog=SimpleNamespace(pts=channel.next_id, top_message=channel.next_id - 1),
+                    messages=[], chats=[channel.entity()], users=[], final=True
+                )
+            return updates_types.ChannelDifference(
+                pts=channel.next_id,
+                new_messages=[channel.message(post_id) for post_id in post_ids],
+                other_updates=[], chats=[channel.entity()], users=[], final=True
+            )
+        if isinstance(request, functions.messages.GetPeerDialogsRequest):
+            dialogs = []
+            for dialog_peer in request.peers:
+                channel = self.world.resolve(dialog_peer.peer)
+                dialogs.append(SimpleNamespace(peer=types.PeerChannel(channel.id), top_message=channel.next_id - 1))
+            return SimpleNamespace(dialogs=dialogs)
+        if isinstance(request, functions.channels.GetFullChannelRequest):
+            channel = self.world.resolve(request.channel)
+            return SimpleNamespace(chats=[channel.entity()])
+        if isinstance(request, (functions.messages.ImportChatInviteRequest,
+                                functions.account.UpdateNotifySettingsRequest)):
+            return True
+        raise NotImplementedError(f"FakeTelegramClient не поддерживает {type(request).__name__}")
+
+    async def get_entity(self, entity):
+        await self._call("get_entity")
+        return self.world.resolve(entity).entity()
+
+    async def get_dialogs(self, limit=None):
+        await self._call("get_dialogs")
+        return [SimpleNamespace(entity=channel.entity()) for channel in self.world.channels.values()]
+
+    async def get_messages(self, entity, limit=None, ids=None):
+        await self._call("get_messages")
+        if entity == "me":
+            return []
+        channel = self.world.resolve(entity)
+        if ids is not None:
+            if isinstance(ids, list):
+                return [channel.message(post_id) for post_id in ids]
+            return channel.message(ids)
+        post_ids = sorted(channel.posts, reverse=True)[:limit or 1]
+        return [channel.message(post_id) for post_id in post_ids]
+
+    async def send_read_acknowledge(self, entity, message=None):
+        await self._call("send_read_acknowledge")
+        return True
+
+    async def send_message(self, entity, message):
+        await self._call("send_message")
+        return SimpleNamespace(id=1, text=message)
+
+    async def edit_message(self, entity, message, text=None):
+        await self._call("edit_message")
+        return SimpleNamespace(id=message, text=text)
+
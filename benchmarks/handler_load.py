@@ -0,0 +1,299 @@
+"""
+Нагрузочный тест хендлеров бота: синтетические апдейты подаются в настоящий диспетчер
+через Dispatcher.feed_update, а запросы к Bot API перехватывает сессия-заглушка.
+
+Запуск из корня проекта:
+    python -m benchmarks.handler_load --concurrency 1 10 50 200 --iterations 5
+
+Для каждого уровня параллельности одновременно работают N виртуальных пользователей,
+каждый проходит набор сценариев (навигация по каналам, /my_accounts, поиск и добавление
+канала). В отчете - распределение длительности по хендлерам, число запросов к базе
+на вызов хендлера и пропускная способность в апдейтах в секунду.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List
+
+from benchmarks.harness import (
+    prepare_environment,
+    create_schema,
+    seed_database,
+    QueryCounter,
+    percentile,
+    peak_rss_mb,
+    format_table
+)
+
+DATABASE_PATH = prepare_environment()
+
+from aiogram import BaseMiddleware  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.methods import TelegramMethod  # noqa: E402
+from aiogram.types import TelegramObject, Update  # noqa: E402
+
+from config_data.config import ENCRYPTION_KEY  # noqa: E402
+from database.models import engine  # noqa: E402
+from loader import app_logger, bot, dp  # noqa: E402
+import handlers  # noqa: E402,F401
+
+# Методы Bot API, которые возвращают сообщение
+MESSAGE_METHODS = {"SendMessage", "EditMessageText", "EditMessageReplyMarkup", "SendPhoto", "SendDocument"}
+
+
+class StubSession(BaseSession):
+    """Сессия Bot API без сети: отвечает успешными ответами с настраиваемой задержкой"""
+
+    def __init__(self, latency: float = 0.0, rng: random.Random = None):
+        super().__init__()
+        self.latency = latency
+        self.rng = rng or random.Random(0)
+        self.message_ids = itertools.count(1_000)
+        self.requests: Dict[str, int] = defaultdict(int)
+
+    async def close(self):
+        pass
+
+    async def make_request(self, bot, method: TelegramMethod, timeout: int = None) -> Any:
+        name = type(method).__name__
+        self.requests[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.latency)
+
+        if name in MESSAGE_METHODS:
+            result = {
+                "message_id": getattr(method, "message_id", None) or next(self.message_ids),
+                "date": int(time.time()),
+                "chat": {"id": getattr(method, "chat_id", None) or 0, "type": "private"},
+                "text": getattr(method, "text", None) or "",
+            }
+        elif name == "GetMe":
+            result = {"id": bot.id, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        else:
+            result = True
+        response = self.check_response(bot, method, 200, json.dumps({"ok": True, "result": result}))
+        return response.result
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+
+class HandlerTimer(BaseMiddleware):
+    """Внутренний middleware: длительность и число запросов к базе для каждого хендлера"""
+
+    def __init__(self, queries: QueryCounter):
+        self.queries = queries
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.db_queries: Dict[str, int] = defaultdict(int)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        name = data["handler"].callback.__name__
+        started = time.perf_counter()
+        with self.queries.scope() as scope:
+            try:
+                return await handler(event, data)
+            finally:
+                self.durations[name].append(time.perf_counter() - started)
+                self.db_queries[name] += scope[0]
+
+    def reset(self):
+        self.durations.clear()
+        self.db_queries.clear()
+
+
+class VirtualUser:
+    """Синтетический пользователь бота, который генерирует апдейты"""
+    update_ids = itertools.count(1)
+
+    def __init__(self, user_id: int, channel_ids: List[int], rng: random.Random):
+        self.user_id = user_id
+        self.channel_ids = channel_ids
+        self.rng = rng
+        self.message_ids = itertools.count(1)
+
+    def _user(self) -> dict:
+        return {"id": self.user_id, "is_bot": False, "first_name": "Bench", "username": f"bench_{self.user_id}"}
+
+    def _message(self, text: str, from_bot: bool = False) -> dict:
+        message = {
+            "message_id": next(self.message_ids),
+            "date": int(datetime.now().timestamp()),
+            "chat": {"id": self.user_id, "type": "private"},
+            "from": {"id": bot.id, "is_bot": True, "first_name": "Bench"} if from_bot else self._user(),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return message
+
+    def message(self, text: str) -> Update:
+        return Update.model_validate(
+            {"update_id": next(self.update_ids), "message": self._message(text)},
+            context={"bot": bot}
+        )
+
+    def callback(self, data: str) -> Update:
+        return Update.model_validate(
+            {
+                "update_id": next(self.update_ids),
+                "callback_query": {
+                    "id": str(next(self.update_ids)),
+                    "from": self._user(),
+                    "chat_instance": str(self.user_id),
+                    "data": data,
+                    "message": self._message("Панель управления каналами", from_bot=True),
+                },
+            },
+            context={"bot": bot}
+        )
+
+    # Сценарии: последовательности апдейтов одного пользователя
+
+    def flow_navigation(self, steps: int = 5) -> List[Update]:
+        updates = [self.callback("my_channels")]
+        for index, channel_id in enumerate(self.channel_ids[:steps]):
+            updates.append(self.callback(f"next_channel_{channel_id}_{index}"))
+        if len(self.channel_ids) > 1:
+            updates.append(self.callback(f"prev_channel_{self.channel_ids[1]}_1"))
+        return updates
+
+    def flow_my_accounts(self) -> List[Update]:
+        return [self.message("/my_accounts")]
+
+    def flow_my_channels(self) -> List[Update]:
+        return [self.message("/my_channels"), self.callback("back_to_channels")]
+
+    def flow_search(self) -> List[Update]:
+        return [self.callback("search_user_channel"), self.message(f"bench_channel_{self.rng.randrange(10_000)}")]
+
+    def flow_add_channel(self) -> List[Update]:
+        return [self.callback("add_channel"), self.message(f"@bench_new_{self.user_id}_{self.rng.randrange(1000)}")]
+
+    def flows(self) -> List[List[Update]]:
+        flows = [
+            self.flow_navigation(),
+            self.flow_my_accounts(),
+            self.flow_my_channels(),
+            self.flow_search(),
+            self.flow_add_channel(),
+        ]
+        self.rng.shuffle(flows)
+        return flows
+
+
+async def run_level(concurrency: int, users: List[VirtualUser], iterations: int, timer: HandlerTimer) -> dict:
+    """Прогон одного уровня параллельности: concurrency пользователей одновременно проходят сценарии"""
+    timer.reset()
+    update_latencies: List[float] = []
+    errors = 0
+
+    async def run_user(user: VirtualUser):
+        nonlocal errors
+        for _ in range(iterations):
+            for flow in user.flows():
+                for update in flow:
+                    started = time.perf_counter()
+                    try:
+                        await dp.feed_update(bot, update)
+                    except Exception as e:
+                        errors += 1
+                        app_logger.error(f"Ошибка при обработке апдейта {update.update_id}: {e}")
+                    update_latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_user(user) for user in users[:concurrency]))
+    elapsed = time.perf_counter() - started
+
+    handlers_rows = [
+        {
+            "handler": name,
+            "calls": len(durations),
+            "p50_ms": percentile(durations, 50) * 1000,
+            "p95_ms": percentile(durations, 95) * 1000,
+            "p99_ms": percentile(durations, 99) * 1000,
+            "max_ms": max(durations) * 1000,
+            "db_per_call": timer.db_queries[name] / len(durations),
+        }
+        for name, durations in sorted(timer.durations.items())
+    ]
+    return {
+        "concurrency": concurrency,
+        "updates": len(update_latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "updates_per_s": round(len(update_latencies) / elapsed, 2) if elapsed else 0,
+        "update_p50_ms": round(percentile(update_latencies, 50) * 1000, 2),
+        "update_p99_ms": round(percentile(update_latencies, 99) * 1000, 2),
+        "handlers": handlers_rows,
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    random.seed(args.seed)
+    users_count = max(args.concurrency)
+
+    await create_schema()
+    data = await seed_database(users_count, args.accounts_per_user, args.channels_per_user, ENCRYPTION_KEY)
+    channels_by_user = defaultdict(list)
+    for channel in data["channels"]:
+        channels_by_user[channel.user_id].append(channel.id)
+
+    bot.session = StubSession(latency=args.api_latency, rng=random.Random(args.seed))
+    queries = QueryCounter(engine)
+    timer = HandlerTimer(queries)
+    dp.message.middleware(timer)
+    dp.callback_query.middleware(timer)
+
+    users = [
+        VirtualUser(user.user_id, sorted(channels_by_user[user.id]), random.Random(args.seed + index))
+        for index, user in enumerate(data["users"])
+    ]
+
+    levels = [await run_level(level, users, args.iterations, timer) for level in args.concurrency]
+    await engine.dispose()
+    return {"seed": args.seed, "peak_rss_mb": round(peak_rss_mb(), 1), "levels": levels}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест хендлеров бота через Dispatcher.feed_update")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50],
+                        help="Уровни параллельности (число одновременных пользователей)")
+    parser.add_argument("--iterations", type=int, default=3, help="Сколько раз каждый пользователь проходит сценарии")
+    parser.add_argument("--accounts-per-user", type=int, default=3)
+    parser.add_argument("--channels-per-user", type=int, default=20)
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Задержка ответа Bot API, сек")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING", help="Уровень логов бота во время прогона")
+    parser.add_argument("--json", help="Сохранить отчет в JSON-файл")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    app_logger.setLevel(getattr(logging, args.log_level.upper()))
+
+    report = asyncio.run(run_benchmark(args))
+    print(format_table([{key: value for key, value in level.items() if key != "handlers"}
+                        for level in report["levels"]]))
+    for level in report["levels"]:
+        print(f"\nПараллельность {level['concurrency']}:")
+        print(format_table(level["handlers"]))
+    print(f"\nПиковая память: {report['peak_rss_mb']} МБ")
+    if args.json:
+        with open(args.json, "w", encoding="utf8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
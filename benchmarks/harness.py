@@ -0,0 +1,153 @@
+import math
+import os
+import resource
+import sys
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from cryptography.fernet import Fernet
+
+
+def prepare_environment(database_path: str = None) -> str:
+    """
+    Готовит окружение до импорта модулей бота: временная база SQLite и заглушки
+    обязательных переменных (реальные значения из окружения не перезаписываются,
+    кроме адреса базы). Возвращает путь к базе.
+    """
+    if database_path is None:
+        database_path = os.path.join(tempfile.mkdtemp(prefix="tg_bench_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{database_path}"
+    os.environ["METRICS_ENABLED"] = "0"
+    os.environ.setdefault("BOT_TOKEN", "123456:BENCHMARK")
+    os.environ.setdefault("API_ID", "1")
+    os.environ.setdefault("API_HASH", "benchmark")
+    os.environ.setdefault("ADMIN_ID", "1")
+    os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+    return database_path
+
+
+async def create_schema():
+    """Создает таблицы во временной базе"""
+    from database.models import Base, engine
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+
+async def seed_database(users: int, accounts_per_user: int, channels_per_user: int,
+                        encryption_key: str, first_user_id: int = 10_000) -> Dict[str, list]:
+    """
+    Заполняет базу синтетическими пользователями, аккаунтами и каналами.
+    Каналу с номером n соответствует channel_id 1_000_000 + n и username bench_channel_n.
+    """
+    from database.models import Account, AccountReaction, User, UserChannel, async_session
+
+    cipher = Fernet(encryption_key.encode())
+    data = {"users": [], "accounts": [], "channels": []}
+    async with async_session() as session:
+        for user_index in range(users):
+            user = User(user_id=first_user_id + user_index, username=f"bench_user_{user_index}", first_name="Bench")
+            session.add(user)
+            await session.flush()
+            data["users"].append(user)
+
+            for account_index in range(accounts_per_user):
+                number = user_index * accounts_per_user + account_index
+                data["accounts"].append(Account(
+                    user_id=user.user_id,
+                    phone=f"+7900{number:07d}",
+                    session=cipher.encrypt(f"bench-session-{number}".encode()),
+                    is_active=True
+                ))
+
+            for channel_index in range(channels_per_user):
+                number = user_index * channels_per_user + channel_index
+                channel = UserChannel(
+                    user_id=user.id,
+                    channel_id=1_000_000 + number,
+                    channel_username=f"bench_channel_{number}",
+                    channel_title=f"Канал {number}",
+                    is_active=True,
+                    max_reactions=10_000,
+                    views=10_000
+                )
+                session.add(channel)
+                await session.flush()
+                session.add(AccountReaction(
+                    channel_id=channel.id,
+                    available_reactions=["👍", "❤️", "🔥", "👏", "😁"],
+                    user_reactions=None
+                ))
+                data["channels"].append(channel)
+
+        session.add_all(data["accounts"])
+        await session.commit()
+    return data
+
+
+_query_scope: ContextVar[Optional[list]] = ContextVar("query_scope", default=None)
+
+
+class QueryCounter:
+    """Считает SQL-запросы к движку по типу (SELECT/INSERT/UPDATE/...)"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.counts: Counter = Counter()
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.counts[statement.lstrip()[:6].upper()] += 1
+        scope = _query_scope.get()
+        if scope is not None:
+            scope[0] += 1
+
+    @contextmanager
+    def scope(self) -> Iterator[list]:
+        """Дополнительно считает запросы текущей задачи asyncio (счетчик - первый элемент списка)"""
+        holder = [0]
+        token = _query_scope.set(holder)
+        try:
+            yield holder
+        finally:
+            _query_scope.reset(token)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def reset(self):
+        self.counts.clear()
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга (q от 0 до 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(q / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def peak_rss_mb() -> float:
+    """Пиковый объем резидентной памяти процесса, МБ"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux ru_maxrss в килобайтах, в macOS - в байтах
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def format_table(rows: List[Dict[str, object]]) -> str:
+    """Выводит список словарей одинаковой структуры в виде текстовой таблицы"""
+    if not rows:
+        return ""
+    columns = list(rows[0])
+    cells = [[f"{row[column]:.3f}" if isinstance(row[column], float) else str(row[column]) for column in columns]
+             for row in rows]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines.extend("  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in cells)
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+"""
+Бенчмарк разбора ответа с постами канала: высокоуровневые сообщения Telethon
+(как в client.get_messages) против компактного PostScan.
+
+Запуск из корня проекта:
+    python -m benchmarks.post_scan --messages 100 --repeat 2000
+
+Оба варианта разбирают один и тот же сериализованный ответ GetHistoryRequest
+(messages.ChannelMessages). Высокоуровневый вариант повторяет то, что делает
+client.get_messages: словарь сущностей и _finish_init каждого сообщения.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime, UTC
+from types import SimpleNamespace
+
+from telethon import utils
+from telethon._updates import EntityCache
+from telethon.extensions import BinaryReader
+from telethon.tl import types
+from telethon.tl.types import messages as messages_types
+
+from benchmarks.harness import prepare_environment
+
+prepare_environment()
+
+from services.post_scanner import PostScan  # noqa: E402
+
+CHANNEL_ID = 1_000_001
+
+
+def build_payload(count: int) -> bytes:
+    """Сериализованный ответ GetHistoryRequest с count постами канала"""
+    channel = types.Channel(
+        id=CHANNEL_ID, title="Канал", photo=types.ChatPhotoEmpty(), date=datetime.now(UTC),
+        access_hash=CHANNEL_ID * 7919, username="bench_channel", broadcast=True
+    )
+    messages = []
+    for post_id in range(count, 0, -1):
+        messages.append(types.Message(
+            id=post_id,
+            peer_id=types.PeerChannel(CHANNEL_ID),
+            date=datetime.now(UTC),
+            message=f"Пост {post_id} " * 20,
+            post=True,
+            views=post_id * 10,
+            forwards=post_id % 3,
+            entities=[types.MessageEntityBold(offset=0, length=4), types.MessageEntityUrl(offset=5, length=10)],
+            reactions=types.MessageReactions(results=[
+                types.ReactionCount(reaction=types.ReactionEmoji(emoticon=emoji), count=post_id % 7 + 1)
+                for emoji in ("👍", "❤", "🔥")
+            ]),
+        ))
+    return messages_types.ChannelMessages(
+        pts=count + 1, count=count, messages=messages, topics=[], chats=[channel], users=[]
+    )._bytes()
+
+
+def parse_full(payload: bytes, client) -> list:
+    """Как client.get_messages: сообщения Telethon с отправителем, чатом и прочим"""
+    result = BinaryReader(payload).tgread_object()
+    entities = {utils.get_peer_id(entity): entity for entity in [*result.users, *result.chats]}
+    input_chat = utils.get_input_peer(result.chats[0])
+    for message in result.messages:
+        message._finish_init(client, entities, input_chat)
+    return result.messages
+
+
+def parse_compact(payload: bytes) -> PostScan:
+    """Как проверка канала движком: только ID, дата, реакции и просмотры"""
+    return PostScan.from_messages(BinaryReader(payload).tgread_object().messages)
+
+
+def measure(parse, repeat: int) -> dict:
+    parse()  # Прогрев
+    started = time.process_time()
+    for _ in range(repeat):
+        parse()
+    cpu = time.process_time() - started
+
+    # Выделения памяти на один разбор и память, которую занимает его результат
+    tracemalloc.start()
+    result = parse()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "cpu_us_per_scan": round(cpu / repeat * 1_000_000, 1),
+        "peak_kb_per_scan": round(peak / 1024, 1),
+        "retained_kb": round(retained / 1024, 1),
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    payload = build_payload(args.messages)
+    client = SimpleNamespace(_self_id=1, _mb_entity_cache=EntityCache())
+    full = measure(lambda: parse_full(payload, client), args.repeat)
+    compact = measure(lambda: parse_compact(payload), args.repeat)
+    return {
+        "messages": args.messages,
+        "payload_kb": round(len(payload) / 1024, 1),
+        "full": full,
+        "compact": compact,
+        "cpu_ratio": round(full["cpu_us_per_scan"] / compact["cpu_us_per_scan"], 2),
+        "retained_ratio": round(full["retained_kb"] / compact["retained_kb"], 1) if compact["retained_kb"] else None,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора постов канала")
+    parser.add_argument("--messages", type=int, default=20, help="Постов в ответе (движок запрашивает 20)")
+    parser.add_argument("--repeat", type=int, default=2000, help="Сколько раз разобрать ответ")
+    parser.add_argument("--json", help="Сохранить отчет в JSON-файл")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = run_benchmark(args)
+    for key, value in report.items():
+        print(f"{key:>16}: {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 import os
 from dotenv import load_dotenv, find_dotenv
 
-if not find_dotenv():
-    exit('Переменные окружения не загружены, так как отсутствует файл .env')
-else:
+if find_dotenv():
     load_dotenv()
+elif not os.getenv('BOT_TOKEN'):
+    # Без .env можно запуститься, только если переменные уже заданы в окружении (бенчмарки, контейнеры)
+    exit('Переменные окружения не загружены, так как отсутствует файл .env')
 
 
 DEFAULT_COMMANDS = (
@@ -31,5 +32,75 @@ ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY')
 
 CHECK_INTERVAL_MIN = 60  # 10 минут
 CHECK_INTERVAL_MAX = 360 # 1 час
+HEALTH_MIN_INTERVAL = 30          # Минимальный интервал для аккаунта, который постоянно находит работу, сек
+HEALTH_MAX_INTERVAL = 6 * 60 * 60 # Максимальный интервал для аккаунта с ошибками, сек
+HEALTH_SCORE_ALPHA = 0.3          # Вес последнего цикла в оценке здоровья аккаунта
+REACTION_DELAY = (1, 3)  # Пауза после реакции для естественности (мин, макс), сек
+RECONCILE_INTERVAL = 60  # Интервал сверки запущенных циклов активности с базой, сек
+
+SHED_PROBE_INTERVAL = 1                # Интервал замера отставания движка активности, сек
+SHED_LAG_THRESHOLDS = (10, 60, 300)    # Отставание, при котором включаются уровни сброса нагрузки 1-3, сек
+SHED_CYCLE_BUDGET = 120                # Длительность цикла аккаунта, сверх которой он считается затянувшимся, сек
+SHED_LAG_ALPHA = 0.2                   # Вес последнего замера в сглаженном отставании
+SHED_MAX_POSTS = 3                     # Сколько самых свежих постов канала обрабатывается на уровне 3
+DEFERRED_VIEWS_LIMIT = 200             # Сколько отложенных просмотров хранится на аккаунт
+
+BREAKER_FAILURE_THRESHOLD = 3           # Ошибок доступа к каналу подряд до размыкания предохранителя
+BREAKER_OPEN_SECONDS = 10 * 60          # Пауза после первого размыкания (удваивается при повторных), сек
+BREAKER_MAX_OPEN_SECONDS = 6 * 60 * 60  # Максимальная пауза разомкнутого предохранителя, сек
+BREAKER_DEACTIVATE_AFTER = 24 * 60 * 60 # Канал деактивируется, если ошибки продолжаются дольше, сек
+
+QUARANTINE_ACCOUNT_SECONDS = 5 * 60     # FloodWait не короче этого закрывает аккаунту все запросы, а не один тип, сек
+QUARANTINE_EVENTS_SIZE = 1000           # Сколько последних событий карантина хранится в памяти
+HANDOFF_TTL = 60 * 60                   # Сколько переданные другим аккаунтам посты ждут обработки, сек
+
+CRYPTO_WORKERS = 2                # Потоки расшифровки сессий (Fernet не выполняется в цикле событий)
+CRYPTO_BATCH_SIZE = 256           # Сколько сессий расшифровывается за одну задачу пула потоков
+SESSION_CACHE_SIZE = 1000         # Сколько расшифрованных сессий хранится в памяти (вытесненные затираются)
+
+POLL_RATE_ALPHA = 0.3             # Вес нового интервала между постами в оценке частоты публикаций канала
+POLL_CHECKS_PER_POST = 4          # Сколько раз проверять канал за ожидаемый интервал между его постами
+POLL_MIN_INTERVAL = 0             # Минимальный интервал проверки канала аккаунтом (0 - в каждом цикле), сек
+POLL_MAX_INTERVAL = 60 * 60       # Максимальный интервал проверки тихого канала, сек
+POLL_BURST_SECONDS = 15 * 60      # Сколько проверять канал в каждом цикле после нового поста, сек
+
+FIRST_CHECK_POSTS = 20            # Последних постов, которые читает первая проверка канала аккаунтом (без курсора)
+HISTORY_PAGE_SIZE = 100           # Постов за один запрос истории канала
+HISTORY_MAX_PAGES = 5             # Больше страниц за проверку не читается, более старые посты пропускаются
+DIFFERENCE_LIMIT = 100            # Сообщений в одном ответе GetChannelDifference
+PEER_DIALOGS_BATCH = 100          # Каналов в одном запросе GetPeerDialogs (проверка, есть ли новые посты)
 
-DATABASE_URL = f"sqlite+aiosqlite:///{os.path.join(BASE_DIR, 'database', 'accounts.db')}"
+ACCOUNTS_CONCURRENCY = 10         # Сколько аккаунтов одновременно выполняют массовую операцию (отписка, подписка)
+ACCOUNT_OPERATION_TIMEOUT = 60    # Таймаут операции одного аккаунта в массовой операции, сек
+
+JOB_WORKERS = 4                   # Количество воркеров фоновых задач
+JOB_PROGRESS_INTERVAL = 2         # Минимальный интервал между обновлениями сообщения о прогрессе задачи, сек
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'     # HTTP-эндпоинт с метриками (/metrics)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
+
+ENGINE_WORKERS = int(os.getenv('ENGINE_WORKERS', '0'))         # Процессы движка активности (0 - движок в процессе бота)
+ENGINE_SOCKET = os.getenv('ENGINE_SOCKET', os.path.join(BASE_DIR, 'engine.sock'))  # Unix-сокет связи бота с воркерами
+ENGINE_UVLOOP = os.getenv('ENGINE_UVLOOP', '1') == '1'         # Запускать воркеры на uvloop, если он установлен
+ENGINE_METRICS_INTERVAL = 5                                    # Как часто воркер отправляет боту метрики, сек
+ENGINE_RESTART_DELAY = 5                                       # Пауза перед перезапуском упавшего воркера, сек
+
+TRACE_ENABLED = os.getenv('TRACE_ENABLED', '1') == '1'         # Трассировка этапов цикла активности
+TRACE_BUFFER_SIZE = 20000                                      # Сколько последних отрезков хранится в памяти
+
+RETENTION_DAYS = 7                 # Сколько дней хранить записи о реакциях на посты
+RETENTION_BATCH_SIZE = 500         # Записей за одну транзакцию удаления
+RETENTION_BATCH_PAUSE = 0.5        # Пауза между транзакциями, чтобы не держать блокировку записи, сек
+RETENTION_INTERVAL = 6 * 60 * 60   # Интервал запуска очистки, сек
+ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive')  # Сжатые выгрузки удаленных записей
+
+LOG_FILE = os.getenv('LOG_FILE', 'bot.log')  # Файл лога в папке logs (у каждого воркера движка свой)
+LOG_MAX_BYTES = 20 * 1024 * 1024   # Размер файла лога до ротации
+LOG_BACKUP_COUNT = 10              # Сколько сжатых ротированных файлов хранить
+LOG_RATE_LIMIT = 20                # Не больше стольких одинаковых сообщений (для одного аккаунта)...
+LOG_RATE_PERIOD = 60               # ...за этот период, сек (ошибки не ограничиваются)
+
+DATABASE_URL = os.getenv(
+    'DATABASE_URL', f"sqlite+aiosqlite:///{os.path.join(BASE_DIR, 'database', 'accounts.db')}"
+)
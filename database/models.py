@@ -1,10 +1,11 @@
-from sqlalchemy import Column, Integer, String, LargeBinary, DateTime, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, LargeBinary, DateTime, Boolean, Text, ForeignKey, JSON, Index, event
 from sqlalchemy.ext.asyncio import AsyncAttrs, create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from datetime import datetime
 import asyncio
 
-from config_data.config import DATABASE_URL
+from config_data.config import DATABASE_URL, ENGINE_WORKERS
+from services.metrics import observe_db_queries, POOL_SIZE
 
 Base = declarative_base()
 
@@ -55,7 +56,7 @@ class UserChannel(Base):
     __tablename__ = 'user_channels'
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.user_id'))
+    user_id = Column(Integer, ForeignKey('users.user_id'), index=True)
     channel_id = Column(Integer)
     channel_username = Column(String)
     channel_title = Column(String)
@@ -71,6 +72,10 @@ class UserChannel(Base):
 
 class AccountReaction(Base):
     __tablename__ = 'account_reactions'
+    __table_args__ = (
+        # Проверки "уже реагировали на пост" и очистка старых записей по каналу
+        Index('ix_account_reactions_channel_post', 'channel_id', 'post_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     account_id = Column(Integer, ForeignKey('accounts.id'))
@@ -79,11 +84,41 @@ class AccountReaction(Base):
     reaction = Column(String)
     available_reactions = Column(JSON, nullable=True)  # Список доступных реакций канала
     user_reactions = Column(JSON, nullable=True)      # Пользовательский список реакций
-    reacted_at = Column(DateTime, default=datetime.utcnow)
+    reacted_at = Column(DateTime, default=datetime.utcnow, index=True)
     account = relationship("Account", back_populates="reactions")
     channel = relationship("UserChannel", back_populates="reactions") 
 
 
+class AccountChannelState(Base):
+    """ Состояние канала для аккаунта: последний полученный аккаунтом пост """
+    __tablename__ = 'account_channel_states'
+
+    account_id = Column(Integer, ForeignKey('accounts.id'), primary_key=True)
+    channel_id = Column(Integer, ForeignKey('user_channels.id'), primary_key=True)
+    last_message_id = Column(Integer, default=0)    # Посты с ID не больше этого аккаунт уже получил
+    pts = Column(Integer, nullable=True)            # pts канала при последней синхронизации (для GetChannelDifference)
+    is_member = Column(Boolean, default=False)      # Аккаунт вступил в канал (для каналов по приглашению)
+    access_hash = Column(BigInteger, nullable=True) # access_hash канала для аккаунта: канал не нужно искать заново
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Job(Base):
+    """ Модель фоновой задачи (добавление/удаление канала, выгрузка сессий и т.п.) """
+    __tablename__ = 'jobs'
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    user_id = Column(Integer)                         # Telegram ID пользователя, запустившего задачу
+    chat_id = Column(Integer)                         # Чат с сообщением о прогрессе
+    message_id = Column(Integer, nullable=True)       # Сообщение о прогрессе
+    payload = Column(JSON, nullable=True)
+    status = Column(String, default="queued", index=True)  # queued / running / done / failed
+    progress = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 engine = create_async_engine(
     DATABASE_URL,
     pool_size=5,              # Размер пула соединений
@@ -100,6 +135,24 @@ async_session = sessionmaker(
     autocommit=False          # Отключаем автоматический commit
 )
 
+# Новые базы SQLite создаются с инкрементальной очисткой: освободившиеся после удаления
+# старых записей страницы возвращаются через PRAGMA incremental_vacuum (см. services/retention.py)
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # Несколько процессов (бот и воркеры движка) ждут снятия блокировки, а не падают сразу
+        cursor.execute("PRAGMA busy_timeout = 30000")
+        if ENGINE_WORKERS:
+            # В WAL читатели не блокируют писателя из другого процесса
+            cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.close()
+
+# Замер длительности запросов и размера пула соединений для метрик
+observe_db_queries(engine)
+POOL_SIZE.set_function("db_connections", function=engine.sync_engine.pool.checkedout)
+
 # Функция для корректного закрытия соединений с базой данных при завершении работы
 async def close_db_connections():
     """
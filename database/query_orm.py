@@ -1,7 +1,12 @@
+from typing import Dict, Optional
+
 from sqlalchemy.future import select
 from database.models import User, Group, Account
 from database.models import async_session
 
+# Кэш соответствия Telegram ID -> User.id (первичный ключ пользователя не меняется)
+_user_pk_cache: Dict[int, int] = {}
+
 
 async def get_user_by_user_id(user_id: str):
     """ Функция для получения юзера по его Telegram ID """
@@ -9,6 +14,18 @@ async def get_user_by_user_id(user_id: str):
         result = await session.execute(select(User).where(User.user_id == user_id))
         return result.scalars().first()
 
+async def get_user_pk_by_user_id(user_id: str) -> Optional[int]:
+    """ Функция для получения первичного ключа юзера по его Telegram ID (с кэшированием) """
+    user_pk = _user_pk_cache.get(int(user_id))
+    if user_pk is not None:
+        return user_pk
+    async with async_session() as session:
+        result = await session.execute(select(User.id).where(User.user_id == user_id))
+        user_pk = result.scalar_one_or_none()
+    if user_pk is not None:
+        _user_pk_cache[int(user_id)] = user_pk
+    return user_pk
+
 async def get_user_by_id(user_id: int):
     """ Функция для получения юзера по его ID """
     async with async_session() as session:
@@ -0,0 +1,90 @@
+"""
+Воркер движка активности. Запускается процессом бота при ENGINE_WORKERS > 0:
+    python engine_worker.py --index 0 --workers 4 --socket engine.sock
+
+Ведет циклы активности аккаунтов своей части пользователей, получает от бота
+изменения аккаунтов и каналов и отправляет ему метрики, уведомления пользователям
+и собственные изменения (деактивация каналов и т.п.), чтобы бот сбросил свои кэши.
+"""
+import argparse
+import asyncio
+import os
+
+from config_data.config import ENGINE_SOCKET, ENGINE_UVLOOP, ENGINE_METRICS_INTERVAL
+from database.models import engine
+from loader import app_logger
+from services.change_feed import change_feed
+from services.engine_ipc import send_message, read_messages, change_to_message, message_to_fields
+from services.metrics import metrics
+from services.services import service, activity_manager
+
+
+async def push_metrics(writer: asyncio.StreamWriter, index: int):
+    while True:
+        await asyncio.sleep(ENGINE_METRICS_INTERVAL)
+        await send_message(writer, {"type": "metrics", "worker": index, "metrics": metrics.snapshot()})
+
+
+async def push_changes(writer: asyncio.StreamWriter, queue: asyncio.Queue):
+    """Отправляет боту изменения, опубликованные в воркере (изменения от бота не возвращаются)"""
+    try:
+        while True:
+            change = await queue.get()
+            if change.origin is None:
+                await send_message(writer, change_to_message(change))
+    finally:
+        change_feed.unsubscribe(queue)
+
+
+async def run_worker(index: int, workers: int, socket_path: str):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    await send_message(writer, {"type": "hello", "worker": index, "pid": os.getpid()})
+
+    async def notify(user_id: int, text: str):
+        await send_message(writer, {"type": "notify", "user_id": user_id, "text": text})
+
+    activity_manager.partition = (index, workers)
+    activity_manager.notifier = notify
+    await activity_manager.start(service)
+    app_logger.info("Воркер движка %s/%s: запущено циклов активности %s", index, workers,
+                    len(activity_manager.account_tasks))
+
+    metrics_task = asyncio.create_task(push_metrics(writer, index))
+    changes_task = asyncio.create_task(push_changes(writer, change_feed.subscribe()))
+    try:
+        async for message in read_messages(reader):
+            if message["type"] == "stop":
+                break
+            if message["type"] == "change":
+                # Изменение из процесса бота применяется через локальную ленту изменений
+                change_feed.publish(message["kind"], message["user_id"], origin="bot", **message_to_fields(message))
+    finally:
+        metrics_task.cancel()
+        changes_task.cancel()
+        await activity_manager.stop()
+        service.close()
+        writer.close()
+        await engine.dispose()
+        app_logger.info("Воркер движка %s остановлен", index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воркер движка активности")
+    parser.add_argument("--index", type=int, required=True, help="Номер воркера")
+    parser.add_argument("--workers", type=int, required=True, help="Число воркеров")
+    parser.add_argument("--socket", default=ENGINE_SOCKET, help="Unix-сокет процесса бота")
+    args = parser.parse_args()
+
+    loop_factory = None
+    if ENGINE_UVLOOP:
+        try:
+            import uvloop
+            loop_factory = uvloop.new_event_loop
+        except ImportError:
+            app_logger.info("uvloop не установлен, воркер работает на стандартном цикле asyncio")
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(run_worker(args.index, args.workers, args.socket))
+
+
+if __name__ == '__main__':
+    main()
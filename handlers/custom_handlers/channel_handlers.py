@@ -1,31 +1,27 @@
 from aiogram import types, F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup
 from aiogram.exceptions import TelegramBadRequest
 from sqlalchemy.orm import orm_insert_sentinel
 
-from config_data.config import API_HASH, API_ID
-from telethon.tl.functions.channels import GetFullChannelRequest, JoinChannelRequest
-from telethon.tl.types import ReactionEmoji, ChatInviteAlready
-from telethon.tl.functions.messages import ImportChatInviteRequest, CheckChatInviteRequest
-from telethon import TelegramClient
-from telethon.sessions import StringSession
-from telethon.network import ConnectionTcpAbridged
-from services.services import service
+from services.services import service, job_runner
 
 from database.models import UserChannel, async_session
-from database.query_orm import get_user_by_user_id, get_accounts_count_by_user
+from database.query_orm import get_user_by_user_id, get_user_pk_by_user_id, get_accounts_count_by_user
 from keyboards.inline.channels import (
     get_channels_keyboard,
     get_channel_actions_keyboard,
     get_reactions_keyboard
 )
 from loader import bot, dp, app_logger
-from services.channel_manager import ChannelManager
+from services.channel_manager import ChannelManager, run_for_accounts
+from services.channel_cards import channel_cards
+from services.jobs import JobContext
 from states.states import ChannelStates
 from services.account_manager import AccountService
 import asyncio
+from typing import Optional
 
 
 @dp.message(Command("my_channels"))
@@ -39,26 +35,28 @@ async def channels_handler(message: types.Message):
 
 @dp.callback_query(F.data == "my_channels")
 async def my_channels_callback(callback: CallbackQuery):
-    """Показывает список каналов пользователя"""
+    """Показывает первый канал пользователя"""
     try:
         async with async_session() as session:
-            user = await get_user_by_user_id(str(callback.from_user.id))
+            user_pk = await get_user_pk_by_user_id(str(callback.from_user.id))
             channel_manager = ChannelManager(session)
-            channels = await channel_manager.get_user_channels(user.id)
+            channel_id = await channel_manager.get_first_channel_id(user_pk)
+            card = None
+            if channel_id:
+                total_channels = await channel_manager.count_user_channels(user_pk)
+                card = await _get_channel_card(channel_id, 0, total_channels, channel_manager)
 
-            if not channels:
+            if not card:
                 await callback.message.edit_text(
                     "У вас пока нет добавленных каналов",
                     reply_markup=get_channels_keyboard()
                 )
                 return
 
-            await callback.message.edit_text(
-                await _get_channel_text(channels[0], channel_manager),
-                reply_markup=get_channel_actions_keyboard(channels[0].id, 0, len(channels))
-            )
+            text, markup = card
+            await callback.message.edit_text(text, reply_markup=markup)
     except Exception as e:
-        app_logger.error(f"Ошибка в my_channels_callback: {e}")
+        app_logger.error("Ошибка в my_channels_callback: %s", e)
         await callback.answer("Произошла ошибка. Попробуйте позже")
 
 
@@ -66,36 +64,56 @@ async def my_channels_callback(callback: CallbackQuery):
 async def navigate_channel(callback: CallbackQuery):
     """Обрабатывает навигацию между каналами"""
     try:
+        # Формат: prev_channel_{channel_id}_{index} (старые кнопки - без индекса)
+        parts = callback.data.split("_")
+        current_channel_id = int(parts[2])
+        current_index = int(parts[3]) if len(parts) > 3 else 0
+        forward = callback.data.startswith("next_channel_")
+
         async with async_session() as session:
-            user = await get_user_by_user_id(str(callback.from_user.id))
+            user_pk = await get_user_pk_by_user_id(str(callback.from_user.id))
             channel_manager = ChannelManager(session)
-            channels = await channel_manager.get_user_channels(user.id)
-            
-            if not channels:
-                await callback.answer("Каналы не найдены")
+            channel_id = await channel_manager.get_neighbour_channel_id(user_pk, current_channel_id, forward)
+            card = None
+            if channel_id:
+                total_channels = await channel_manager.count_user_channels(user_pk)
+                new_index = current_index + 1 if forward else current_index - 1
+                new_index = min(max(new_index, 0), total_channels - 1)
+                card = await _get_channel_card(channel_id, new_index, total_channels, channel_manager)
+
+            if not card:
+                await callback.answer("Достигнут конец списка")
                 return
 
-            current_channel_id = int(callback.data.split("_")[-1])
-            current_index = next((i for i, c in enumerate(channels) if c.id == current_channel_id), 0)
-            
-            if callback.data.startswith("prev_channel_"):
-                new_index = current_index - 1
-            else:
-                new_index = current_index + 1
-
-            if 0 <= new_index < len(channels):
-                channel = channels[new_index]
-                await callback.message.edit_text(
-                    await _get_channel_text(channel, channel_manager),
-                    reply_markup=get_channel_actions_keyboard(channel.id, new_index, len(channels))
-                )
-            else:
-                await callback.answer("Достигнут конец списка")
+            text, markup = card
+            await callback.message.edit_text(text, reply_markup=markup)
     except Exception as e:
-        app_logger.error(f"Ошибка в navigate_channel: {e}")
+        app_logger.error("Ошибка в navigate_channel: %s", e)
         await callback.answer("Произошла ошибка. Попробуйте позже")
 
 
+@dp.callback_query(F.data == "channel_position")
+async def channel_position_callback(callback: CallbackQuery):
+    """Кнопка с позицией канала в списке ничего не делает"""
+    await callback.answer()
+
+
+async def _get_channel_card(channel_id: int, index: int, total: int,
+                            channel_manager: ChannelManager) -> Optional[tuple[str, InlineKeyboardMarkup]]:
+    """Возвращает карточку канала (текст + клавиатура), обращаясь к базе только при промахе кэша"""
+    card = channel_cards.get(channel_id, index, total)
+    if card is None:
+        channel = await channel_manager.get_channel(channel_id)
+        if not channel:
+            return None
+        card = channel_cards.put(
+            channel_id, index, total,
+            await _get_channel_text(channel, channel_manager),
+            get_channel_actions_keyboard(channel.id, index, total)
+        )
+    return card
+
+
 async def _get_channel_text(channel: UserChannel, channel_manager: ChannelManager) -> str:
     """Формирует текст для отображения канала"""
     text = f"📢 {channel.channel_title}\n"
@@ -128,219 +146,219 @@ async def add_channel_callback(callback: CallbackQuery, state: FSMContext):
 @dp.message(ChannelStates.waiting_for_channel)
 async def process_channel(message: types.Message, state: FSMContext):
     """Обрабатывает добавление канала"""
+    channel_link = message.text.strip()
+    if not channel_link.startswith('@') and not channel_link.startswith('https://t.me/'):
+        await message.answer("Пожалуйста, отправьте корректную ссылку на канал")
+        await state.clear()
+        return
+
+    if channel_link.startswith('@'):
+        channel_username = channel_link[1:]
+    else:
+        channel_username = channel_link.split('/')[-1]
+
+    # Подключение аккаунтов может занять несколько минут, поэтому выполняется фоновой задачей
+    await state.clear()
     try:
-        channel_link = message.text.strip()
-        if not channel_link.startswith('@') and not channel_link.startswith('https://t.me/'):
-            await message.answer("Пожалуйста, отправьте корректную ссылку на канал")
-            await state.clear()
-            return
+        await job_runner.enqueue(
+            "add_channel",
+            user_id=message.from_user.id,
+            chat_id=message.chat.id,
+            payload={"channel_username": channel_username},
+            text="⏳ Получаем информацию о канале..."
+        )
+    except Exception as e:
+        app_logger.error("Ошибка при постановке задачи добавления канала: %s", e)
+        await message.answer(
+            "Произошла ошибка при добавлении канала. Попробуйте позже",
+            reply_markup=get_channels_keyboard()
+        )
 
-        async with async_session() as session:
-            channel_manager = ChannelManager(session)
-            user = await get_user_by_user_id(str(message.from_user.id))
-            
-            # Получаем активные аккаунты пользователя
-            accounts = await service.get_user_accounts(message.from_user.id)
-            channels = await channel_manager.get_user_channels(user.id)
-            user_channels = [channel.channel_title
-                             for channel in channels]
-            
-            if not accounts:
-                await message.answer(
-                    "У вас нет активных аккаунтов. Добавьте аккаунт через /add_account",
-                    reply_markup=get_channels_keyboard()
-                )
-                await state.clear()
-                return
-                
-            # Берем все аккаунты пользователя и присоединяемся к каналу
-            for account in accounts:
-                
-                if channel_link.startswith('@'):
-                    channel_username = channel_link[1:]
-                else:
-                    channel_username = channel_link.split('/')[-1]
 
-                # Получаем информацию о канале через Telethon используя аккаунт пользователя
-                try:
-                    session_str = await service.decrypt_session(account.session)
-                    
-                    # Создаем новый event loop для Telethon
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    
-                    client = TelegramClient(
-                        session=StringSession(session_str),
-                        api_id=API_ID,
-                        api_hash=API_HASH,
-                        connection=ConnectionTcpAbridged,
-                        device_model="Samsung S24 Ultra",
-                        app_version="10.2.0",
-                        system_version="Android 14",
-                        lang_code="en",
-                        system_lang_code="en-US",
-                        timeout=30,
-                        auto_reconnect=False,
-                        loop=loop
-                    )
-                    
-                    await client.connect()
-                    
-                    try:
-                        # Обработка открытых и закрытых каналов
-                        if "+" in channel_username:
-                            invite = await client(CheckChatInviteRequest(channel_username[1:]))
-
-                            if isinstance(invite, ChatInviteAlready):
-                                # Аккаунт уже в канале, получаем полные данные
-                                channel = await client.get_entity(invite.chat.id)
-                                full_channel = await client(GetFullChannelRequest(channel))
-                            else:
-                                # Присоединяемся к каналу
-                                try:
-                                    # Пытаемся присоединиться к каналу
-                                    result = await client(ImportChatInviteRequest(channel_username[1:]))
-                                    if hasattr(result, 'chats') and result.chats:
-                                        channel = result.chats[0]
-                                        full_channel = await client(GetFullChannelRequest(channel))
-                                        
-                                        # Подписываемся на канал и отключаем уведомления
-                                        try:
-                                            await client(JoinChannelRequest(channel))
-                                            app_logger.info(f"Успешно подписались на канал {channel.title} с аккаунта {account.phone}")
-                                            
-                                            # Полностью отключаем уведомления
-                                            from telethon.tl.functions.account import UpdateNotifySettingsRequest
-                                            from telethon.tl.types import InputPeerNotifySettings, InputNotifyPeer
-                                            
-                                            # Создаем настройки с полностью выключенными уведомлениями
-                                            settings = InputPeerNotifySettings(
-                                                show_previews=False,
-                                                silent=True,
-                                                mute_until=2147483647,  # Максимальное значение времени
-                                                sound=None              # Отключаем звук
-                                            )
-                                            
-                                            # Применяем настройки к каналу
-                                            await client(UpdateNotifySettingsRequest(
-                                                peer=InputNotifyPeer(peer=channel),
-                                                settings=settings
-                                            ))
-                                            
-                                            app_logger.info(f"Успешно отключили уведомления для канала {channel.title} с аккаунта {account.phone}")
-                                        except Exception as e:
-                                            app_logger.error(f"Ошибка при подписке на канал или отключении уведомлений: {e} с аккаунта {account.phone}")
-                                    else:
-                                        await message.answer(f"Не удалось присоединиться к закрытому каналу с аккаунта {account.phone}!")
-                                        return
-                                except Exception as e:
-                                    app_logger.error(f"Ошибка при присоединении к закрытому каналу: {e} с аккаунта {account.phone}")
-                                    await message.answer(f"Ошибка при присоединении к закрытому каналу с аккаунта {account.phone}!")
-                                    return
-                        else:  # Если канал публичный - не присоединяемся к каналу
-                            channel = await client.get_entity(channel_username)
-                            full_channel = await client(GetFullChannelRequest(channel))
-                            
-                            # Не подписываемся на публичные каналы, так как они доступны и без подписки
-                            app_logger.info(f"Публичный канал {channel.title} добавлен без подписки (аккаунт {account.phone})")
-
-                        # Обработка ситуации уже добавленного канала
-                        if channel.title in user_channels:
-                            await message.answer(f"Канал {channel.title} уже добавлен!")
-                            return
-
-                        available_reactions = []
-                        
-                        if hasattr(full_channel.full_chat.available_reactions, 'reactions'):
-                            reactions = full_channel.full_chat.available_reactions.reactions
-                            if isinstance(reactions, list):
-                                # Преобразуем ReactionEmoji в строки
-                                available_reactions = []
-                                for r in reactions:
-                                    if isinstance(r, ReactionEmoji):
-                                        available_reactions.append(str(r.emoticon))
-                        else:
-                            default_reactions = ["👍", "❤", "👏", "🎉", "🤩", "👌", "😍",
-                                                "❤", "💯", "🤣", "⚡", "🏆", "🤝", "✍"]
-                            available_reactions = default_reactions
-                    finally:
-                        await client.disconnect()
-                        loop.close()
-                
-                except Exception as e:
-                    app_logger.error(f"Ошибка получения информации о канале: {e}")
-                    await message.answer(
-                        "Не удалось получить информацию о канале. Попробуйте позже",
-                        reply_markup=get_channels_keyboard()
-                    )
-                    await state.clear()
-                    return
+@job_runner.job("add_channel")
+async def add_channel_job(job: JobContext):
+    """Фоновая задача добавления канала: получение информации о канале и подписка аккаунтов"""
+    channel_username = job.payload["channel_username"]
 
-            # Получаем количество аккаунтов пользователя для установки максимального количества реакций
-            account_count = await get_accounts_count_by_user(message.from_user.id)
-
-            # Добавляем канал в базу
-            channel_id = await channel_manager.add_channel(
-                user_id=user.id,
-                channel_id=channel.id,
-                username=channel_username,
-                title=channel.title,
-                min_reactions=1,   # Минимум — одна реакция на пост
-                max_reactions=account_count,  # Максимум реакций — сколько аккаунтов у юзера
-                available_reactions=available_reactions
+    async with async_session() as session:
+        channel_manager = ChannelManager(session)
+        user = await get_user_by_user_id(str(job.user_id))
+        
+        # Получаем активные аккаунты пользователя
+        accounts = await service.get_user_accounts(job.user_id)
+        channels = await channel_manager.get_user_channels(user.id)
+        user_channels = [channel.channel_title
+                         for channel in channels]
+        
+        if not accounts:
+            await job.progress(
+                "У вас нет активных аккаунтов. Добавьте аккаунт через /add_account",
+                reply_markup=get_channels_keyboard(),
+                force=True
             )
-            
-            # Логируем добавление канала
-            app_logger.info(f"Пользователь {message.from_user.full_name} добавил канал {channel.title} (ID: {channel.id})")
-            
-            # Сохраняем данные в состоянии
-            await state.update_data(
-                channel_id=channel_id,
-                selected_reactions=[],
-                available_reactions=available_reactions
+            return
+
+        # Получаем информацию о канале один раз - первым аккаунтом, которому это удастся
+        resolved = {}
+        # Аккаунты, вступившие в закрытый канал: ID аккаунта -> канал
+        joined = {}
+
+        async def fetch(client, account):
+            resolved["channel"], resolved["reactions"] = await ChannelManager.fetch_channel_info(
+                client, channel_username
             )
-            
-            await message.answer(
-                f"Канал {channel.title} успешно добавлен\n"
-                "Выберите реакции для использования:",
-                reply_markup=get_reactions_keyboard(
-                    [(r, f"reaction_{hash(r)}") for r in available_reactions],
-                    []
-                )
+            if channel_username.startswith('+'):
+                joined[account.id] = resolved["channel"]
+
+        resolver = None
+        for account in accounts:
+            [(_, error)] = await run_for_accounts([account], service, fetch)
+            if error is None:
+                resolver = account
+                break
+            app_logger.error("Ошибка получения информации о канале с аккаунта %s: %s", account.phone, error)
+
+        if resolver is None:
+            await job.progress(
+                "Не удалось получить информацию о канале. Попробуйте позже",
+                reply_markup=get_channels_keyboard(),
+                force=True
             )
-            
-    except Exception as e:
-        app_logger.error(f"Ошибка при добавлении канала: {e}")
-        await message.answer(
-            "Произошла ошибка при добавлении канала. Попробуйте позже",
-            reply_markup=get_channels_keyboard()
+            return
+
+        channel, available_reactions = resolved["channel"], resolved["reactions"]
+
+        # Обработка ситуации уже добавленного канала
+        if channel.title in user_channels:
+            await job.progress(f"Канал {channel.title} уже добавлен!", force=True)
+            return
+
+        failed = []
+        if channel_username.startswith('+'):
+            # Остальные аккаунты вступают в закрытый канал параллельно
+            async def join(client, account):
+                joined[account.id] = await ChannelManager.join_by_invite(client, channel_username[1:])
+                app_logger.info("Аккаунт %s присоединился к каналу %s", account.phone, channel.title)
+
+            async def on_join_result(account, error, done, total):
+                if error is not None:
+                    failed.append(account.phone)
+                    app_logger.error("Ошибка при присоединении к закрытому каналу: %s с аккаунта %s", error, account.phone)
+                await job.progress(f"⏳ Подключаем аккаунты к каналу {channel.title}: {done}/{total}")
+
+            others = [account for account in accounts if account is not resolver]
+            await run_for_accounts(others, service, join, on_join_result)
+        else:
+            # Не подписываемся на публичные каналы, так как они доступны и без подписки
+            app_logger.info("Публичный канал %s добавлен без подписки", channel.title)
+
+        # Получаем количество аккаунтов пользователя для установки максимального количества реакций
+        account_count = await get_accounts_count_by_user(job.user_id)
+
+        # Добавляем канал в базу
+        channel_id = await channel_manager.add_channel(
+            user_id=user.id,
+            channel_id=channel.id,
+            username=channel_username,
+            title=channel.title,
+            min_reactions=1,   # Минимум — одна реакция на пост
+            max_reactions=account_count,  # Максимум реакций — сколько аккаунтов у юзера
+            available_reactions=available_reactions
+        )
+        
+        # Логируем добавление канала
+        app_logger.info("Пользователь %s добавил канал %s (ID: %s)", job.user_id, channel.title, channel.id)
+
+        # Вступившим аккаунтам не нужно повторно вступать в канал при проверке постов
+        if joined and channel_id:
+            await channel_manager.record_memberships(channel_id, joined)
+        
+        # Сохраняем данные в состоянии пользователя для выбора реакций
+        state = dp.fsm.get_context(bot=bot, chat_id=job.chat_id, user_id=job.user_id)
+        await state.update_data(
+            channel_id=channel_id,
+            selected_reactions=[],
+            available_reactions=available_reactions
+        )
+
+        text = f"Канал {channel.title} успешно добавлен\n"
+        if failed:
+            text += f"Не удалось присоединиться к каналу с аккаунтов: {', '.join(failed)}\n"
+        await job.progress(
+            text + "Выберите реакции для использования:",
+            reply_markup=get_reactions_keyboard(
+                [(r, f"reaction_{hash(r)}") for r in available_reactions],
+                []
+            ),
+            force=True
         )
-        await state.clear()
 
 
 @dp.callback_query(F.data.startswith("delete_channel_"))
 async def delete_channel_callback(callback: CallbackQuery):
     """Удаляет канал"""
     channel_id = int(callback.data.split("_")[-1])
+    await callback.answer()
     try:
-        async with async_session() as session:
-            channel_manager = ChannelManager(session)
-            success = await channel_manager.delete_channel(channel_id, service)
-            
-            if success:
-                await callback.message.edit_text(
-                    "Канал успешно удален",
-                    reply_markup=get_channels_keyboard()
-                )
-            else:
-                await callback.message.edit_text(
-                    "Ошибка при удалении канала",
-                    reply_markup=get_channels_keyboard()
-                )
+        # Отписка всех аккаунтов может занять несколько минут, поэтому выполняется фоновой задачей
+        await job_runner.enqueue(
+            "delete_channel",
+            user_id=callback.from_user.id,
+            chat_id=callback.message.chat.id,
+            payload={"channel_id": channel_id},
+            message_id=callback.message.message_id,
+            text="⏳ Удаляем канал..."
+        )
     except Exception as e:
-        app_logger.error(f"Ошибка при удалении канала: {e}")
-        await callback.answer("Произошла ошибка. Попробуйте позже")
-    await callback.answer()
+        app_logger.error("Ошибка при удалении канала: %s", e)
+        await callback.message.answer("Произошла ошибка. Попробуйте позже")
+
+
+@job_runner.job("delete_channel")
+async def delete_channel_job(job: JobContext):
+    """
+    Фоновая задача удаления канала и отписки от него всех аккаунтов.
+
+    Данные канала и список аккаунтов сохраняются в задаче до удаления записи, а отписанные
+    аккаунты - по мере отписки, поэтому перезапущенная задача доотписывает только оставшиеся.
+    """
+    target = job.payload.get("target")
+    if target is None:
+        async with async_session() as session:
+            target = await ChannelManager(session).get_deletion_target(job.payload["channel_id"], service)
+        if target is None:
+            # Канал удален до запуска задачи
+            await job.progress("Канал успешно удален", reply_markup=get_channels_keyboard(), force=True)
+            return
+        await job.save_payload(target=target, left=[])
+
+    async with async_session() as session:
+        success = await ChannelManager(session).delete_channel(target["channel_id"])
+    if not success:
+        await job.progress("Ошибка при удалении канала", reply_markup=get_channels_keyboard(), force=True)
+        return
+
+    left = list(job.payload.get("left", []))
+    already_left = len(left)
+    failed = []
+
+    async def on_leave_result(account, error, done, total):
+        if error is None:
+            left.append(account.phone)
+            await job.save_payload(left=list(left))
+        else:
+            failed.append(account.phone)
+        text = f"Канал удален. Отписка аккаунтов: {already_left + done}/{already_left + total}"
+        if failed:
+            text += f"\nНе удалось отписать: {', '.join(failed)}"
+        if done == total:
+            await job.progress(text, reply_markup=get_channels_keyboard(), force=True)
+        else:
+            await job.progress(text)
+
+    if not await ChannelManager.leave_channel(target, service, on_leave_result, skip_phones=left):
+        # Отписывать некого: у пользователя нет аккаунтов или все уже отписаны
+        await job.progress("Канал успешно удален", reply_markup=get_channels_keyboard(), force=True)
 
 
 @dp.callback_query(F.data.startswith("change_reaction_"))
@@ -383,7 +401,7 @@ async def change_reaction_callback(callback: CallbackQuery, state: FSMContext):
             )
 
     except Exception as e:
-        app_logger.error(f"Ошибка при изменении реакции: {e}")
+        app_logger.error("Ошибка при изменении реакции: %s", e)
         await callback.answer("Произошла ошибка. Попробуйте позже")
 
 
@@ -419,6 +437,7 @@ async def process_reaction(callback: CallbackQuery, state: FSMContext):
                 )
                 
                 if success:
+                    channel_cards.invalidate(channel_id)
                     await callback.message.edit_text(
                         f"Реакции для канала {channel.channel_title} успешно обновлены",
                         reply_markup=get_channels_keyboard()
@@ -472,7 +491,7 @@ async def process_reaction(callback: CallbackQuery, state: FSMContext):
             )
             
     except Exception as e:
-        app_logger.error(f"Ошибка при обработке реакции: {e}")
+        app_logger.error("Ошибка при обработке реакции: %s", e)
         await callback.answer("Произошла ошибка. Попробуйте позже")
 
 @dp.callback_query(F.data.startswith("change_count_reaction_"))
@@ -488,7 +507,7 @@ async def change_count_reaction_callback(callback: CallbackQuery, state: FSMCont
                                          "в формате min-max (1-15)")
         await state.set_state(ChannelStates.waiting_for_count_reaction)
     except Exception as e:
-        app_logger.error(f"Ошибка при парсинге ID канала: {e}")
+        app_logger.error("Ошибка при парсинге ID канала: %s", e)
         await callback.answer("Произошла ошибка. Попробуйте позже")
 
 
@@ -497,8 +516,8 @@ async def get_count_reaction_handler(message: types.Message, state: FSMContext):
     """ Получает и сохраняет кол-во реакций для канала """
     data = await state.get_data()
     channel_id = data.get("channel_id")
-    app_logger.info(f"Пользователь {message.from_user.full_name} хочет обновить "
-                    f"кол-во реакций для канала {channel_id}: {message.text}")
+    app_logger.info("Пользователь %s хочет обновить кол-во реакций для канала %s: %s",
+                    message.from_user.full_name, channel_id, message.text)
 
     if not channel_id:
         await message.answer("Ошибка: данные о канале не найдены")
@@ -530,6 +549,7 @@ async def get_count_reaction_handler(message: types.Message, state: FSMContext):
             int(max_reactions)
         )
         if result:
+            channel_cards.invalidate(channel_id)
             await message.answer("Количество реакций успешно обновлено!")
             await state.clear()
             await message.answer(
@@ -554,7 +574,7 @@ async def change_count_views_callback(callback: CallbackQuery, state: FSMContext
         await callback.message.edit_text("Введите количество просмотров на пост")
         await state.set_state(ChannelStates.waiting_for_count_views)
     except Exception as e:
-        app_logger.error(f"Ошибка при парсинге ID канала: {e}")
+        app_logger.error("Ошибка при парсинге ID канала: %s", e)
         await callback.answer("Произошла ошибка. Попробуйте позже")
 
 @dp.message(ChannelStates.waiting_for_count_views)
@@ -562,8 +582,8 @@ async def get_count_views_handler(message: types.Message, state: FSMContext):
     """ Получает и сохраняет кол-во просмотров для канала """
     data = await state.get_data()
     channel_id = data.get("channel_id")
-    app_logger.info(f"Пользователь {message.from_user.full_name} хочет обновить "
-                    f"кол-во просмотров для канала {channel_id}: {message.text}")
+    app_logger.info("Пользователь %s хочет обновить кол-во просмотров для канала %s: %s",
+                    message.from_user.full_name, channel_id, message.text)
 
     if not channel_id:
         await message.answer("Ошибка: данные о канале не найдены")
@@ -597,6 +617,7 @@ async def get_count_views_handler(message: types.Message, state: FSMContext):
             views_count
         )
         if result:
+            channel_cards.invalidate(channel_id)
             await message.answer("Количество просмотров успешно обновлено!")
             await state.clear()
             await message.answer(
@@ -620,7 +641,7 @@ async def back_to_channels_callback(callback: CallbackQuery):
         if "message is not modified" not in str(e):
             raise
     except Exception as e:
-        app_logger.error(f"Error in back_to_channels_callback: {e}")
+        app_logger.error("Error in back_to_channels_callback: %s", e)
         await callback.answer("Произошла ошибка", show_alert=True)
 
 @dp.callback_query(F.data == "search_user_channel")
@@ -673,7 +694,7 @@ async def search_user_channel_process(message: types.Message, state: FSMContext)
                 
             await state.clear()
     except Exception as e:
-        app_logger.error(f"Ошибка при поиске каналов: {e}")
+        app_logger.error("Ошибка при поиске каналов: %s", e)
         await message.answer("Произошла ошибка при поиске каналов", 
                             reply_markup=get_channels_keyboard())
         await state.clear()
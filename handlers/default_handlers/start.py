@@ -27,7 +27,7 @@ async def bot_start(message: types.Message):
                 reply_markup=handlers_reply()
             )
         else:
-            app_logger.info(f"Новый пользователь: {message.from_user.full_name} — {message.from_user.username}")
+            app_logger.info("Новый пользователь: %s — %s", message.from_user.full_name, message.from_user.username)
             await message.answer(
                 f"Здравствуйте, {message.from_user.full_name}! Я — телеграм-бот. \n"
                 f"Вам доступны следующие команды:\n" + "\n".join(commands),
@@ -59,4 +59,4 @@ async def bot_start(message: types.Message):
                 last_name=message.from_user.last_name,
                 is_admin=int(message.from_user.id) in ALLOWED_USERS
             )
-        app_logger.info(f"Новый пользователь: {message.from_user.full_name} — {message.from_user.username}")
+        app_logger.info("Новый пользователь: %s — %s", message.from_user.full_name, message.from_user.username)
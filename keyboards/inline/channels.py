@@ -21,42 +21,46 @@ def get_channels_keyboard() -> InlineKeyboardMarkup:
 def get_channel_actions_keyboard(channel_id: int, current_index: int, total_channels: int) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     
-    # Кнопки навигации
+    # Кнопки навигации (позиция передается в callback_data, чтобы не пересчитывать ее по списку каналов)
+    navigation = []
     if total_channels > 1:
         if current_index > 0:
-            builder.add(InlineKeyboardButton(
+            navigation.append(InlineKeyboardButton(
                 text="⬅️ Предыдущий",
-                callback_data=f"prev_channel_{channel_id}"
+                callback_data=f"prev_channel_{channel_id}_{current_index}"
             ))
+        navigation.append(InlineKeyboardButton(
+            text=f"{current_index + 1}/{total_channels}",
+            callback_data="channel_position"
+        ))
         if current_index < total_channels - 1:
-            builder.add(InlineKeyboardButton(
+            navigation.append(InlineKeyboardButton(
                 text="Следующий ➡️",
-                callback_data=f"next_channel_{channel_id}"
+                callback_data=f"next_channel_{channel_id}_{current_index}"
             ))
-        builder.adjust(2)
+        builder.row(*navigation)
     
     # Кнопки действий
-    builder.add(InlineKeyboardButton(
+    builder.row(InlineKeyboardButton(
         text="❌ Удалить",
         callback_data=f"delete_channel_{channel_id}"
     ))
-    builder.add(InlineKeyboardButton(
+    builder.row(InlineKeyboardButton(
         text="🔄 Изменить реакции",
         callback_data=f"change_reaction_{channel_id}"
     ))
-    builder.add(InlineKeyboardButton(
+    builder.row(InlineKeyboardButton(
         text="🔄 Изменить количество реакций",
         callback_data=f"change_count_reaction_{channel_id}"
     ))
-    builder.add(InlineKeyboardButton(
+    builder.row(InlineKeyboardButton(
         text="🔄 Изменить количество просмотров",
         callback_data=f"change_count_views_{channel_id}"
     ))
-    builder.add(InlineKeyboardButton(
+    builder.row(InlineKeyboardButton(
         text="⬅️ Назад",
         callback_data="back_to_channels"
     ))
-    builder.adjust(1)
     return builder.as_markup()
 
 def get_reactions_keyboard(reactions: list[tuple[str, str]], selected_reactions: list[str] = None) -> InlineKeyboardMarkup:
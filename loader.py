@@ -1,11 +1,11 @@
 import os
 import logging
-from logging.handlers import RotatingFileHandler
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.fsm.storage.memory import MemoryStorage
-from config_data.config import BOT_TOKEN, BASE_DIR
+from config_data.config import BOT_TOKEN, BASE_DIR, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_RATE_LIMIT, LOG_RATE_PERIOD
+from utils.logger import CompressedRotatingFileHandler, JsonFormatter, setup_queue_logging
 
 storage = MemoryStorage()
 bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode='HTML'))
@@ -13,6 +13,8 @@ dp = Dispatcher(storage=storage)
 
 
 # Настройка логирования
+# Записи кладутся в очередь, а форматирование и запись на диск выполняет отдельный поток,
+# чтобы логирование не блокировало event loop
 
 log_formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(name)s - %(message)s')
 logs_path = os.path.join(BASE_DIR, "logs")
@@ -20,11 +22,12 @@ logs_path = os.path.join(BASE_DIR, "logs")
 if not os.path.exists(logs_path):
     os.makedirs(logs_path)
 
-file_handler = RotatingFileHandler(
-    os.path.join(logs_path, "bot.log"),
-    mode='a', maxBytes=2*1024*1024, backupCount=1, encoding="utf8"
+# В файл пишется JSON (по записи на строку), ротированные файлы сжимаются в gzip
+file_handler = CompressedRotatingFileHandler(
+    os.path.join(logs_path, LOG_FILE),
+    mode='a', maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf8"
 )
-file_handler.setFormatter(log_formatter)
+file_handler.setFormatter(JsonFormatter())
 file_handler.setLevel(logging.DEBUG)
 stream_handler = logging.StreamHandler()
 stream_handler.setFormatter(log_formatter)
@@ -32,5 +35,6 @@ stream_handler.setLevel(logging.INFO)
 
 app_logger = logging.getLogger("app_logger")
 app_logger.setLevel(logging.DEBUG)
-app_logger.addHandler(file_handler)
-app_logger.addHandler(stream_handler)
+log_listener = setup_queue_logging(
+    app_logger, [file_handler, stream_handler], rate=LOG_RATE_LIMIT, period=LOG_RATE_PERIOD
+)
@@ -1,11 +1,12 @@
 import asyncio
 from datetime import datetime, timedelta
 
-from config_data.config import ADMIN_ID
-from database.query_orm import get_all_users
+from config_data.config import ADMIN_ID, METRICS_ENABLED, METRICS_HOST, METRICS_PORT, ENGINE_WORKERS
 from loader import bot, dp, app_logger
-from services.services import service, activity_manager
+from services.services import service, activity_manager, job_runner, retention
 from services.channel_manager import ChannelManager
+from services.metrics import start_metrics_server
+from services.engine_ipc import EngineSupervisor
 from database.models import Base, engine, UserChannel, Account
 import handlers
 
@@ -17,32 +18,51 @@ async def main():
         await conn.run_sync(Base.metadata.create_all)
     app_logger.info("Подключение к базе данных...")
 
-    # Запуск фоновых задач для существующих аккаунтов
-    users = await get_all_users()
+    # Запуск HTTP-эндпоинта с метриками
+    metrics_runner = None
+    if METRICS_ENABLED:
+        metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+        app_logger.info("Метрики доступны на http://%s:%s/metrics", METRICS_HOST, METRICS_PORT)
 
-    for user in users:
-        try:
-            await activity_manager.start_user_activity(user.user_id, service)
-        except Exception:
-            app_logger.info(f"Пользователь с ID: {user.user_id} не найден!")
-    app_logger.info(f"Запущены фоновые задачи для {len(users)} пользователей...")
+    # Запуск воркеров фоновых задач (с восстановлением незавершенных задач)
+    await job_runner.start()
+
+    # Периодическая очистка старых записей о реакциях
+    retention.start()
+
+    # Запуск циклов активности существующих аккаунтов; дальше менеджер
+    # применяет изменения аккаунтов из ленты изменений и сверяется с базой.
+    # При ENGINE_WORKERS > 0 циклы ведут отдельные процессы-воркеры
+    supervisor = None
+    if ENGINE_WORKERS:
+        supervisor = EngineSupervisor(ENGINE_WORKERS)
+        await supervisor.start()
+    else:
+        await activity_manager.start(service)
+        app_logger.info("Запущены циклы активности для %s аккаунтов...", len(activity_manager.account_tasks))
 
     # Отправка уведомления администратору
     bot_data = await bot.get_me()
-    app_logger.info(f"Бот @{bot_data.username} запущен...")
+    app_logger.info("Бот @%s запущен...", bot_data.username)
     await bot.send_message(
         int(ADMIN_ID),
         f"Бот @{bot_data.username} запущен."
     )
-    app_logger.info(f"Отправлено уведомление администратору")
+    app_logger.info("Отправлено уведомление администратору")
 
     # Запуск бота
     await dp.start_polling(bot)
 
     # Очистка при завершении
-    for task in activity_manager.user_tasks.values():
-        task.cancel()
-    await asyncio.gather(*activity_manager.user_tasks.values(), return_exceptions=True)
+    await job_runner.stop()
+    await retention.stop()
+    if metrics_runner:
+        await metrics_runner.cleanup()
+    if supervisor:
+        await supervisor.stop()
+    else:
+        await activity_manager.stop()
+    service.close()
 
 if __name__ == '__main__':
     asyncio.run(main())
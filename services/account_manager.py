@@ -1,5 +1,6 @@
-from typing import Dict, List
-from sqlalchemy import select, and_
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from sqlalchemy import select, delete, and_, func, case
 from cryptography.fernet import Fernet
 import asyncio
 import random
@@ -7,8 +8,16 @@ from datetime import datetime
 from telethon import TelegramClient
 from telethon.errors import SessionExpiredError, SessionPasswordNeededError, AuthKeyError, FloodWaitError, RPCError
 from telethon.sessions import StringSession
-from config_data.config import CHECK_INTERVAL_MIN, CHECK_INTERVAL_MAX, API_ID, API_HASH
-from database.models import Account, AccountReaction, User, async_session
+from config_data.config import (
+    REACTION_DELAY,
+    RECONCILE_INTERVAL,
+    SHED_MAX_POSTS,
+    CRYPTO_WORKERS,
+    CRYPTO_BATCH_SIZE,
+    API_ID,
+    API_HASH
+)
+from database.models import Account, AccountReaction, AccountChannelState, User, async_session
 from telethon.tl.types import User as TelegramUser
 from telethon.network import ConnectionTcpAbridged
 from telethon.tl.functions.messages import SendReactionRequest, GetMessagesViewsRequest
@@ -18,6 +27,29 @@ from telethon import functions
 from database.query_orm import get_user_by_user_id, get_account_by_phone
 from loader import app_logger, bot
 from services.channel_manager import ChannelManager
+from services.metrics import (
+    CYCLE_DURATION,
+    ACCOUNT_CYCLE_DURATION,
+    SCHEDULER_LATENESS,
+    REACTIONS_SENT,
+    VIEWS_SENT,
+    POSTS_HANDED_OFF,
+    SESSION_DECRYPTS,
+    POOL_SIZE
+)
+from services.account_runtime import AccountRuntime
+from services import change_feed as changes
+from services.change_feed import change_feed
+from services.engine_ipc import partition_of
+from services.health import CycleReport, HealthTracker
+from services.load_shedder import LoadShedder
+from services.poll_scheduler import poll_scheduler
+from services.post_scanner import reaction_total
+from services.quarantine import quarantine, pending_work
+from services.session_cache import SessionCache
+from services.telegram_client import InstrumentedTelegramClient
+from services.tracing import tracer
+from utils.logger import log_account
 
 from sqlalchemy.exc import OperationalError, TimeoutError
 
@@ -43,34 +75,110 @@ async def execute_with_retry(async_func, *args, max_retries=5, retry_delay=1, **
             retries += 1
             if "database is locked" in str(e) or "connection timed out" in str(e):
                 wait_time = retry_delay * (2 ** retries)  # Экспоненциальная задержка
-                app_logger.warning(f"База данных заблокирована или таймаут соединения. Повторная попытка {retries}/{max_retries} через {wait_time} сек...")
+                app_logger.warning("База данных заблокирована или таймаут соединения. Повторная попытка %s/%s через %s сек...", retries, max_retries, wait_time)
                 await asyncio.sleep(wait_time)
                 continue
             elif retries >= max_retries:
-                app_logger.error(f"Достигнут лимит повторных попыток ({max_retries}). Последняя ошибка: {e}")
+                app_logger.error("Достигнут лимит повторных попыток (%s). Последняя ошибка: %s", max_retries, e)
                 return None
             else:
                 raise
         except Exception as e:
-            app_logger.error(f"Неожиданная ошибка при выполнении транзакции: {e}")
+            app_logger.error("Неожиданная ошибка при выполнении транзакции: %s", e)
             raise
 
 class AccountService:
     def __init__(self, encryption_key: str):
         self.cipher = Fernet(encryption_key.encode())
         self.active_sessions: Dict[str, TelegramClient] = {}
+        # Шифрование выполняется в пуле потоков, чтобы не останавливать цикл событий
+        self.crypto_executor = ThreadPoolExecutor(max_workers=CRYPTO_WORKERS, thread_name_prefix="crypto")
+        self.sessions = SessionCache()
+        # Сессии, ждущие расшифровки: ключ кэша -> (зашифрованная сессия, future ожидающих)
+        self._pending_decrypts: Dict[bytes, tuple] = {}
+        self._flush_scheduled = False
+        POOL_SIZE.set_function("active_clients", function=lambda: len(self.active_sessions))
+        POOL_SIZE.set_function("cached_sessions", function=lambda: len(self.sessions))
+
+    async def _run_crypto(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.crypto_executor, function, *args)
 
     async def encrypt_session(self, session_str: str) -> bytes:
-        app_logger.debug(f"Шифрование сессии длиной {len(session_str)} символов")
-        return self.cipher.encrypt(session_str.encode())
+        app_logger.debug("Шифрование сессии длиной %s символов", len(session_str))
+        return await self._run_crypto(self.cipher.encrypt, session_str.encode())
 
     async def decrypt_session(self, encrypted_data: bytes) -> str:
-        app_logger.debug(f"Дешифрование данных сессии размером {len(encrypted_data)} байт")
-        return self.cipher.decrypt(encrypted_data).decode()
+        """
+        Расшифровывает сессию. Расшифрованные сессии кэшируются; запросы, пришедшие
+        в одной итерации цикла событий (например, при запуске всех циклов активности),
+        расшифровываются одной задачей пула потоков.
+        """
+        session_str = self.sessions.get(encrypted_data)
+        if session_str is not None:
+            SESSION_DECRYPTS.inc("hit")
+            return session_str
+        SESSION_DECRYPTS.inc("miss")
+
+        key = SessionCache.key(encrypted_data)
+        pending = self._pending_decrypts.get(key)
+        if pending is None:
+            loop = asyncio.get_running_loop()
+            pending = (encrypted_data, loop.create_future())
+            self._pending_decrypts[key] = pending
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                loop.call_soon(self._flush_decrypts)
+        # shield: отмена одного ожидающего не должна отменять расшифровку для остальных
+        return await asyncio.shield(pending[1])
+
+    async def decrypt_sessions(self, encrypted: List[bytes]) -> List[str]:
+        """Расшифровывает несколько сессий (пакетами в пуле потоков)"""
+        return list(await asyncio.gather(*(self.decrypt_session(item) for item in encrypted)))
+
+    def _flush_decrypts(self):
+        self._flush_scheduled = False
+        batch = list(self._pending_decrypts.values())
+        self._pending_decrypts.clear()
+        loop = asyncio.get_running_loop()
+        for start in range(0, len(batch), CRYPTO_BATCH_SIZE):
+            chunk = batch[start:start + CRYPTO_BATCH_SIZE]
+            app_logger.debug("Дешифрование пакета из %s сессий", len(chunk))
+            job = loop.run_in_executor(self.crypto_executor, self._decrypt_batch, [item[0] for item in chunk])
+            job.add_done_callback(lambda job, chunk=chunk: self._resolve_decrypts(chunk, job))
+
+    def _decrypt_batch(self, encrypted: List[bytes]) -> list:
+        """Выполняется в пуле потоков: ошибка одной сессии не мешает остальным"""
+        results = []
+        for item in encrypted:
+            try:
+                results.append(self.cipher.decrypt(item).decode())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def close(self):
+        """Затирает кэш расшифрованных сессий и останавливает пул потоков"""
+        self.sessions.clear()
+        self.crypto_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _resolve_decrypts(self, chunk: list, job: asyncio.Future):
+        if job.cancelled() or job.exception() is not None:
+            error = RuntimeError("расшифровка сессий не выполнена") if job.cancelled() else job.exception()
+            results = [error] * len(chunk)
+        else:
+            results = job.result()
+        for (encrypted, future), result in zip(chunk, results):
+            if isinstance(result, Exception):
+                if not future.done():
+                    future.set_exception(result)
+                continue
+            self.sessions.put(encrypted, result)
+            if not future.done():
+                future.set_result(result)
 
     async def _create_client(self, session_str: str) -> TelegramClient:
-        app_logger.debug(f"Создание клиента для сессии: {session_str[:15]}...")
-        return TelegramClient(
+        app_logger.debug("Создание клиента для сессии: %s...", session_str[:15])
+        return InstrumentedTelegramClient(
             session=StringSession(session_str),
             api_id=API_ID,
             api_hash=API_HASH,
@@ -81,9 +189,19 @@ class AccountService:
             lang_code="en",
             system_lang_code="en-US",
             timeout=30,
-            auto_reconnect=False
+            auto_reconnect=False,
+            # Telethon по умолчанию сам ждет FloodWait до 60 сек внутри запроса, блокируя цикл аккаунта.
+            # Любой FloodWait должен дойти до карантина и передачи постов другим аккаунтам
+            flood_sleep_threshold=0
         )
 
+    def get_active_client(self, phone: str) -> Optional[TelegramClient]:
+        """Возвращает уже подключенный клиент аккаунта (если аккаунт сейчас в цикле активности)"""
+        client = self.active_sessions.get(phone)
+        if client is not None and client.is_connected():
+            return client
+        return None
+
     async def validate_session(self, session_str: str) -> bool:
         """ Проверка сессии на валидность """
         client = await self._create_client(session_str)
@@ -97,11 +215,11 @@ class AccountService:
 
     async def create_account(self, user_id: int, phone: str, session_str: str, two_factor: str = None):
         user = await get_user_by_user_id(user_id)
-        app_logger.info(f"Создание аккаунта для пользователя {user.username}, телефон: {phone}")
+        app_logger.info("Создание аккаунта для пользователя %s, телефон: %s", user.username, phone)
         async with async_session() as session:
             try:
                 encrypted = await self.encrypt_session(session_str)
-                encrypted_2fa = self.cipher.encrypt(two_factor.encode()).decode() if two_factor else None
+                encrypted_2fa = (await self._run_crypto(self.cipher.encrypt, two_factor.encode())).decode() if two_factor else None
                 account = Account(
                     user_id=user_id,
                     phone=phone,
@@ -111,15 +229,16 @@ class AccountService:
                 )
                 session.add(account)
                 await session.commit()
-                app_logger.info(f"Аккаунт {phone} успешно создан")
+                change_feed.publish(changes.ACCOUNT_ADDED, user_id, account_id=account.id, phone=phone, is_active=True)
+                app_logger.info("Аккаунт %s успешно создан", phone)
                 return account
             except Exception as e:
-                app_logger.error(f"Ошибка создания аккаунта: {str(e)}")
+                app_logger.error("Ошибка создания аккаунта: %s", e)
                 raise
 
     async def get_user_accounts(self, user_id: int) -> List[Account]:
         user = await get_user_by_user_id(user_id)
-        app_logger.debug(f"Получение аккаунтов пользователя {user.username}")
+        app_logger.debug("Получение аккаунтов пользователя %s", user.username)
         async with async_session() as session:
             result = await session.execute(
                 select(Account).where(Account.user_id == user_id)
@@ -129,7 +248,7 @@ class AccountService:
 
     async def toggle_account(self, user_id: int, phone: str) -> tuple[bool, bool, bool]:
         user = await get_user_by_user_id(user_id)
-        app_logger.info(f"Изменение статуса аккаунта {phone} пользователя {user.username}")
+        app_logger.info("Изменение статуса аккаунта %s пользователя %s", phone, user.username)
         async with async_session() as session:
             try:
                 account = await session.execute(
@@ -143,7 +262,7 @@ class AccountService:
                 account = account.scalar()
 
                 if not account:
-                    app_logger.warning(f"Аккаунт {phone} не найден")
+                    app_logger.warning("Аккаунт %s не найден", phone)
                     return False, False, False
 
                 old_status = account.is_active
@@ -151,23 +270,21 @@ class AccountService:
                 new_status = account.is_active
                 await session.commit()
 
-                if new_status is True:
-                    # Если статус аккаунта изменен на "активен", запускаем активность
-                    pass
-                else:
-                    # Если аккаунт не активен теперь, завершаем таску по мониторингу активности
-                    pass
+                # Менеджер активности запускает или останавливает цикл аккаунта по ленте изменений
+                change_feed.publish(
+                    changes.ACCOUNT_TOGGLED, user_id, account_id=account.id, phone=phone, is_active=new_status
+                )
 
-                app_logger.info(f"Статус аккаунта {phone} изменен: {'активен' if new_status else 'неактивен'}")
+                app_logger.info("Статус аккаунта %s изменен: %s", phone, 'активен' if new_status else 'неактивен')
                 return True, old_status, new_status
 
             except Exception as e:
-                app_logger.error(f"Ошибка изменения статуса: {str(e)}")
+                app_logger.error("Ошибка изменения статуса: %s", e)
                 return False, False, False
 
     async def update_last_active(self, phone: str):
         """Обновляет время последней активности для аккаунта"""
-        app_logger.debug(f"Обновление времени активности для {phone}")
+        app_logger.debug("Обновление времени активности для %s", phone)
         async with async_session() as session:
             try:
                 result = await session.execute(
@@ -178,20 +295,52 @@ class AccountService:
                 if account:
                     account.last_activity = datetime.now()
                     await session.commit()
-                    app_logger.info(f"Обновлено время активности для {phone}")
+                    app_logger.info("Обновлено время активности для %s", phone)
                 else:
-                    app_logger.warning(f"Аккаунт {phone} не найден при обновлении времени активности")
+                    app_logger.warning("Аккаунт %s не найден при обновлении времени активности", phone)
             except Exception as e:
-                app_logger.error(f"Ошибка при обновлении времени активности для {phone}: {e}")
+                app_logger.error("Ошибка при обновлении времени активности для %s: %s", phone, e)
                 await session.rollback()
 
+    async def get_account_state(self, account_id: int):
+        """Свежие данные аккаунта для цикла активности (phone, user_id, is_active, session) или None, если он удален"""
+        async with async_session() as session:
+            result = await session.execute(
+                select(Account.phone, Account.user_id, Account.is_active, Account.session).where(Account.id == account_id)
+            )
+            return result.one_or_none()
+
+    async def get_account_states(self, user_ids: Optional[List[int]] = None):
+        """Аккаунты для сверки циклов активности: (id, phone, user_id, is_active) без сессий"""
+        query = select(Account.id, Account.phone, Account.user_id, Account.is_active)
+        if user_ids is not None:
+            query = query.where(Account.user_id.in_(user_ids))
+        async with async_session() as session:
+            return (await session.execute(query)).all()
+
+    async def get_account_fingerprints(self) -> Dict[int, tuple]:
+        """
+        Дешевый отпечаток аккаунтов каждого пользователя (количество, активные, максимальный ID):
+        если он изменился, аккаунты пользователя нужно сверить
+        """
+        async with async_session() as session:
+            result = await session.execute(
+                select(
+                    Account.user_id,
+                    func.count(Account.id),
+                    func.sum(case((Account.is_active == True, 1), else_=0)),
+                    func.max(Account.id)
+                ).group_by(Account.user_id)
+            )
+            return {row[0]: tuple(row[1:]) for row in result.all()}
+
     async def get_all_active_accounts(self) -> List[Account]:
         app_logger.debug("Получение всех активных аккаунтов")
         async with async_session() as session:
             result = await session.execute(
                 select(Account).where(Account.is_active == True))
             accounts = result.scalars().all()
-            app_logger.info(f"Найдено {len(accounts)} активных аккаунтов")
+            app_logger.info("Найдено %s активных аккаунтов", len(accounts))
             return accounts
 
     async def delete_account(self, phone: str) -> bool:
@@ -207,33 +356,28 @@ class AccountService:
                         client = await self._create_client(session_str)
                         await client.connect()
                         await client.log_out()  # Явный выход из аккаунта
-                        app_logger.info(f"Выполнен выход из аккаунта {phone}")
+                        app_logger.info("Выполнен выход из аккаунта %s", phone)
                     except Exception as e:
-                        app_logger.error(f"Ошибка выхода из аккаунта: {str(e)}")
+                        app_logger.error("Ошибка выхода из аккаунта: %s", e)
                     finally:
                         if client and client.is_connected():
                             await client.disconnect()
 
                     # Удаляем запись из базы
+                    await session.execute(
+                        delete(AccountChannelState).where(AccountChannelState.account_id == account.id)
+                    )
                     await session.delete(account)
                     await session.commit()
-                    app_logger.info(f"Аккаунт {phone} удален из базы")
+                    self.sessions.discard(account.session)
+                    change_feed.publish(changes.ACCOUNT_DELETED, account.user_id, account_id=account.id, phone=phone)
+                    app_logger.info("Аккаунт %s удален из базы", phone)
                     return True
             except Exception as e:
-                app_logger.error(f"Ошибка удаления аккаунта: {str(e)}")
+                app_logger.error("Ошибка удаления аккаунта: %s", e)
 
             return False
 
-    async def clear_session_cache(self):
-        now = datetime.now()
-        expired_sessions = [
-            session for session, data in self.active_sessions.items()
-            if (now - data['timestamp']).seconds > 1800
-        ]
-        for session in expired_sessions:
-            del self.active_sessions[session]
-        app_logger.info(f"Очищено {len(expired_sessions)} устаревших сессий")
-
     async def get_2fa_password(self, phone: str) -> str:
         async with async_session() as session:
             result = await session.execute(
@@ -241,15 +385,142 @@ class AccountService:
             )
             account = result.scalars().first()
             if account and account.password:
-                return self.cipher.decrypt(account.password).decode()
+                return (await self._run_crypto(self.cipher.decrypt, account.password)).decode()
             return None
 
 
 class UserActivityManager:
-    def __init__(self):
+    def __init__(self, reaction_delay: tuple = REACTION_DELAY):
+        self.reaction_delay = reaction_delay  # Пауза после реакции (мин, макс), сек
+        # (номер воркера, число воркеров) в процессе воркера движка: менеджер ведет только свою часть пользователей
+        self.partition: Optional[tuple[int, int]] = None
+        # Отправка уведомлений пользователю (в воркере движка - через процесс бота), по умолчанию - через бота
+        self.notifier = None
+        self.health = HealthTracker()
+        # Аккаунт -> (пользователь, событие), которым аккаунт будят, когда ему передают посты
+        self.wakeups: Dict[int, tuple[int, asyncio.Event]] = {}
+        # Компактное состояние аккаунтов, для которых запущен цикл активности
+        self.runtimes: Dict[int, AccountRuntime] = {}
+        # Отставание движка и отключение малоценной работы при перегрузке
+        self.shedder = LoadShedder(lambda: self.runtimes.values())
         self.user_tasks: Dict[int, asyncio.Task] = {}
         self.account_tasks: Dict[str, asyncio.Task] = {}
         self.lock = asyncio.Lock()
+        # Лента изменений и сверка с базой
+        self.feed_task: Optional[asyncio.Task] = None
+        self.reconcile_task: Optional[asyncio.Task] = None
+        self.synced_versions: Dict[int, int] = {}   # Пользователь -> примененная версия ленты изменений
+        self.fingerprints: Dict[int, tuple] = {}    # Пользователь -> отпечаток аккаунтов при последней сверке
+        POOL_SIZE.set_function("user_tasks", function=lambda: len(self.user_tasks))
+        POOL_SIZE.set_function("account_tasks", function=lambda: len(self.account_tasks))
+
+    async def start(self, service: AccountService):
+        """
+        Запускает циклы всех активных аккаунтов, применение ленты изменений
+        и периодическую сверку с базой (на случай изменений в обход сервисов)
+        """
+        queue = change_feed.subscribe()
+        await self.reconcile(service)
+        self.feed_task = asyncio.create_task(self._apply_changes(queue, service))
+        self.reconcile_task = asyncio.create_task(self._reconcile_loop(service))
+        self.shedder.start()
+
+    async def stop(self):
+        await self.shedder.stop()
+        tasks = [task for task in (self.feed_task, self.reconcile_task) if task]
+        tasks += list(self.user_tasks.values()) + list(self.account_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.feed_task = self.reconcile_task = None
+
+    async def _apply_changes(self, queue: asyncio.Queue, service: AccountService):
+        try:
+            while True:
+                change = await queue.get()
+                try:
+                    await self._apply_change(change, service)
+                except Exception as e:
+                    app_logger.error("Ошибка применения изменения %s: %s", change, e)
+                # Пропущенные версии (изменения до подписки) догонит сверка
+                if self.synced_versions.get(change.user_id, 0) == change.version - 1:
+                    self.synced_versions[change.user_id] = change.version
+        finally:
+            change_feed.unsubscribe(queue)
+
+    def owns(self, user_id: int) -> bool:
+        """Ведет ли этот процесс аккаунты пользователя"""
+        return self.partition is None or partition_of(user_id, self.partition[1]) == self.partition[0]
+
+    async def _apply_change(self, change, service: AccountService):
+        if not self.owns(change.user_id):
+            return
+        if change.kind in (changes.ACCOUNT_ADDED, changes.ACCOUNT_TOGGLED):
+            if change.is_active:
+                await self.start_account_activity(change.phone, service)
+            else:
+                await self.stop_account_activity(change.phone)
+        elif change.kind == changes.ACCOUNT_DELETED:
+            await self.stop_account_activity(change.phone)
+        elif change.kind == changes.CHANNEL_ADDED:
+            # Новый канал обрабатываем сразу, не дожидаясь планового цикла
+            for account_id, (user_id, wakeup) in self.wakeups.items():
+                if user_id == change.user_id and not quarantine.is_quarantined(account_id):
+                    wakeup.set()
+        elif change.kind in (changes.CHANNEL_UPDATED, changes.CHANNEL_DELETED):
+            # Настройки каналов читаются в начале каждого цикла, сбрасываем только кэш ссылок
+            if change.kind == changes.CHANNEL_DELETED or change.is_active is False:
+                for runtime in self.runtimes.values():
+                    if runtime.user_id == change.user_id:
+                        runtime.forget_peer(change.channel_id)
+
+    async def _reconcile_loop(self, service: AccountService):
+        while True:
+            await asyncio.sleep(RECONCILE_INTERVAL)
+            try:
+                await self.reconcile(service)
+            except Exception as e:
+                app_logger.error("Ошибка сверки циклов активности с базой: %s", e)
+
+    async def reconcile(self, service: AccountService):
+        """
+        Сверяет запущенные циклы с базой. Аккаунты пользователя перечитываются, только если
+        изменился их отпечаток в базе или есть непримененные версии ленты изменений.
+        """
+        fingerprints = {
+            user_id: fingerprint for user_id, fingerprint in (await service.get_account_fingerprints()).items()
+            if self.owns(user_id)
+        }
+        running_users = {runtime.user_id for runtime in self.runtimes.values()}
+        stale = [
+            user_id for user_id in set(fingerprints) | set(self.fingerprints) | running_users
+            if fingerprints.get(user_id) != self.fingerprints.get(user_id)
+            or self.synced_versions.get(user_id, 0) != change_feed.version(user_id)
+        ]
+        if not stale:
+            return
+
+        rows = await service.get_account_states(stale)
+        active = {row.phone: row for row in rows if row.is_active}
+        for phone, row in active.items():
+            if phone not in self.account_tasks or self.account_tasks[phone].done():
+                self._start_account_task(self._runtime(row), service)
+        stale_users = set(stale)
+        for runtime in list(self.runtimes.values()):
+            if runtime.user_id in stale_users and runtime.phone not in active:
+                await self.stop_account_activity(runtime.phone)
+
+        for user_id in stale:
+            if user_id in fingerprints:
+                self.fingerprints[user_id] = fingerprints[user_id]
+            else:
+                self.fingerprints.pop(user_id, None)
+            self.synced_versions[user_id] = change_feed.version(user_id)
+        app_logger.info("Сверка циклов активности: перечитаны аккаунты %s пользователей", len(stale))
+
+    def _start_account_task(self, runtime: AccountRuntime, service: AccountService):
+        self.account_tasks[runtime.phone] = asyncio.create_task(self._account_activity_loop(runtime, service))
+        app_logger.info("Запущена задача для аккаунта %s", runtime.phone)
 
     async def start_user_activity(self, user_id: int, service: AccountService):
         user = await get_user_by_user_id(user_id)
@@ -258,7 +529,7 @@ class UserActivityManager:
                 self.user_tasks[user_id] = asyncio.create_task(
                     self._user_monitor_loop(user_id, service)
                 )
-                app_logger.info(f"Запущена проверка активности для пользователя {user.username or user.first_name}")
+                app_logger.info("Запущена проверка активности для пользователя %s", user.username or user.first_name)
 
     async def stop_user_activity(self, user_id: int):
         user = await get_user_by_user_id(user_id)
@@ -267,7 +538,7 @@ class UserActivityManager:
             if task:
                 task.cancel()
                 del self.user_tasks[user_id]
-                app_logger.info(f"Остановлена проверка активности для пользователя {user.username}")
+                app_logger.info("Остановлена проверка активности для пользователя %s", user.username)
 
     async def stop_account_activity(self, phone: str):
         async with self.lock:
@@ -275,15 +546,12 @@ class UserActivityManager:
             if task and not task.done():
                 task.cancel()
                 del self.account_tasks[phone]
-                app_logger.info(f"Остановлена активность для аккаунта {phone}")
+                app_logger.info("Остановлена активность для аккаунта %s", phone)
 
     async def start_account_activity(self, phone: str, service: AccountService):
         account = await get_account_by_phone(phone)
-        if phone not in self.account_tasks or self.account_tasks[phone].done():
-            self.account_tasks[phone] = asyncio.create_task(
-                self._account_activity_loop(account, service)
-            )
-            app_logger.info(f"Запущена задача для аккаунта {phone}")
+        if account and self.owns(account.user_id) and (phone not in self.account_tasks or self.account_tasks[phone].done()):
+            self._start_account_task(self._runtime(account), service)
 
 
     async def _user_monitor_loop(self, user_id: int, service: AccountService):
@@ -291,106 +559,211 @@ class UserActivityManager:
         user = await get_user_by_user_id(user_id)
 
         try:
-            app_logger.debug(f"Проверка состояния аккаунтов для пользователя {user.username or user.first_name}")
+            app_logger.debug("Проверка состояния аккаунтов для пользователя %s", user.username or user.first_name)
             accounts = await service.get_user_accounts(user_id)
             await self._manage_account_tasks(accounts, service)
             # await asyncio.sleep(60)
 
         except asyncio.CancelledError:
-            app_logger.warning(f"Мониторинг активности для пользователя {user.username} прерван")
+            app_logger.warning("Мониторинг активности для пользователя %s прерван", user.username)
             return None
         except Exception as e:
-            app_logger.error(f"Ошибка мониторинга: {str(e)}")
+            app_logger.error("Ошибка мониторинга: %s", e)
             await asyncio.sleep(60)
 
     async def _manage_account_tasks(self, accounts: List[Account], service: AccountService):
         """Управление задачами для аккаунтов"""
-        current_phones = {acc.phone for acc in accounts if acc.is_active}
+        current_phones = {acc.phone for acc in accounts if acc.is_active and self.owns(acc.user_id)}
         # existing_phones = set(self.account_tasks.keys())
 
         # Запуск новых задач
         for phone in current_phones:
             account = next(acc for acc in accounts if acc.phone == phone)
             if phone not in self.account_tasks or self.account_tasks[phone].done():
-                self.account_tasks[phone] = asyncio.create_task(
-                    self._account_activity_loop(account, service)
-                )
-                app_logger.info(f"Запущена задача для аккаунта {phone}")
+                self._start_account_task(self._runtime(account), service)
 
         # # Остановка удаленных задач
         # for phone in existing_phones - current_phones:
         #     if phone in self.account_tasks and not self.account_tasks[phone].done():
         #         self.account_tasks[phone].cancel()
         #         del self.account_tasks[phone]
-        #         app_logger.info(f"Остановлена задача для аккаунта {phone}")
+        #         app_logger.info("Остановлена задача для аккаунта %s", phone)
+
+    def _runtime(self, account: Account) -> AccountRuntime:
+        """Состояние аккаунта для цикла активности (ORM-объект дальше не используется)"""
+        runtime = self.runtimes.get(account.id)
+        if runtime is None:
+            runtime = self.runtimes[account.id] = AccountRuntime.from_account(account)
+        else:
+            runtime.update(account.phone, account.user_id, account.is_active)
+        return runtime
 
-    async def _account_activity_loop(self, account: Account, service: AccountService):
-        app_logger.info(f"Запуск цикла активности для {account.phone}")
+    async def _account_activity_loop(self, account: AccountRuntime, service: AccountService):
+        # Все записи лога этой задачи помечаются аккаунтом (для ограничения повторов по аккаунтам)
+        log_account.set(account.phone)
+        app_logger.info("Запуск цикла активности для %s", account.phone)
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        self.wakeups[account.id] = (account.user_id, wakeup)
         while True:
+            report = CycleReport()
             try:
-                await self._perform_activity(account, service)
-                interval = random.randint(CHECK_INTERVAL_MIN, CHECK_INTERVAL_MAX)
-                app_logger.info(f"Следующая проверка для {account.phone} через {interval} сек")
-                await asyncio.sleep(interval)
+                started = account.last_cycle_at = loop.time()
+                account.next_run_at = None
+                with tracer.span("cycle", account=account.id):
+                    await self._perform_activity(account, service, report)
+                duration = loop.time() - started
+                self.shedder.observe_cycle(duration)
+                CYCLE_DURATION.observe(value=duration)
+                ACCOUNT_CYCLE_DURATION.set(str(account.id), value=duration)
             except asyncio.CancelledError:
-                app_logger.warning(f"Цикл активности для {account.phone} прерван")
+                app_logger.warning("Цикл активности для %s прерван", account.phone)
                 break
             except Exception as e:
-                app_logger.error(f"Ошибка в цикле активности: {str(e)}")
-                await asyncio.sleep(60)
+                report.failed = True
+                app_logger.error("Ошибка в цикле активности: %s", e)
 
-    async def _perform_activity(self, account: Account, service: AccountService):
-        """Выполняет активность для аккаунта."""
-        session_str = await service.decrypt_session(account.session)
+            if not account.is_active:
+                app_logger.info("Аккаунт %s отключен или удален, цикл активности остановлен", account.phone)
+                break
 
-        client = TelegramClient(
-            session=StringSession(session_str),
-            api_id=API_ID,
-            api_hash=API_HASH,
-            connection=ConnectionTcpAbridged,
-            device_model="Samsung S24 Ultra",
-            app_version="10.2.0",
-            system_version="Android 14",
-            lang_code="en",
-            system_lang_code="en-US",
-            timeout=30,
-            auto_reconnect=False
+            # Интервал зависит от здоровья аккаунта: ошибки и FloodWait увеличивают его, найденная работа - сокращает
+            health = self.health.record(account.id, report)
+            # Аккаунт на карантине после FloodWait не запускается раньше его окончания
+            interval = max(health.next_interval(), int(quarantine.remaining(account.id)[0]))
+            app_logger.info(
+                "Следующая проверка для %s через %s сек (здоровье %.2f, ошибок подряд %s)",
+                account.phone, interval, health.score, health.failures
+            )
+            planned = account.next_run_at = loop.time() + interval
+            wakeup.clear()
+            try:
+                # Раньше срока аккаунт будят, если другой аккаунт передал ему посты из-за FloodWait
+                await asyncio.wait_for(wakeup.wait(), interval)
+                app_logger.info("Аккаунт %s получил посты от другого аккаунта, внеочередная проверка", account.phone)
+            except asyncio.TimeoutError:
+                SCHEDULER_LATENESS.observe(value=max(loop.time() - planned, 0))
+            except asyncio.CancelledError:
+                app_logger.warning("Цикл активности для %s прерван", account.phone)
+                break
+        if self.wakeups.get(account.id, (None, None))[1] is wakeup:
+            del self.wakeups[account.id]
+        if self.runtimes.get(account.id) is account:
+            del self.runtimes[account.id]
+            ACCOUNT_CYCLE_DURATION.remove(str(account.id))
+        self.health.forget(account.id)
+
+    def _hand_off(self, account: AccountRuntime, channel, post_ids: List[int], error: FloodWaitError):
+        """Передает необработанные посты другим аккаунтам пользователя и будит тех, кто не на карантине"""
+        count = pending_work.hand_off(account.user_id, channel.id, post_ids, account.id)
+        POSTS_HANDED_OFF.inc(value=count)
+        app_logger.warning(
+            "FloodWait у аккаунта %s (%s сек) в канале %s, передано другим аккаунтам постов: %s",
+            account.phone, error.seconds, channel.channel_title, count
         )
-        try:
-            await client.connect()
-        except RPCError as e:
-            # сессия вовсе не может подключиться
-            app_logger.error(f"Невозможно подключиться с аккаунтом {account.phone}: {e}")
-            await self._handle_invalid_session(service, account.phone, account.user_id)
+        for sibling_id, (user_id, wakeup) in self.wakeups.items():
+            if user_id == account.user_id and sibling_id != account.id \
+                    and not quarantine.is_quarantined(sibling_id, "SendReactionRequest"):
+                wakeup.set()
+
+    async def _flush_deferred_views(self, client: TelegramClient, account: AccountRuntime, report: CycleReport):
+        """Накручивает просмотры, отложенные при перегрузке: один запрос на канал вместо двух на пост"""
+        by_channel: Dict[int, Dict[int, int]] = {}
+        for channel_id, post_id, target_views in account.take_deferred_views():
+            by_channel.setdefault(channel_id, {})[post_id] = target_views
+        for channel_id, posts in by_channel.items():
+            if quarantine.is_quarantined(account.id, "GetMessagesViewsRequest"):
+                # Аккаунт на карантине - возвращаем просмотры в очередь до следующего цикла
+                for post_id, target_views in posts.items():
+                    account.defer_view(channel_id, post_id, target_views)
+                continue
+            try:
+                post_ids = list(posts)
+                views_resp = await client(GetMessagesViewsRequest(peer=channel_id, id=post_ids, increment=False))
+                behind = [
+                    post_id for post_id, views in zip(post_ids, views_resp.views)
+                    if int(views.views or 0) < posts[post_id]
+                ]
+                if behind:
+                    await client(GetMessagesViewsRequest(peer=channel_id, id=behind, increment=True))
+                    VIEWS_SENT.inc(value=len(behind))
+                    report.views += len(behind)
+            except Exception as e:
+                app_logger.error("Ошибка при накрутке отложенных просмотров в канале %s: %s", channel_id, e)
+
+    async def _perform_activity(self, account: AccountRuntime, service: AccountService, report: CycleReport = None):
+        """
+        Выполняет активность для аккаунта. Итоги цикла записываются в report.
+        Сессия и статус аккаунта читаются из базы в начале цикла, account обновляется по ним.
+        """
+        if report is None:
+            report = CycleReport()
+        if quarantine.is_quarantined(account.id):
+            app_logger.info("Аккаунт %s на карантине после FloodWait, цикл пропущен", account.phone)
+            return
+        state = await service.get_account_state(account.id)
+        if state is None:
+            account.is_active = False
+            return
+        account.update(state.phone, state.user_id, state.is_active)
+        if not account.is_active:
             return
+        session_str = await service.decrypt_session(state.session)
+
+        client = await service._create_client(session_str)
+        client.cycle_report = report
+        client.account_id = account.id
+        with tracer.span("connect"):
+            try:
+                await client.connect()
+            except RPCError as e:
+                # сессия вовсе не может подключиться
+                app_logger.error("Невозможно подключиться с аккаунтом %s: %s", account.phone, e)
+                report.failed = True
+                await self._handle_invalid_session(service, account.phone, account.user_id)
+                return
+            authorized = await client.is_user_authorized()
 
         # проверяем, авторизованы ли мы
-        if not await client.is_user_authorized():
+        if not authorized:
+            report.failed = True
             # файл сессии пустой или невалидный
             await self._handle_invalid_session(service, account.phone, account.user_id)
             await client.disconnect()
             return
+        # Делимся подключенным клиентом с массовыми операциями (отписка от канала и т.п.)
+        service.active_sessions[account.phone] = client
         try:
-            await client(functions.account.UpdateStatusRequest(
-                        offline=False
-                    ))
-
-            # Читаем сообщения в избранном для обновления времени последнего захода
-            messages = await client.get_messages("me", limit=1)
-            if messages:
-                await client.send_read_acknowledge("me", messages[0])
-
-            # # Отправляем тестовое сообщение и удаляем его для обновления времени последнего захода
-            # temp_message = await client.send_message("me", "test")
-            # await client.delete_messages("me", temp_message)
-            app_logger.info(f"Запуск цикла активности для {account.phone}")
-
-            # Обновляем сообщение в избранном
-            current_time = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
-            if messages and messages[0].text and "Аккаунт был активен" in messages[0].text:
-                await client.edit_message("me", messages[0].id, f"🔄 Аккаунт был активен: {current_time}")
-            else:
-                await client.send_message("me", f"🔄 Аккаунт был активен: {current_time}")
+            # При перегрузке в первую очередь отключаются присутствие и сообщение в избранном
+            presence = self.shedder.allows("presence")
+            with tracer.span("presence"):
+                if presence:
+                    await client(functions.account.UpdateStatusRequest(
+                                offline=False
+                            ))
+
+                if self.shedder.allows("saved_messages"):
+                    # Читаем сообщения в избранном для обновления времени последнего захода
+                    messages = await client.get_messages("me", limit=1)
+                    if messages:
+                        await client.send_read_acknowledge("me", messages[0])
+
+                    # # Отправляем тестовое сообщение и удаляем его для обновления времени последнего захода
+                    # temp_message = await client.send_message("me", "test")
+                    # await client.delete_messages("me", temp_message)
+
+                    # Обновляем сообщение в избранном
+                    current_time = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
+                    if messages and messages[0].text and "Аккаунт был активен" in messages[0].text:
+                        await client.edit_message("me", messages[0].id, f"🔄 Аккаунт был активен: {current_time}")
+                    else:
+                        await client.send_message("me", f"🔄 Аккаунт был активен: {current_time}")
+                app_logger.info("Запуск цикла активности для %s", account.phone)
+
+            # После перегрузки накручиваем отложенные просмотры
+            if account.deferred_views and self.shedder.allows("views"):
+                with tracer.span("view"):
+                    await self._flush_deferred_views(client, account, report)
 
             # Получаем каналы пользователя с механизмом повторных попыток
             async with async_session() as session:
@@ -399,19 +772,35 @@ class UserActivityManager:
                     user = await execute_with_retry(get_user_by_user_id, str(account.user_id))
                     try: 
                         if not user:
-                            app_logger.error(f"Не удалось получить пользователя {account.user_id}")
+                            app_logger.error("Не удалось получить пользователя %s", account.user_id)
                             return
                             
                         channels = await execute_with_retry(channel_manager.get_user_channels, user.id)
                         
                         if channels is None:
-                            app_logger.error(f"Не удалось получить каналы пользователя {user.username}")
+                            app_logger.error("Не удалось получить каналы пользователя %s", user.username)
                             return
                         
-                        app_logger.debug(f"Найдено {len(channels)} каналов для пользователя {user.username}")
+                        app_logger.debug("Найдено %s каналов для пользователя %s", len(channels), user.username)
+
+                        # Каналы, которые пора проверять по частоте их публикаций
+                        due = {channel.id for channel in channels
+                               if channel.is_active and poll_scheduler.due(channel.id, account.id)}
+                        # Одним запросом узнаем, в каких из них нет постов новее курсора аккаунта
+                        unchanged = set()
+                        peers = {channel_id: account.peer(channel_id) for channel_id in due if channel_id in account.peers}
+                        if peers:
+                            try:
+                                with tracer.span("probe"):
+                                    unchanged = await channel_manager.probe_channels(client, account.id, peers)
+                            except Exception as e:
+                                app_logger.error("Ошибка проверки обновлений каналов для %s: %s", account.phone, e)
 
                         for channel in channels:
-                            app_logger.info(f"Проверка канала {channel.channel_title}")
+                            if quarantine.is_quarantined(account.id):
+                                app_logger.warning("Аккаунт %s ушел на карантин, остальные каналы пропущены", account.phone)
+                                break
+                            app_logger.info("Проверка канала %s", channel.channel_title)
                             if not channel.is_active:
                                 continue
                             try:
@@ -429,7 +818,7 @@ class UserActivityManager:
                             
                             # Если нет реакций, пропускаем канал
                             if not reactions_to_use:
-                                app_logger.warning(f"Нет доступных реакций для канала {channel.channel_title}")
+                                app_logger.warning("Нет доступных реакций для канала %s", channel.channel_title)
                                 continue
                             
                             # Получаем канал из Telegram
@@ -440,73 +829,108 @@ class UserActivityManager:
                             else:
                                 channel_id = abs(orig_channel_id)
                             
-                            # Проверяем новые посты для этого аккаунта
-                            new_posts = await channel_manager.check_new_posts(channel, client, account.id)
+                            # Проверяем новые посты для этого аккаунта, если канал пора проверять
+                            # и в нем что-то изменилось
+                            new_posts = []
+                            if channel.id in unchanged:
+                                poll_scheduler.observe(channel.id, account.id, [])
+                            elif channel.id in due:
+                                with tracer.span("scan", channel=channel.id):
+                                    new_posts = await channel_manager.check_new_posts(channel, client, account.id)
+                                account.remember_peer(channel.id, channel_manager.resolved_peers.get(channel.id))
+
+                            # Посты, которые другие аккаунты не успели обработать из-за FloodWait
+                            if not quarantine.is_quarantined(account.id, "SendReactionRequest"):
+                                handed_off = pending_work.take(account.user_id, channel.id, account.id)
+                                new_posts = new_posts + [post_id for post_id in handed_off if post_id not in new_posts]
                             
+                            # Посты, которые аккаунт не обработал: курсор канала не сдвигается дальше них
+                            unprocessed = []
+
+                            # При сильной перегрузке обрабатываем только самые свежие посты, остальные - в следующих проверках
+                            if len(new_posts) > SHED_MAX_POSTS and not self.shedder.allows("old_posts"):
+                                new_posts = sorted(new_posts, reverse=True)
+                                unprocessed.extend(new_posts[SHED_MAX_POSTS:])
+                                new_posts = new_posts[:SHED_MAX_POSTS]
+
                             if new_posts:
-                                app_logger.info(f"Найдено {len(new_posts)} новых постов в канале {channel.channel_title}")
+                                app_logger.info("Найдено %s новых постов в канале %s", len(new_posts), channel.channel_title)
                                 
-                                for post_id in new_posts:
+                                for index, post_id in enumerate(new_posts):
                                     # Проверяем, не помечен ли уже этот пост как имеющий максимум реакций
                                     max_reactions_query = select(AccountReaction).where(
                                         AccountReaction.channel_id == channel.id,
                                         AccountReaction.post_id == post_id,
                                         AccountReaction.reaction == "__max_reactions__"
                                     )
-                                    max_reactions_result = await session.execute(max_reactions_query)
+                                    with tracer.span("dedup", channel=channel.id, post=post_id):
+                                        max_reactions_result = await session.execute(max_reactions_query)
                                     max_reactions_record = max_reactions_result.scalar_one_or_none()
                                     
                                     if max_reactions_record:
-                                        app_logger.debug(f"Пост {post_id} в канале {channel.channel_title} уже помечен как имеющий максимум реакций. Пропускаем.")
+                                        app_logger.debug("Пост %s в канале %s уже помечен как имеющий максимум реакций. Пропускаем.", post_id, channel.channel_title)
                                         continue
                                     
                                     try:
-                                        # Сначала проверяем, существует ли сообщение
-                                        msg = await client.get_messages(
-                                            entity=channel.channel_id,
-                                            ids=post_id
-                                        )
-                                        
-                                        if not msg or not isinstance(msg, list) and not msg:
-                                            app_logger.warning(f"Сообщение {post_id} не найдено в канале {channel.channel_title}")
-                                            continue
-                                        
-                                        # Если сообщение - список, берем первый элемент
-                                        if isinstance(msg, list):
-                                            if not msg:  # Если список пустой
-                                                app_logger.warning(f"Сообщение {post_id} не найдено в канале {channel.channel_title}")
+                                        # Реакции и просмотры поста берем из проверки канала. Постов, переданных
+                                        # другими аккаунтами, в ней нет - их получаем отдельно
+                                        msg = None
+                                        scan = channel_manager.scans.get(channel.id)
+                                        current_reactions_count = scan.reaction_count(post_id) if scan is not None else None
+                                        known_views = scan.view_count(post_id) if scan is not None else None
+                                        if current_reactions_count is None:
+                                            # Сначала проверяем, существует ли сообщение
+                                            with tracer.span("fetch", channel=channel.id, post=post_id):
+                                                msg = await client.get_messages(
+                                                    entity=channel.channel_id,
+                                                    ids=post_id
+                                                )
+                                            
+                                            if not msg or not isinstance(msg, list) and not msg:
+                                                app_logger.warning("Сообщение %s не найдено в канале %s", post_id, channel.channel_title)
                                                 continue
-                                            msg = msg[0]
+                                            
+                                            # Если сообщение - список, берем первый элемент
+                                            if isinstance(msg, list):
+                                                if not msg:  # Если список пустой
+                                                    app_logger.warning("Сообщение %s не найдено в канале %s", post_id, channel.channel_title)
+                                                    continue
+                                                msg = msg[0]
+                                            current_reactions_count = reaction_total(msg)
                                         
-                                        # Проверяем, сколько просмотров у поста
-                                        try:
-                                            views_resp = await client(GetMessagesViewsRequest(
-                                                peer=channel.channel_id,
-                                                id=[post_id],
-                                                increment=False
-                                            ))
-                                            views_count = views_resp.views[0].views or 0
+                                        # Проверяем, сколько просмотров у поста (при перегрузке просмотры откладываются)
+                                        if not self.shedder.allows("views"):
+                                            account.defer_view(channel.channel_id, post_id, channel.views)
+                                        else:
+                                            try:
+                                                with tracer.span("view", channel=channel.id, post=post_id):
+                                                    views_count = known_views
+                                                    if views_count is None:
+                                                        views_resp = await client(GetMessagesViewsRequest(
+                                                            peer=channel.channel_id,
+                                                            id=[post_id],
+                                                            increment=False
+                                                        ))
+                                                        views_count = views_resp.views[0].views or 0
                                             
-                                            # Инкрементируем счетчик просмотров, если нужно
-                                            if int(views_count) < channel.views:
-                                                await client(GetMessagesViewsRequest(
-                                                    peer=channel.channel_id,
-                                                    id=[post_id],
-                                                    increment=True
-                                                ))
-                                        except Exception as e:
-                                            app_logger.error(f"Ошибка при получении/установке просмотров для поста {post_id}: {e}")
+                                                    # Инкрементируем счетчик просмотров, если нужно
+                                                    if int(views_count) < channel.views:
+                                                        await client(GetMessagesViewsRequest(
+                                                            peer=channel.channel_id,
+                                                            id=[post_id],
+                                                            increment=True
+                                                        ))
+                                                        VIEWS_SENT.inc()
+                                                        report.views += 1
+                                            except Exception as e:
+                                                app_logger.error("Ошибка при получении/установке просмотров для поста %s: %s", post_id, e)
                                         
-                                        # Проверяем текущее количество реакций на посте
-                                        current_reactions_count = 0
-                                        if msg.reactions:
-                                            current_reactions_count = sum(r.count for r in msg.reactions.results)
-                    
                                         # Проверяем, не превышен ли максимум реакций
                                         if current_reactions_count >= channel.max_reactions:
                                             app_logger.warning(
-                                                f"Пост {post_id} в канале {channel.channel_title} уже имеет {current_reactions_count} "
-                                                f"реакций (максимум: {channel.max_reactions})"
+                                                "Пост %s в канале %s уже имеет %s "
+                                                "реакций (максимум: %s)",
+                                                post_id, channel.channel_title, current_reactions_count, channel.max_reactions
                                             )
                                             
                                             # Добавляем запись, что этот пост уже проверен и имеет максимум реакций
@@ -528,12 +952,14 @@ class UserActivityManager:
                                             AccountReaction.channel_id == channel.id,
                                             AccountReaction.post_id == post_id
                                         )
-                                        result = await session.execute(query)
+                                        with tracer.span("dedup", channel=channel.id, post=post_id):
+                                            result = await session.execute(query)
                                         existing_reaction = result.scalar_one_or_none()
                                         
                                         if existing_reaction:
                                             app_logger.debug(
-                                                f"Аккаунт {account.phone} уже ставил реакцию на пост {post_id} в канале {channel.channel_title}"
+                                                "Аккаунт %s уже ставил реакцию на пост %s в канале %s",
+                                                account.phone, post_id, channel.channel_title
                                             )
                                             continue
                                         
@@ -541,20 +967,30 @@ class UserActivityManager:
                                         reaction_emoji = random.choice(reactions_to_use)
                                         
                                         try:
-                                            # Получаем entity канала
+                                            # Получаем entity канала (access_hash кэшируется в состоянии аккаунта)
                                             try:
-                                                channel_entity = await client.get_entity(channel.channel_id)
+                                                channel_entity = account.peer(channel.id)
+                                                if channel_entity is None:
+                                                    with tracer.span("resolve", channel=channel.id):
+                                                        account.remember_peer(channel.id, await client.get_entity(channel.channel_id))
+                                                    channel_entity = account.peer(channel.id) or channel.channel_id
+                                            except FloodWaitError:
+                                                raise
                                             except Exception as e:
-                                                app_logger.error(f"Не удалось получить entity канала {channel.channel_title}: {e}")
+                                                app_logger.error("Не удалось получить entity канала %s: %s", channel.channel_title, e)
+                                                unprocessed.append(post_id)
                                                 continue
                                                 
                                             # Устанавливаем реакцию
                                             try:
-                                                await client(SendReactionRequest(
-                                                    peer=channel.channel_id,
-                                                    msg_id=post_id,
-                                                    reaction=[ReactionEmoji(emoticon=reaction_emoji)]
-                                                ))
+                                                with tracer.span("react", channel=channel.id, post=post_id):
+                                                    await client(SendReactionRequest(
+                                                        peer=channel_entity,
+                                                        msg_id=post_id,
+                                                        reaction=[ReactionEmoji(emoticon=reaction_emoji)]
+                                                    ))
+                                                REACTIONS_SENT.inc()
+                                                report.reactions += 1
                                                 
                                                 # Записываем информацию о выставленной реакции
                                                 reaction_record = AccountReaction(
@@ -563,22 +999,28 @@ class UserActivityManager:
                                                     post_id=post_id,
                                                     reaction=reaction_emoji
                                                 )
-                                                session.add(reaction_record)
-                                                await session.commit()
+                                                with tracer.span("persist"):
+                                                    session.add(reaction_record)
+                                                    await session.commit()
                                                 
                                                 app_logger.debug(
-                                                    f"Установлена реакция {reaction_emoji} на пост {post_id} в канале {channel.channel_title}"
+                                                    "Установлена реакция %s на пост %s в канале %s",
+                                                    reaction_emoji, post_id, channel.channel_title
                                                 )
                                                 
                                                 # Небольшая задержка между реакциями для естественности
-                                                await asyncio.sleep(random.uniform(1, 3))
+                                                await asyncio.sleep(random.uniform(*self.reaction_delay))
+                                            except FloodWaitError:
+                                                raise
                                             except Exception as e:
                                                 # Проверяем на ошибку с reactions_uniq_max
                                                 if "reactions_uniq_max" in str(e):
-                                                    app_logger.warning(f"Невозможно добавить новый тип эмодзи {reaction_emoji}, достигнут лимит уникальных реакций для поста {post_id}")
+                                                    app_logger.warning("Невозможно добавить новый тип эмодзи %s, достигнут лимит уникальных реакций для поста %s", reaction_emoji, post_id)
                                                     
                                                     # Пробуем использовать уже существующие реакции
-                                                    if msg.reactions and msg.reactions.results:
+                                                    if msg is None:
+                                                        msg = await client.get_messages(entity=channel.channel_id, ids=post_id)
+                                                    if msg and msg.reactions and msg.reactions.results:
                                                         # Получаем список существующих реакций на сообщении
                                                         existing_emoji = [r.reaction.emoticon for r in msg.reactions.results if hasattr(r.reaction, 'emoticon')]
                                                         if existing_emoji:
@@ -586,10 +1028,12 @@ class UserActivityManager:
                                                             existing_reaction_emoji = random.choice(existing_emoji)
                                                             try:
                                                                 await client(SendReactionRequest(
-                                                                    peer=channel.channel_id,
+                                                                    peer=channel_entity,
                                                                     msg_id=post_id,
                                                                     reaction=[ReactionEmoji(emoticon=existing_reaction_emoji)]
                                                                 ))
+                                                                REACTIONS_SENT.inc()
+                                                                report.reactions += 1
                                                                 
                                                                 # Записываем информацию о выставленной реакции
                                                                 reaction_record = AccountReaction(
@@ -602,17 +1046,19 @@ class UserActivityManager:
                                                                 await session.commit()
                                                                 
                                                                 app_logger.debug(
-                                                                    f"Установлена существующая реакция {existing_reaction_emoji} на пост {post_id} в канале {channel.channel_title}"
+                                                                    "Установлена существующая реакция %s на пост %s в канале %s",
+                                                                    existing_reaction_emoji, post_id, channel.channel_title
                                                                 )
                                                                 
                                                                 # Небольшая задержка между реакциями для естественности
-                                                                await asyncio.sleep(random.uniform(1, 3))
+                                                                await asyncio.sleep(random.uniform(*self.reaction_delay))
                                                             except Exception as e2:
-                                                                app_logger.error(f"Ошибка при установке существующей реакции {existing_reaction_emoji}: {e2}")
+                                                                app_logger.error("Ошибка при установке существующей реакции %s: %s", existing_reaction_emoji, e2)
+                                                                unprocessed.append(post_id)
                                                 else:
                                                     # Для других ошибок
                                                     if "message ID is invalid" in str(e):
-                                                        app_logger.warning(f"Пост {post_id} в канале {channel.channel_title} недоступен или был удален")
+                                                        app_logger.warning("Пост %s в канале %s недоступен или был удален", post_id, channel.channel_title)
                                                         # Добавляем запись, чтобы больше не пытаться ставить реакцию на этот пост
                                                         invalid_post_record = AccountReaction(
                                                             account_id=account.id,
@@ -623,36 +1069,40 @@ class UserActivityManager:
                                                         session.add(invalid_post_record)
                                                         await session.commit()
                                                     else:
-                                                        app_logger.error(f"Ошибка при отправке реакции {reaction_emoji} на пост {post_id} в канале {channel.channel_title}: {e}")
+                                                        # Кэшированный access_hash мог устареть - в следующий раз получим канал заново
+                                                        account.forget_peer(channel.id)
+                                                        unprocessed.append(post_id)
+                                                        app_logger.error("Ошибка при отправке реакции %s на пост %s в канале %s: %s", reaction_emoji, post_id, channel.channel_title, e)
+                                        except FloodWaitError:
+                                            raise
                                         except Exception as e:
-                                            app_logger.error(f"Ошибка при отправке реакции на пост {post_id} в канале {channel.channel_title}: {e}")
+                                            app_logger.error("Ошибка при отправке реакции на пост %s в канале %s: %s", post_id, channel.channel_title, e)
+                                            unprocessed.append(post_id)
+                                    except FloodWaitError as e:
+                                        # Аккаунт на карантине: оставшиеся посты канала передаем другим аккаунтам
+                                        # (сам аккаунт вернется к ним после карантина)
+                                        self._hand_off(account, channel, new_posts[index:], e)
+                                        unprocessed.extend(new_posts[index:])
+                                        break
                                     except Exception as e:
-                                        app_logger.error(f"Ошибка при обработке поста {post_id} в канале {channel.channel_title}: {e}")
-                            
-                            # Обновляем время последней проверки в контексте этого аккаунта
-                            # но НЕ в общем, чтобы другие аккаунты тоже могли проверить посты
-                            # и поставить свои реакции
-                            try:
-                                last_check_record = AccountReaction(
-                                    account_id=account.id,
-                                    channel_id=channel.id,
-                                    post_id=0,  # Специальное значение для маркера последней проверки
-                                    reaction="__last_checked__"  # Маркер для отслеживания последней проверки
-                                )
-                                session.add(last_check_record)
-                                await session.commit()
-                            except Exception as e:
-                                app_logger.error(f"Ошибка при обновлении времени последней проверки для канала {channel.channel_title}: {e}")
+                                        app_logger.error("Ошибка при обработке поста %s в канале %s: %s", post_id, channel.channel_title, e)
+                                        unprocessed.append(post_id)
+
+                            await channel_manager.commit_scan(account.id, channel.id, unprocessed)
 
                     except Exception as e:
-                        app_logger.error(f"Ошибка при проверке каналов для пользователя {user.username}: {e}")
+                        app_logger.error("Ошибка при проверке каналов для пользователя %s: %s", user.username, e)
 
-            await service.update_last_active(account.phone)
+            with tracer.span("persist"):
+                await service.update_last_active(account.phone)
 
-            await client(functions.account.UpdateStatusRequest(
-                        offline=True
-                    ))
+            if presence and not quarantine.is_quarantined(account.id, "UpdateStatusRequest"):
+                await client(functions.account.UpdateStatusRequest(
+                            offline=True
+                        ))
         finally:
+            if service.active_sessions.get(account.phone) is client:
+                del service.active_sessions[account.phone]
             await client.disconnect()
 
     async def _handle_invalid_session(self, service: AccountService, phone: str, user_id: int):
@@ -663,13 +1113,16 @@ class UserActivityManager:
                                     f"⚠️ Сессия {phone} была автоматически удалена из-за ошибки авторизации. "
                                     f"Пожалуйста, добавьте аккаунт заново.")
         else:
-            app_logger.error(f"Не удалось удалить аккаунт {phone}")
+            app_logger.error("Не удалось удалить аккаунт %s", phone)
 
     async def _notify_user(self, user_id: int, message: str):
         """Отправка уведомления пользователю"""
         try:
             user = await get_user_by_user_id(user_id)
-            await bot.send_message(user_id, message)
-            app_logger.info(f"Уведомление отправлено пользователю {user.username}")
+            if self.notifier is not None:
+                await self.notifier(user_id, message)
+            else:
+                await bot.send_message(user_id, message)
+            app_logger.info("Уведомление отправлено пользователю %s", user.username)
         except Exception as e:
-            app_logger.error(f"Ошибка отправки уведомления: {str(e)}")
+            app_logger.error("Ошибка отправки уведомления: %s", e)
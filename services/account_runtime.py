@@ -0,0 +1,66 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from telethon.tl.types import InputPeerChannel
+
+from config_data.config import DEFERRED_VIEWS_LIMIT
+
+
+class AccountRuntime:
+    """
+    Состояние аккаунта в цикле активности.
+
+    Вместо ORM-объекта Account цикл держит только то, что ему нужно между запусками:
+    зашифрованная сессия и пароль в памяти не хранятся и читаются из базы в начале
+    каждого цикла вместе с is_active, поэтому изменения аккаунта видны со следующего цикла.
+    """
+    __slots__ = ("id", "phone", "user_id", "is_active", "last_cycle_at", "next_run_at", "peers", "deferred_views")
+
+    def __init__(self, id: int, phone: str, user_id: int, is_active: bool = True):
+        self.id = id
+        self.phone = phone
+        self.user_id = user_id
+        self.is_active = is_active
+        self.last_cycle_at: Optional[float] = None  # Начало последнего цикла (loop.time())
+        self.next_run_at: Optional[float] = None    # Плановое начало следующего цикла (loop.time())
+        # Канал (UserChannel.id) -> (ID канала в Telegram, access_hash). access_hash
+        # у каждого аккаунта свой, поэтому кэш хранится в состоянии аккаунта
+        self.peers: Dict[int, Tuple[int, int]] = {}
+        # Просмотры, отложенные при перегрузке: (ID канала в Telegram, пост, нужное число просмотров).
+        # Создается при первой отсрочке, самые старые вытесняются
+        self.deferred_views: Optional[deque] = None
+
+    @classmethod
+    def from_account(cls, account) -> "AccountRuntime":
+        return cls(account.id, account.phone, account.user_id, bool(account.is_active))
+
+    def update(self, phone: str, user_id: int, is_active: bool):
+        """Обновляет состояние по свежим данным из базы"""
+        self.phone = phone
+        self.user_id = user_id
+        self.is_active = bool(is_active)
+
+    def peer(self, channel_id: int) -> Optional[InputPeerChannel]:
+        """Ссылка на канал без запроса к API (None, если канал еще не получали)"""
+        cached = self.peers.get(channel_id)
+        if cached is None:
+            return None
+        return InputPeerChannel(channel_id=cached[0], access_hash=cached[1])
+
+    def remember_peer(self, channel_id: int, entity) -> None:
+        access_hash = getattr(entity, "access_hash", None)
+        if access_hash is not None:
+            # Сущность канала (Channel) или готовая ссылка на него (InputPeerChannel)
+            self.peers[channel_id] = (getattr(entity, "channel_id", None) or entity.id, access_hash)
+
+    def forget_peer(self, channel_id: int) -> None:
+        self.peers.pop(channel_id, None)
+
+    def defer_view(self, channel_id: int, post_id: int, target_views: int) -> None:
+        if self.deferred_views is None:
+            self.deferred_views = deque(maxlen=DEFERRED_VIEWS_LIMIT)
+        self.deferred_views.append((channel_id, post_id, target_views))
+
+    def take_deferred_views(self) -> List[Tuple[int, int, int]]:
+        views, self.deferred_views = list(self.deferred_views or ()), None
+        return views
@@ -0,0 +1,68 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+# Виды изменений
+ACCOUNT_ADDED = "account_added"
+ACCOUNT_TOGGLED = "account_toggled"
+ACCOUNT_DELETED = "account_deleted"
+CHANNEL_ADDED = "channel_added"
+CHANNEL_UPDATED = "channel_updated"
+CHANNEL_DELETED = "channel_deleted"
+
+
+class Change:
+    """Изменение аккаунта или канала пользователя"""
+    __slots__ = ("kind", "user_id", "version", "account_id", "phone", "is_active", "channel_id", "origin")
+
+    def __init__(self, kind: str, user_id: int, version: int, account_id: Optional[int] = None,
+                 phone: Optional[str] = None, is_active: Optional[bool] = None, channel_id: Optional[int] = None,
+                 origin: Optional[str] = None):
+        self.kind = kind
+        self.user_id = user_id
+        self.version = version
+        self.account_id = account_id
+        self.phone = phone
+        self.is_active = is_active
+        self.channel_id = channel_id
+        # Откуда пришло изменение: None - опубликовано в этом процессе,
+        # "bot" / "worker-N" - переслано другим процессом (обратно не пересылается)
+        self.origin = origin
+
+    def __repr__(self) -> str:
+        return f"Change({self.kind}, user={self.user_id}, v={self.version})"
+
+
+class ChangeFeed:
+    """
+    Лента изменений внутри процесса: сервисы публикуют изменения аккаунтов и каналов,
+    подписчики (менеджер активности) применяют их сразу, не дожидаясь перезапуска.
+    У каждого пользователя есть счетчик версий: по нему подписчик при сверке
+    с базой видит, что пропустил изменения.
+    """
+
+    def __init__(self):
+        self.versions: Dict[int, int] = defaultdict(int)
+        self.subscribers: List[asyncio.Queue] = []
+
+    def publish(self, kind: str, user_id: int, **fields) -> Change:
+        self.versions[user_id] += 1
+        change = Change(kind, user_id, self.versions[user_id], **fields)
+        for queue in self.subscribers:
+            queue.put_nowait(change)
+        return change
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self.subscribers:
+            self.subscribers.remove(queue)
+
+    def version(self, user_id: int) -> int:
+        return self.versions.get(user_id, 0)
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,147 @@
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from telethon.errors import (
+    ChannelInvalidError,
+    ChannelPrivateError,
+    FloodWaitError,
+    InviteHashEmptyError,
+    InviteHashExpiredError,
+    InviteHashInvalidError
+)
+
+from config_data.config import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_OPEN_SECONDS,
+    BREAKER_MAX_OPEN_SECONDS,
+    BREAKER_DEACTIVATE_AFTER
+)
+from loader import app_logger
+from services.metrics import CHANNEL_FAILURES
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    """
+    Класс ошибки доступа к каналу для счетчиков предохранителя.
+    None - ошибка не связана с каналом (FloodWait ограничивает аккаунт, а не канал).
+    """
+    if isinstance(error, FloodWaitError):
+        return None
+    if isinstance(error, (InviteHashExpiredError, InviteHashInvalidError, InviteHashEmptyError)):
+        return "invite_invalid"
+    if isinstance(error, (ChannelPrivateError, ChannelInvalidError)):
+        return "private"
+    text = str(error).lower()
+    if "expired" in text or "invalid" in text:
+        return "invite_invalid"
+    if "private" in text or "access" in text:
+        return "private"
+    if "not found" in text or "cannot find" in text or "no user has" in text:
+        return "not_found"
+    return "error"
+
+
+class ChannelBreaker:
+    """Состояние предохранителя одного канала"""
+    __slots__ = ("state", "failures", "consecutive", "trips", "first_failure_at", "opened_at", "open_for",
+                 "probe_account", "probe_started")
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures: Counter = Counter()  # Ошибки по классам
+        self.consecutive = 0                # Ошибок подряд
+        self.trips = 0                      # Сколько раз предохранитель размыкался
+        self.first_failure_at: Optional[float] = None
+        self.opened_at = 0.0
+        self.open_for = 0.0
+        self.probe_account: Optional[int] = None
+        self.probe_started = 0.0
+
+
+class ChannelBreakers:
+    """
+    Предохранители каналов, общие для всех аккаунтов.
+
+    После BREAKER_FAILURE_THRESHOLD ошибок подряд канал размыкается (open): аккаунты его
+    пропускают. По истечении паузы один аккаунт получает право на пробную проверку (half-open).
+    Успех замыкает предохранитель, ошибка снова размыкает его с удвоенной паузой.
+    Канал деактивируется, только если ошибки продолжаются дольше BREAKER_DEACTIVATE_AFTER секунд.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.breakers: Dict[int, ChannelBreaker] = {}
+
+    def allow(self, channel_id: int, account_id: Optional[int]) -> bool:
+        """Можно ли аккаунту сейчас обращаться к каналу"""
+        breaker = self.breakers.get(channel_id)
+        if breaker is None or breaker.state == CLOSED:
+            return True
+
+        now = self.clock()
+        if breaker.state == OPEN:
+            if now - breaker.opened_at < breaker.open_for:
+                return False
+            breaker.state = HALF_OPEN
+            breaker.probe_account = account_id
+            breaker.probe_started = now
+            app_logger.info("Пробная проверка канала %s аккаунтом %s", channel_id, account_id)
+            return True
+
+        # Полуоткрытое состояние: проверяет только один аккаунт. Если его проверка
+        # так и не завершилась, право на нее передается другому аккаунту
+        if breaker.probe_account == account_id:
+            return True
+        if now - breaker.probe_started > breaker.open_for:
+            breaker.probe_account = account_id
+            breaker.probe_started = now
+            return True
+        return False
+
+    def record_success(self, channel_id: int):
+        breaker = self.breakers.pop(channel_id, None)
+        if breaker is not None and breaker.state != CLOSED:
+            app_logger.info("Канал %s снова доступен, предохранитель замкнут", channel_id)
+
+    def record_failure(self, channel_id: int, error_class: Optional[str]) -> bool:
+        """
+        Учитывает ошибку доступа к каналу.
+        Возвращает True, если канал недоступен так долго, что его пора деактивировать.
+        """
+        if error_class is None:
+            return False
+        CHANNEL_FAILURES.inc(error_class)
+
+        now = self.clock()
+        breaker = self.breakers.get(channel_id)
+        if breaker is None:
+            breaker = self.breakers[channel_id] = ChannelBreaker()
+        breaker.failures[error_class] += 1
+        breaker.consecutive += 1
+        if breaker.first_failure_at is None:
+            breaker.first_failure_at = now
+
+        if breaker.state == HALF_OPEN or (breaker.state == CLOSED and breaker.consecutive >= BREAKER_FAILURE_THRESHOLD):
+            breaker.trips += 1
+            breaker.state = OPEN
+            breaker.opened_at = now
+            breaker.open_for = min(BREAKER_OPEN_SECONDS * 2 ** (breaker.trips - 1), BREAKER_MAX_OPEN_SECONDS)
+            breaker.probe_account = None
+            app_logger.warning(
+                "Предохранитель канала %s разомкнут на %s сек (ошибки: %s)",
+                channel_id, int(breaker.open_for), dict(breaker.failures)
+            )
+
+        return breaker.trips > 1 and now - breaker.first_failure_at >= BREAKER_DEACTIVATE_AFTER
+
+    def reset(self, channel_id: int):
+        """Сбрасывает состояние канала (после деактивации или удаления)"""
+        self.breakers.pop(channel_id, None)
+
+
+channel_breakers = ChannelBreakers()
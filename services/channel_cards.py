@@ -0,0 +1,64 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+
+class ChannelCardCache:
+    """
+    Кэш отрисованных карточек каналов (текст + клавиатура).
+
+    Ключ карточки включает версию канала: любое изменение канала (реакции, количество
+    реакций/просмотров, статус) увеличивает версию, и старые карточки больше не используются.
+    Версии хранятся не больше чем для max_size каналов: вместе с версией вытесняются
+    и карточки канала, поэтому сброшенная версия не совпадет со старой карточкой.
+    """
+
+    def __init__(self, max_size: int = 2048):
+        self.max_size = max_size
+        self._versions: OrderedDict[int, int] = OrderedDict()
+        self._cards: OrderedDict[tuple, Tuple[str, InlineKeyboardMarkup]] = OrderedDict()
+
+    def version(self, channel_id: int) -> int:
+        """Текущая версия канала"""
+        return self._versions.get(channel_id, 0)
+
+    def get(self, channel_id: int, index: int, total: int) -> Optional[Tuple[str, InlineKeyboardMarkup]]:
+        """Возвращает карточку из кэша или None"""
+        key = (channel_id, self.version(channel_id), index, total)
+        card = self._cards.get(key)
+        if card is not None:
+            self._cards.move_to_end(key)
+            self._versions.move_to_end(channel_id)
+        return card
+
+    def put(self, channel_id: int, index: int, total: int,
+            text: str, markup: InlineKeyboardMarkup) -> Tuple[str, InlineKeyboardMarkup]:
+        """Сохраняет карточку в кэш"""
+        version = self.version(channel_id)
+        key = (channel_id, version, index, total)
+        self._cards[key] = (text, markup)
+        self._cards.move_to_end(key)
+        while len(self._cards) > self.max_size:
+            self._cards.popitem(last=False)
+        self._set_version(channel_id, version)
+        return text, markup
+
+    def invalidate(self, channel_id: int):
+        """Сбрасывает карточки канала после его изменения"""
+        self._drop_cards(channel_id)
+        self._set_version(channel_id, self.version(channel_id) + 1)
+
+    def _set_version(self, channel_id: int, version: int):
+        self._versions[channel_id] = version
+        self._versions.move_to_end(channel_id)
+        while len(self._versions) > self.max_size:
+            evicted, _ = self._versions.popitem(last=False)
+            self._drop_cards(evicted)
+
+    def _drop_cards(self, channel_id: int):
+        for key in [key for key in self._cards if key[0] == channel_id]:
+            del self._cards[key]
+
+
+channel_cards = ChannelCardCache()
@@ -1,33 +1,170 @@
-import random
 from datetime import datetime, timedelta, UTC
-from typing import List, Optional
-from sqlalchemy import select, update
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, update, delete, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.models import UserChannel, AccountReaction
+from database.models import User, UserChannel, AccountReaction, AccountChannelState
 from telethon import TelegramClient
-from telethon.tl.functions.messages import GetHistoryRequest, ImportChatInviteRequest, CheckChatInviteRequest, SendReactionRequest
-from telethon.tl.types import InputPeerChannel, PeerChannel, ReactionEmoji
+from telethon.tl.functions.messages import (
+    GetHistoryRequest,
+    GetPeerDialogsRequest,
+    ImportChatInviteRequest,
+    CheckChatInviteRequest
+)
+from telethon.tl.types import (
+    InputDialogPeer,
+    InputPeerChannel,
+    PeerChannel,
+    ReactionEmoji,
+    ChatInviteAlready,
+    InputNotifyPeer,
+    InputPeerNotifySettings,
+    ChannelMessagesFilterEmpty,
+    MessageEmpty
+)
+from telethon.tl.functions.account import UpdateNotifySettingsRequest
 from telethon.tl.functions.channels import GetFullChannelRequest, JoinChannelRequest, LeaveChannelRequest
+from telethon.tl.functions.updates import GetChannelDifferenceRequest
+from telethon.tl.types.updates import ChannelDifference, ChannelDifferenceTooLong
 from telethon.errors import (
     ChannelPrivateError,
     InviteHashEmptyError,
     InviteHashExpiredError,
     InviteHashInvalidError,
     UserAlreadyParticipantError,
+    UserNotParticipantError,
     FloodWaitError,
-    ChannelInvalidError
+    ChannelInvalidError,
+    RPCError
+)
+from config_data.config import (
+    ACCOUNTS_CONCURRENCY,
+    ACCOUNT_OPERATION_TIMEOUT,
+    FIRST_CHECK_POSTS,
+    HISTORY_PAGE_SIZE,
+    HISTORY_MAX_PAGES,
+    PEER_DIALOGS_BATCH,
+    DIFFERENCE_LIMIT
 )
-from config_data.config import API_ID, API_HASH
 import asyncio
 from loader import app_logger
-from database.query_orm import get_user_by_user_id, get_user_by_id
+from database.query_orm import get_user_by_user_id, get_user_by_id, get_user_pk_by_user_id
+from services.channel_breaker import channel_breakers, classify_error
+from services.poll_scheduler import poll_scheduler
+from services.tracing import tracer
+from services.post_scanner import PostScan
+from services.channel_cards import channel_cards
+from services import change_feed as changes
+from services.change_feed import change_feed
+from services.metrics import POSTS_DISCOVERED
 
 # Для решения циклического импорта используем глобальную переменную
 account_service = None
 
+# Кэш количества каналов пользователя и соседей для навигации (ключ - User.id),
+# сбрасывается при добавлении/удалении канала
+_channels_count_cache: Dict[int, int] = {}
+_channels_navigation_cache: Dict[int, dict] = {}
+
+
+def _invalidate_user_channels(user_id: int):
+    """Сбрасывает кэши списка каналов пользователя"""
+    _channels_count_cache.pop(user_id, None)
+    _channels_navigation_cache.pop(user_id, None)
+
+
+async def invalidate_channel_caches(user_id: int, channel_id: Optional[int]) -> None:
+    """
+    Сбрасывает кэши канала и списка каналов пользователя (по Telegram ID) после изменения,
+    сделанного в другом процессе (например, деактивации канала воркером движка)
+    """
+    if channel_id is not None:
+        channel_cards.invalidate(channel_id)
+    user_pk = await get_user_pk_by_user_id(user_id)
+    if user_pk is not None:
+        _invalidate_user_channels(user_pk)
+
+# Реакции по умолчанию, если канал не ограничивает список доступных реакций
+DEFAULT_REACTIONS = ["👍", "❤", "👏", "🎉", "🤩", "👌", "😍",
+                     "❤", "💯", "🤣", "⚡", "🏆", "🤝", "✍"]
+
+
+def _bare_channel_id(channel_id: int) -> int:
+    """Приводит ID канала к виду без префикса -100 (так его ожидает PeerChannel)"""
+    if str(channel_id).startswith('-100'):
+        return int(str(abs(channel_id))[3:])
+    return abs(channel_id)
+
+
+async def run_for_accounts(accounts: list, account_service, operation, on_result=None) -> list[tuple]:
+    """
+    Выполняет operation(client, account) для всех аккаунтов параллельно.
+
+    Одновременно работает не больше ACCOUNTS_CONCURRENCY аккаунтов, на каждый аккаунт
+    (вместе с подключением) отводится ACCOUNT_OPERATION_TIMEOUT секунд. Если аккаунт уже
+    подключен в цикле активности, используется его клиент, иначе создается временный.
+    Результаты передаются в on_result(account, error, done, total) по мере завершения.
+
+    Returns:
+        Список пар (account, error), error равен None при успехе
+    """
+    semaphore = asyncio.Semaphore(ACCOUNTS_CONCURRENCY)
+
+    async def run_with_client(account):
+        client = account_service.get_active_client(account.phone)
+        own_client = client is None
+        try:
+            if own_client:
+                session_str = await account_service.decrypt_session(account.session)
+                client = await account_service._create_client(session_str)
+                await client.connect()
+            await operation(client, account)
+        finally:
+            if own_client and client is not None and client.is_connected():
+                await client.disconnect()
+
+    async def run(account):
+        async with semaphore:
+            try:
+                await asyncio.wait_for(run_with_client(account), ACCOUNT_OPERATION_TIMEOUT)
+                return account, None
+            except asyncio.TimeoutError:
+                return account, TimeoutError(f"превышен таймаут {ACCOUNT_OPERATION_TIMEOUT} сек")
+            except Exception as e:
+                return account, e
+
+    results = []
+    for future in asyncio.as_completed([run(account) for account in accounts]):
+        account, error = await future
+        results.append((account, error))
+        if on_result:
+            try:
+                await on_result(account, error, len(results), len(accounts))
+            except Exception as e:
+                app_logger.error("Ошибка при обработке результата аккаунта %s: %s", account.phone, e)
+    return results
+
+
 class ChannelManager:
     def __init__(self, session: AsyncSession):
         self.session = session
+        # Каналы, найденные в Telegram при проверке постов: UserChannel.id -> сущность канала
+        self.resolved_peers: Dict[int, object] = {}
+        # Результаты последней проверки каналов: UserChannel.id -> PostScan
+        self.scans: Dict[int, PostScan] = {}
+        # Курсоры после проверки, еще не сохраненные: UserChannel.id -> (ID последнего поста, pts).
+        # Сохраняются в commit_scan, когда известно, какие посты обработаны
+        self.pending_cursors: Dict[int, tuple[int, Optional[int]]] = {}
+
+    async def _publish_channel_change(self, kind: str, user_pk: int, **fields) -> None:
+        """
+        Публикует изменение канала в ленту. Каналы хранят User.id, а подписчики
+        (движок, маршрутизация по воркерам) работают с Telegram ID владельца.
+        """
+        owner_id = await self.session.scalar(select(User.user_id).where(User.id == user_pk))
+        if owner_id is None:
+            app_logger.warning("Не найден владелец канала %s (User.id %s)", fields.get("channel_id"), user_pk)
+            return
+        change_feed.publish(kind, owner_id, **fields)
 
     async def get_user_channels(self, user_id: int) -> List[UserChannel]:
         """Получает список каналов пользователя"""
@@ -35,6 +172,50 @@ class ChannelManager:
         result = await self.session.execute(query)
         return result.scalars().all()
 
+    async def count_user_channels(self, user_id: int) -> int:
+        """Возвращает количество каналов пользователя (с кэшированием)"""
+        count = _channels_count_cache.get(user_id)
+        if count is None:
+            result = await self.session.execute(
+                select(func.count(UserChannel.id)).where(UserChannel.user_id == user_id)
+            )
+            count = result.scalar_one()
+            _channels_count_cache[user_id] = count
+        return count
+
+    async def get_first_channel_id(self, user_id: int) -> Optional[int]:
+        """Получает ID первого канала пользователя (по порядку добавления)"""
+        key = (None, True)
+        navigation = _channels_navigation_cache.setdefault(user_id, {})
+        if key not in navigation:
+            query = (
+                select(UserChannel.id)
+                .where(UserChannel.user_id == user_id)
+                .order_by(UserChannel.id)
+                .limit(1)
+            )
+            result = await self.session.execute(query)
+            navigation[key] = result.scalar_one_or_none()
+        return navigation[key]
+
+    async def get_neighbour_channel_id(self, user_id: int, channel_id: int, forward: bool) -> Optional[int]:
+        """
+        Получает ID соседнего канала пользователя относительно channel_id.
+        Используется keyset-запрос, поэтому из базы читается не больше одной строки,
+        а результат кэшируется до изменения списка каналов пользователя.
+        """
+        key = (channel_id, forward)
+        navigation = _channels_navigation_cache.setdefault(user_id, {})
+        if key not in navigation:
+            query = select(UserChannel.id).where(UserChannel.user_id == user_id)
+            if forward:
+                query = query.where(UserChannel.id > channel_id).order_by(UserChannel.id)
+            else:
+                query = query.where(UserChannel.id < channel_id).order_by(UserChannel.id.desc())
+            result = await self.session.execute(query.limit(1))
+            navigation[key] = result.scalar_one_or_none()
+        return navigation[key]
+
     async def add_channel(self, user_id: int,
                           channel_id: int,
                           username: str,
@@ -65,6 +246,8 @@ class ChannelManager:
             )
             self.session.add(reaction)
             await self.session.commit()
+            _invalidate_user_channels(user_id)
+            await self._publish_channel_change(changes.CHANNEL_ADDED, user_id, channel_id=channel.id, is_active=True)
             return channel.id
         except Exception as e:
             await self.session.rollback()
@@ -80,75 +263,179 @@ class ChannelManager:
             return channel
         return None
 
-    async def delete_channel(self, channel_id: int, account_service) -> bool:
-        """Удаляет канал и отписывает все аккаунты пользователя от него"""
+    async def get_deletion_target(self, channel_id: int, account_service) -> Optional[dict]:
+        """
+        Данные для удаления канала, которые нужны и после удаления записи: Telegram ID
+        и ссылка канала, Telegram ID владельца и телефоны аккаунтов для отписки.
+        None - канала нет.
+        """
+        channel = await self.get_channel(channel_id)
+        if not channel:
+            return None
+        user = await get_user_by_id(channel.user_id)
+        accounts = await account_service.get_user_accounts(user.user_id)
+        return {
+            "channel_id": channel.id,
+            "channel_tg_id": channel.channel_id,
+            "channel_username": channel.channel_username,
+            "channel_title": channel.channel_title,
+            "user_id": user.user_id,
+            "phones": [account.phone for account in accounts],
+        }
+
+    async def delete_channel(self, channel_id: int) -> bool:
+        """
+        Удаляет канал и все его реакции из базы. Повторный вызов для уже удаленного
+        канала ничего не делает и возвращает True. False - ошибка базы.
+        """
         try:
             query = select(UserChannel).where(UserChannel.id == channel_id)
             result = await self.session.execute(query)
             channel = result.scalar_one_or_none()
             
-            if channel:
-                # Получаем все аккаунты пользователя
-                user = await get_user_by_id(channel.user_id)
-                user_accounts = await account_service.get_user_accounts(user.user_id)
-                
-                # Для каждого аккаунта пытаемся отписаться от канала
-                for account in user_accounts:
-                    try:
-                        # Расшифровываем сессию
-                        session_str = await account_service.decrypt_session(account.session)
-                        
-                        # Создаем клиент через account_service
-                        client = await account_service._create_client(session_str)
-                        
-                        try:
-                            await client.connect()
-                            
-                            # Пытаемся получить информацию о канале
-                            if channel.channel_username:
-                                try:    
-                                    channel_entity = await client.get_entity(channel.channel_username)
-                                except Exception as e:
-                                    app_logger.warning(f"Не удалось получить канал {channel.channel_username} по юзернейму")
-                                    
-                            if channel.channel_id:
-                                try:
-                                    channel_entity = await client.get_entity(PeerChannel(channel.channel_id))
-                                except Exception as e:
-                                    app_logger.warning(f"Не удалось получить канал {channel.channel_id} по ID")
-                                    
-                            
-                            # Отписываемся от канала
-                            await client(LeaveChannelRequest(channel_entity))
-                            app_logger.info(f"Аккаунт {account.phone} успешно отписался от канала {channel.channel_title}")
-                            
-                        except Exception as e:
-                            app_logger.error(f"Ошибка при отписке аккаунта {account.phone} от канала {channel.channel_title}: {str(e)}")
-                        finally:
-                            if client.is_connected():
-                                await client.disconnect()
-                    except Exception as e:
-                        app_logger.error(f"Ошибка при работе с аккаунтом {account.phone}: {str(e)}")
-                        continue
-                
-                # Удаляем все реакции канала
-                reactions = await self.session.execute(
-                    select(AccountReaction).where(AccountReaction.channel_id == channel_id)
-                )
-                for reaction in reactions.scalars().all():
-                    await self.session.delete(reaction)
-                
-                await self.session.delete(channel)
-                await self.session.commit()
-                app_logger.info(f"Канал {channel.channel_title} успешно удален")
+            if not channel:
                 return True
-                
-            return False
-            
+
+            # Удаляем канал и все его реакции
+            await self.session.execute(
+                delete(AccountReaction).where(AccountReaction.channel_id == channel_id)
+            )
+            await self.session.execute(
+                delete(AccountChannelState).where(AccountChannelState.channel_id == channel_id)
+            )
+            await self.session.delete(channel)
+            await self.session.commit()
+            _invalidate_user_channels(channel.user_id)
+            channel_cards.invalidate(channel_id)
+            channel_breakers.reset(channel_id)
+            poll_scheduler.forget(channel_id)
+            await self._publish_channel_change(changes.CHANNEL_DELETED, channel.user_id, channel_id=channel_id)
+            app_logger.info("Канал %s успешно удален", channel.channel_title)
+            return True
         except Exception as e:
-            app_logger.error(f"Ошибка при удалении канала: {e}")
+            app_logger.error("Ошибка при удалении канала: %s", e)
+            await self.session.rollback()
             return False
 
+    @staticmethod
+    async def leave_channel(target: dict, account_service, on_leave_result=None, skip_phones=()) -> int:
+        """
+        Отписывает аккаунты из target (см. get_deletion_target) от канала, кроме skip_phones.
+
+        Аккаунты отписываются параллельно (не больше ACCOUNTS_CONCURRENCY одновременно),
+        результат по каждому передается в on_leave_result(account, error, done, total)
+        по мере готовности. Аккаунт, который уже не состоит в канале, считается отписанным.
+        Возвращает число аккаунтов, которые пришлось отписывать.
+        """
+        channel_username = target["channel_username"]
+        channel_title = target["channel_title"]
+        phones = set(target["phones"]) - set(skip_phones)
+        accounts = [
+            account for account in await account_service.get_user_accounts(target["user_id"])
+            if account.phone in phones
+        ]
+
+        async def leave(client: TelegramClient, account) -> None:
+            channel_entity = None
+            if channel_username and not channel_username.startswith('+'):
+                try:
+                    channel_entity = await client.get_entity(channel_username)
+                except Exception:
+                    app_logger.warning("Не удалось получить канал %s по юзернейму", channel_username)
+            if channel_entity is None:
+                channel_entity = await client.get_entity(PeerChannel(_bare_channel_id(target["channel_tg_id"])))
+            try:
+                await client(LeaveChannelRequest(channel_entity))
+            except UserNotParticipantError:
+                # Аккаунт уже отписан (например, задача перезапущена после рестарта)
+                pass
+
+        async def report(account, error, done, total):
+            if error is None:
+                app_logger.info("Аккаунт %s успешно отписался от канала %s", account.phone, channel_title)
+            else:
+                app_logger.error("Ошибка при отписке аккаунта %s от канала %s: %s", account.phone, channel_title, error)
+            if on_leave_result:
+                await on_leave_result(account, error, done, total)
+
+        await run_for_accounts(accounts, account_service, leave, report)
+        return len(accounts)
+
+    @staticmethod
+    async def fetch_channel_info(client: TelegramClient, channel_username: str) -> tuple:
+        """
+        Получает канал и список доступных в нем реакций.
+        Для ссылок-приглашений (+hash) аккаунт при необходимости вступает в канал.
+
+        Returns:
+            Кортеж (channel, available_reactions)
+        """
+        if channel_username.startswith('+'):
+            channel = await ChannelManager.join_by_invite(client, channel_username[1:])
+        else:
+            # Публичные каналы доступны без подписки
+            channel = await client.get_entity(channel_username)
+        full_channel = await client(GetFullChannelRequest(channel))
+
+        available_reactions = DEFAULT_REACTIONS
+        if hasattr(full_channel.full_chat.available_reactions, 'reactions'):
+            reactions = full_channel.full_chat.available_reactions.reactions
+            if isinstance(reactions, list):
+                # Преобразуем ReactionEmoji в строки
+                available_reactions = [str(r.emoticon) for r in reactions if isinstance(r, ReactionEmoji)]
+        return channel, available_reactions
+
+    @staticmethod
+    async def join_by_invite(client: TelegramClient, invite_hash: str):
+        """Вступает в закрытый канал по хэшу приглашения и отключает в нем уведомления"""
+        try:
+            result = await client(ImportChatInviteRequest(invite_hash))
+        except UserAlreadyParticipantError:
+            channel = await ChannelManager.resolve_invite(client, invite_hash)
+            if channel is not None:
+                return channel
+            raise
+        if not getattr(result, 'chats', None):
+            raise ValueError("не удалось присоединиться к закрытому каналу")
+
+        channel = result.chats[0]
+        try:
+            # Полностью отключаем уведомления
+            await client(UpdateNotifySettingsRequest(
+                peer=InputNotifyPeer(peer=channel),
+                settings=InputPeerNotifySettings(
+                    show_previews=False,
+                    silent=True,
+                    mute_until=2147483647,  # Максимальное значение времени
+                    sound=None              # Отключаем звук
+                )
+            ))
+        except Exception as e:
+            app_logger.error("Ошибка при отключении уведомлений для канала %s: %s", channel.title, e)
+        return channel
+
+    @staticmethod
+    async def resolve_invite(client: TelegramClient, invite_hash: str):
+        """Канал по хэшу приглашения, если аккаунт уже его участник (иначе None)"""
+        invite = await client(CheckChatInviteRequest(invite_hash))
+        if isinstance(invite, ChatInviteAlready):
+            return invite.chat
+        return None
+
+    async def record_memberships(self, channel_id: int, channels: Dict[int, object]) -> None:
+        """
+        Записывает членство аккаунтов в канале, в который они вступили при добавлении.
+
+        Args:
+            channel_id: UserChannel.id
+            channels: ID аккаунта -> сущность канала, полученная при вступлении
+        """
+        for account_id, entity in channels.items():
+            state = await self.get_channel_state(account_id, channel_id)
+            state.is_member = True
+            state.access_hash = getattr(entity, "access_hash", None)
+        await self.session.commit()
+
     async def update_channel_reaction(self, channel_id: int, user_reactions: list) -> bool:
         """Обновляет пользовательские реакции для канала"""
         try:
@@ -160,6 +447,9 @@ class ChannelManager:
             if reaction:
                 reaction.user_reactions = user_reactions
                 await self.session.commit()
+                channel = await self.get_channel(channel_id)
+                if channel:
+                    await self._publish_channel_change(changes.CHANNEL_UPDATED, channel.user_id, channel_id=channel_id)
                 return True
             return False
         except Exception as e:
@@ -190,6 +480,7 @@ class ChannelManager:
                 cur_channel.min_reactions = min_reactions
                 cur_channel.max_reactions = max_reactions
                 await self.session.commit()
+                await self._publish_channel_change(changes.CHANNEL_UPDATED, cur_channel.user_id, channel_id=channel_id)
             return True
         except Exception:
             return False
@@ -201,13 +492,35 @@ class ChannelManager:
             if cur_channel:
                 cur_channel.views = views_count
                 await self.session.commit()
+                await self._publish_channel_change(changes.CHANNEL_UPDATED, cur_channel.user_id, channel_id=channel_id)
             return True
         except Exception:
             return False
 
+    async def _deactivate_channel(self, channel: UserChannel, reason: str) -> None:
+        """Деактивирует канал, который недоступен дольше BREAKER_DEACTIVATE_AFTER"""
+        channel.is_active = False
+        await self.session.commit()
+        channel_cards.invalidate(channel.id)
+        channel_breakers.reset(channel.id)
+        await self._publish_channel_change(changes.CHANNEL_UPDATED, channel.user_id, channel_id=channel.id, is_active=False)
+        app_logger.info("Канал %s автоматически деактивирован: %s", channel.channel_title, reason)
+
+    async def _record_channel_failure(self, channel: UserChannel, error_class: Optional[str], reason: str) -> None:
+        """Передает ошибку доступа к каналу предохранителю и деактивирует канал по его решению"""
+        if channel_breakers.record_failure(channel.id, error_class):
+            await self._deactivate_channel(channel, reason)
+
     async def check_new_posts(self, channel: UserChannel, client: TelegramClient, account_id: int = None) -> list[int]:
+        # Канал с разомкнутым предохранителем пропускаем до пробной проверки
+        if not channel_breakers.allow(channel.id, account_id):
+            app_logger.debug("Предохранитель канала %s разомкнут, пропускаем его", channel.channel_title)
+            return []
+        state = None
+        self.pending_cursors.pop(channel.id, None)
         try:
             peer = None  # Инициализируем peer None изначально
+            failure_class = None  # Класс ошибки подключения к каналу
             
             # Правильно обрабатываем ID канала
             # Telegram API ожидает ID без префикса -100
@@ -217,111 +530,62 @@ class ChannelManager:
             if str(orig_channel_id).startswith('-100'):
                 # Берем только часть после -100
                 channel_id = int(str(abs(orig_channel_id))[3:])
-                app_logger.debug(f"Извлекаем ID канала: {orig_channel_id} -> {channel_id}")
+                app_logger.debug("Извлекаем ID канала: %s -> %s", orig_channel_id, channel_id)
             else:
                 channel_id = abs(orig_channel_id)
+
+            # Состояние канала для аккаунта: курсор, членство и access_hash канала
+            state = await self.get_channel_state(account_id, channel.id) if account_id else None
+            if state is not None and state.access_hash:
+                # Аккаунт уже находил канал: ссылка на него собирается без запросов к API
+                peer = InputPeerChannel(channel_id=channel_id, access_hash=state.access_hash)
             
-            # Сначала проверяем, можно ли получить канал по username
-            if channel.channel_username and channel.channel_username.strip():
-                try:
-                    # Если это ссылка-приглашение (начинается с +)
-                    if channel.channel_username.startswith('+'):
-                        invite_hash = channel.channel_username[1:]
-                        try:
-                            # Пытаемся присоединиться к каналу
-                            app_logger.debug(f"Присоединяемся к каналу по хэшу: {invite_hash}")
-                            updates = await client(ImportChatInviteRequest(invite_hash))
-                            # После успешного присоединения получаем диалоги заново
-                            await client.get_dialogs()
-                        except UserAlreadyParticipantError:
-                            app_logger.debug(f"Уже участник канала с хэшем {invite_hash}")
-                        except Exception as e:
-                            # Если ссылка-приглашение истекла/недействительна, деактивируем канал
-                            if "expired" in str(e).lower() or "invalid" in str(e).lower():
-                                app_logger.error(f"Ссылка-приглашение для канала {channel.channel_title} недействительна: {e}")
-                                # Деактивируем канал
-                                channel.is_active = False
-                                await self.session.commit()
-                                app_logger.info(f"Канал {channel.channel_title} автоматически деактивирован из-за недействительной ссылки")
-                            else:
-                                app_logger.error(f"Ошибка при подключении к каналу {channel.channel_title}: {e}")
-                    
-                    # Для публичных каналов пробуем несколько способов получения
-                    try:
-                        # Сначала стандартный способ
-                        peer = await client.get_entity(channel.channel_username)
-                        app_logger.debug(f"Канал получен по юзернейму: {channel.channel_username}")
-                    except Exception as e:
-                        app_logger.debug(f"Не удалось получить канал стандартным способом: {e}")
-                        
-                        # Пробуем через t.me/
-                        try:
-                            peer = await client.get_entity(f"t.me/{channel.channel_username}")
-                            app_logger.debug(f"Канал получен через t.me/: {channel.channel_username}")
-                        except Exception as e2:
-                            app_logger.debug(f"Не удалось получить канал через t.me/: {e2}")
-                            
-                            # Для публичных каналов не подписываемся, так как реакции и просмотры можно ставить без подписки
-                            app_logger.debug(f"Не пытаемся подписываться на публичный канал: {channel.channel_username}")
-                except Exception as e:
-                    app_logger.debug(f"Не удалось получить канал по юзернейму: {e}")
-            
-            # Если не удалось получить по юзернейму или его нет, пробуем искать в диалогах
-            if not peer:
-                try:
-                    dialogs = await client.get_dialogs()
-                    
-                    for dialog in dialogs:
-                        if hasattr(dialog.entity, 'id'):
-                            dialog_id = dialog.entity.id
-                            # Проверяем и по чистому ID и по полному ID
-                            if dialog_id == channel_id or dialog_id == abs(orig_channel_id):
-                                peer = dialog.entity
-                                app_logger.info(f"Канал найден в диалогах: {dialog_id}")
-                                break
-                except Exception as e:
-                    app_logger.error(f"Ошибка при поиске в диалогах: {e}")
-            
-            # Если не нашли канал, пробуем другие способы
             if not peer:
-                try:
-                    # Пробуем через PeerChannel с правильным ID
-                    app_logger.debug(f"Пробуем получить через PeerChannel({channel_id})")
-                    peer = await client.get_entity(PeerChannel(channel_id))
-                    app_logger.info(f"Канал успешно получен через PeerChannel({channel_id})")
-                except Exception as e:
-                    app_logger.debug(f"Не удалось получить через PeerChannel: {e}")
-                    
-                    # Пробуем через t.me/c/ID
-                    try:
-                        app_logger.debug(f"Пробуем получить канал по ссылке t.me/c/{channel_id}")
-                        peer = await client.get_entity(f"t.me/c/{channel_id}")
-                        app_logger.info(f"Канал получен через t.me/c/{channel_id}")
-                    except Exception as e:
-                        app_logger.debug(f"Не удалось получить канал через t.me/c/: {e}")
-                        
-                        # Попытка получить через GetFullChannelRequest
-                        try:
-                            app_logger.debug(f"Пробуем получить через GetFullChannelRequest({channel_id})")
-                            result = await client(GetFullChannelRequest(channel=PeerChannel(channel_id=channel_id)))
-                            if result and result.chats:
-                                peer = result.chats[0]
-                                app_logger.info(f"Канал получен через GetFullChannelRequest: {channel_id}")
-                        except Exception as e:
-                            app_logger.debug(f"Не удалось получить через GetFullChannelRequest: {e}")
-            
-            # Если все попытки не удались, выходим и деактивируем канал
+                with tracer.span("resolve", channel=channel.id):
+                    peer, failure_class = await self._resolve_peer(channel, client, state, channel_id)
+
+            # Если все попытки не удались, учитываем ошибку в предохранителе канала
             if not peer:
-                app_logger.warning(f"Не удалось найти канал {orig_channel_id}")
-                # Если не удалось найти канал после всех попыток, деактивируем его
-                channel.is_active = False
-                await self.session.commit()
-                app_logger.info(f"Канал {channel.channel_title} автоматически деактивирован, так как не удалось его найти")
+                app_logger.warning("Не удалось найти канал %s", orig_channel_id)
+                await self._record_channel_failure(
+                    channel, failure_class or "not_found",
+                    "недействительная ссылка" if failure_class else "не удалось найти канал"
+                )
                 return []
+            channel_breakers.record_success(channel.id)
+            self.resolved_peers[channel.id] = peer
+            if state is not None:
+                # Запоминаем access_hash: в следующий раз канал не нужно искать
+                access_hash = getattr(peer, "access_hash", None)
+                if access_hash and state.access_hash != access_hash:
+                    state.access_hash = access_hash
+                    await self.session.commit()
+
+            if state is not None:
+                # Аккаунт получает только посты новее своего курсора
+                if state.last_message_id:
+                    new_post_ids = await self._scan_after_cursor(channel, client, peer, state)
+                    if new_post_ids:
+                        POSTS_DISCOVERED.inc(value=len(new_post_ids))
+                        app_logger.info("Найдено %s новых сообщений в канале %s", len(new_post_ids), channel.channel_title)
+                    return new_post_ids
             
-            # Получаем сообщения
-            app_logger.debug(f"Получаем сообщения из канала {orig_channel_id}")
-            messages = await client.get_messages(peer, limit=20)  # Увеличиваем лимит сообщений
+            # Получаем сообщения (сырым запросом, без построения высокоуровневых сообщений Telethon)
+            app_logger.debug("Получаем сообщения из канала %s", orig_channel_id)
+            with tracer.span("fetch", channel=channel.id):
+                history = await client(GetHistoryRequest(
+                    peer=peer,
+                    offset_id=0,
+                    offset_date=None,
+                    add_offset=0,
+                    limit=FIRST_CHECK_POSTS,
+                    max_id=0,
+                    min_id=0,
+                    hash=0
+                ))
+            messages = [message for message in history.messages if not isinstance(message, MessageEmpty)]
+            scan = self.scans[channel.id] = PostScan.from_messages(messages)
+            poll_scheduler.observe(channel.id, account_id, scan.posts())
             
             # Получаем время последней проверки канала
             check_time = channel.last_checked.replace(tzinfo=UTC)
@@ -344,7 +608,8 @@ class ChannelManager:
                             AccountReaction.channel_id == channel.id,
                             AccountReaction.post_id == message.id
                         )
-                        result = await self.session.execute(query)
+                        with tracer.span("dedup", channel=channel.id, post=message.id):
+                            result = await self.session.execute(query)
                         existing_reaction = result.scalar_one_or_none()
                         
                         # Также проверяем, не достигнут ли максимум реакций для этого поста
@@ -353,7 +618,8 @@ class ChannelManager:
                             AccountReaction.post_id == message.id,
                             AccountReaction.reaction == "__max_reactions__"
                         )
-                        max_reactions_result = await self.session.execute(max_reactions_query)
+                        with tracer.span("dedup", channel=channel.id, post=message.id):
+                            max_reactions_result = await self.session.execute(max_reactions_query)
                         max_reactions_record = max_reactions_result.scalar_one_or_none()
                         
                         # Если реакции от этого аккаунта еще нет и пост не имеет макс. количество реакций
@@ -368,12 +634,24 @@ class ChannelManager:
             if not account_id:  # Обновляем только если это общая проверка, а не для конкретного аккаунта
                 channel.last_checked = datetime.now(UTC)
                 await self.session.commit()
+            elif messages:
+                # Первая проверка канала аккаунтом: дальше он получает только посты новее курсора
+                self.pending_cursors[channel.id] = (max(scan.ids), getattr(history, "pts", None))
             
             if new_post_ids:  # Логируем только если есть новые сообщения
-                app_logger.info(f"Найдено {len(new_post_ids)} новых сообщений в канале {channel.channel_title}")
+                POSTS_DISCOVERED.inc(value=len(new_post_ids))
+                app_logger.info("Найдено %s новых сообщений в канале %s", len(new_post_ids), channel.channel_title)
             return new_post_ids
         except Exception as e:
-            app_logger.error(f"Ошибка при проверке постов канала {channel.channel_title}: {e}")
+            app_logger.error("Ошибка при проверке постов канала %s: %s", channel.channel_title, e)
+            if state is not None and classify_error(e) in ("private", "invite_invalid"):
+                # Аккаунт больше не участник канала или access_hash устарел: найдем канал заново
+                state.is_member = False
+                state.access_hash = None
+            try:
+                await self._record_channel_failure(channel, classify_error(e), str(e))
+            except Exception as record_error:
+                app_logger.error("Ошибка при деактивации канала %s: %s", channel.channel_title, record_error)
             # Если канал деактивирован или недоступен, не нужно пытаться работать с ним
             if not channel.is_active:
                 return []
@@ -382,212 +660,257 @@ class ChannelManager:
                 channel.last_checked = datetime.now(UTC)
                 await self.session.commit()
             except Exception as commit_error:
-                app_logger.error(f"Ошибка при обновлении времени проверки: {commit_error}")
+                app_logger.error("Ошибка при обновлении времени проверки: %s", commit_error)
             return []
 
-    async def set_reaction(self, client: TelegramClient, channel_id: int, post_id: int, reaction: str) -> bool:
+    async def _resolve_peer(self, channel: UserChannel, client: TelegramClient,
+                            state: Optional[AccountChannelState], channel_id: int) -> tuple:
         """
-        Устанавливает реакцию на пост в канале.
-        
-        Args:
-            client: Telethon клиент
-            channel_id: ID канала (может быть с префиксом -100)
-            post_id: ID поста
-            reaction: Эмодзи реакции
-            
-        Returns:
-            bool: Успешно ли установлена реакция
+        Ищет канал, для которого у аккаунта нет access_hash: по приглашению, по юзернейму,
+        по ID. Возвращает (канал или None, класс ошибки подключения или None).
         """
-        try:
-            # Сначала проверяем, существует ли сообщение
+        peer = None
+        failure_class = None
+        # Сначала проверяем, можно ли получить канал по username
+        if channel.channel_username and channel.channel_username.strip():
             try:
-                msg = await client.get_messages(
-                    entity=channel_id,
-                    ids=post_id
-                )
-                
-                if not msg or not isinstance(msg, list) and not msg:
-                    app_logger.warning(f"Сообщение {post_id} не найдено в канале {channel_id}")
-                    return False
-                
-                if isinstance(msg, list):
-                    if not msg:
-                        app_logger.warning(f"Сообщение {post_id} не найдено в канале {channel_id}")
-                        return False
-                    msg = msg[0]
+                # Если это ссылка-приглашение (начинается с +)
+                if channel.channel_username.startswith('+'):
+                    invite_hash = channel.channel_username[1:]
+                    try:
+                        # Участник канала получает его по приглашению, остальные вступают в канал
+                        if state is not None and state.is_member:
+                            peer = await self.resolve_invite(client, invite_hash)
+                        if not peer:
+                            app_logger.debug("Присоединяемся к каналу по хэшу: %s", invite_hash)
+                            peer = await self.join_by_invite(client, invite_hash)
+                        if state is not None:
+                            state.is_member = True
+                    except Exception as e:
+                        # Недействительная ссылка может быть временной ошибкой: решение
+                        # о деактивации принимает предохранитель канала
+                        if classify_error(e) == "invite_invalid":
+                            app_logger.error("Ссылка-приглашение для канала %s недействительна: %s", channel.channel_title, e)
+                            failure_class = "invite_invalid"
+                        else:
+                            app_logger.error("Ошибка при подключении к каналу %s: %s", channel.channel_title, e)
+
+                # Для публичных каналов пробуем несколько способов получения
+                if not peer:
+                    try:
+                        # Сначала стандартный способ
+                        peer = await client.get_entity(channel.channel_username)
+                        app_logger.debug("Канал получен по юзернейму: %s", channel.channel_username)
+                    except Exception as e:
+                        app_logger.debug("Не удалось получить канал стандартным способом: %s", e)
+
+                        # Пробуем через t.me/
+                        try:
+                            peer = await client.get_entity(f"t.me/{channel.channel_username}")
+                            app_logger.debug("Канал получен через t.me/: %s", channel.channel_username)
+                        except Exception as e2:
+                            app_logger.debug("Не удалось получить канал через t.me/: %s", e2)
+
+                            # Для публичных каналов не подписываемся, так как реакции и просмотры можно ставить без подписки
+                            app_logger.debug("Не пытаемся подписываться на публичный канал: %s", channel.channel_username)
             except Exception as e:
-                app_logger.error(f"Ошибка при проверке существования сообщения {post_id} в канале {channel_id}: {e}")
-                return False
-                
+                app_logger.debug("Не удалось получить канал по юзернейму: %s", e)
+
+        # Если не нашли канал, пробуем другие способы
+        if not peer:
             try:
-                await client(SendReactionRequest(
-                    peer=channel_id,
-                    msg_id=post_id,
-                    reaction=[ReactionEmoji(emoticon=reaction)]
-                ))
-                
-                app_logger.debug(f"Установлена реакция {reaction} на пост {post_id} в канале {channel_id}")
-                return True
+                # Пробуем через PeerChannel с правильным ID
+                app_logger.debug("Пробуем получить через PeerChannel(%s)", channel_id)
+                peer = await client.get_entity(PeerChannel(channel_id))
+                app_logger.info("Канал успешно получен через PeerChannel(%s)", channel_id)
             except Exception as e:
-                # Проверяем на ошибку с reactions_uniq_max
-                if "reactions_uniq_max" in str(e):
-                    app_logger.warning(f"Невозможно добавить новый тип эмодзи, достигнут лимит уникальных реакций для поста {post_id}")
-                    # Пост уже имеет максимальное количество различных типов реакций
-                    # Возвращаем True, чтобы не считать это ошибкой
-                    return True
-                else:
-                    app_logger.error(f"Ошибка при установке реакции: {e}")
-                    return False
-        except Exception as e:
-            app_logger.error(f"Ошибка при установке реакции {reaction} на пост {post_id} в канале {channel_id}: {e}")
-            return False
+                app_logger.debug("Не удалось получить через PeerChannel: %s", e)
 
-    async def process_channel_posts(self, channel: UserChannel, accounts: list) -> None:
-        # Проверяем, активен ли канал перед обработкой
-        if not channel.is_active:
-            app_logger.debug(f"Канал {channel.channel_title} неактивен, пропускаем его")
-            return
-            
-        # Проверяем существование канала в Telegram, прежде чем обрабатывать
-        try:
-            # Используем первый активный аккаунт для проверки
-            for account in accounts:
-                if account.is_active:
-                    global account_service
-                    if account_service:
-                        try:
-                            session_str = await account_service.decrypt_session(account.session)
-                            async with TelegramClient(
-                                f'temp_session_{channel.id}',
-                                API_ID,
-                                API_HASH
-                            ) as test_client:
-                                try:
-                                    # Пытаемся получить информацию о канале
-                                    if str(channel.channel_id).startswith('-100'):
-                                        channel_id = int(str(abs(channel.channel_id))[3:])
-                                    else:
-                                        channel_id = abs(channel.channel_id)
-                                        
-                                    try:
-                                        entity = await test_client.get_entity(channel.channel_username or channel_id)
-                                        # Если удалось получить сущность, канал существует
-                                        break
-                                    except Exception as e:
-                                        # Проверяем, является ли ошибка признаком удаленного/недоступного канала
-                                        if "not found" in str(e).lower() or "private" in str(e).lower() or "access" in str(e).lower():
-                                            app_logger.warning(f"Канал {channel.channel_title} недоступен: {e}")
-                                            # Деактивируем канал, если он недоступен
-                                            channel.is_active = False
-                                            await self.session.commit()
-                                            app_logger.info(f"Канал {channel.channel_title} автоматически деактивирован из-за недоступности")
-                                            return
-                                except Exception as e:
-                                    app_logger.debug(f"Ошибка при проверке канала с аккаунтом {account.phone}: {e}")
-                        except Exception as e:
-                            app_logger.debug(f"Ошибка при расшифровке сессии аккаунта {account.phone}: {e}")
-            
-        except Exception as e:
-            app_logger.error(f"Ошибка при проверке доступности канала {channel.channel_title}: {e}")
-            return
-            
-        # Получаем доступные реакции канала
-        available_reactions, user_reactions = await self.get_channel_reactions(channel.id)
-        
-        # Если пользователь выбрал свои реакции, используем их, иначе доступные
-        reactions_to_use = user_reactions if user_reactions else available_reactions
-        
-        if not reactions_to_use:
-            app_logger.warning(f"Нет доступных реакций для канала {channel.id}")
-            return
-            
-        # Перемешиваем список аккаунтов для более случайного распределения реакций
-        shuffled_accounts = list(accounts)
-        random.shuffle(shuffled_accounts)
-        
-        # Счетчик для контроля числа реакций для всех постов
-        post_reaction_counts = {}
-        
-        # Проходим по всем активным аккаунтам
-        for account in shuffled_accounts:
-            if not account.is_active:
-                continue
-                
-            async with TelegramClient(
-                f'sessions/{account.phone}',
-                API_ID,
-                API_HASH
-            ) as client:
+                # Пробуем через t.me/c/ID
                 try:
-                    # Получаем новые посты, учитывая, что данный аккаунт еще не ставил на них реакции
-                    new_posts = await self.check_new_posts(channel, client, account.id)
-                    
-                    # Если нет новых постов - пропускаем
-                    if not new_posts:
-                        continue
-                    
-                    # Для каждого нового поста
-                    for post_id in new_posts:
-                        # Получаем правильный ID канала без префикса -100
-                        orig_channel_id = channel.channel_id
-                        if str(orig_channel_id).startswith('-100'):
-                            channel_id = int(str(abs(orig_channel_id))[3:])
-                        else:
-                            channel_id = abs(orig_channel_id)
-                            
-                        # Инициализируем счетчик для данного поста, если его еще нет
-                        if post_id not in post_reaction_counts:
-                            # Проверяем текущее количество реакций для этого поста
-                            query = select(AccountReaction).where(
-                                AccountReaction.channel_id == channel.id,
-                                AccountReaction.post_id == post_id
-                            )
-                            result = await self.session.execute(query)
-                            existing_reactions = result.scalars().all()
-                            post_reaction_counts[post_id] = len(existing_reactions)
-                            
-                        # Проверяем, не превышено ли максимальное количество реакций
-                        if post_reaction_counts[post_id] >= channel.max_reactions:
-                            app_logger.info(f"Достигнут лимит реакций ({channel.max_reactions}) для поста {post_id}")
-                            continue
-                            
-                        # Выбираем случайную реакцию
-                        cur_reaction = random.choice(reactions_to_use)
-                        
-                        try:
-                            # Получаем entity канала
-                            channel_entity = await client.get_entity(PeerChannel(channel_id))
-                            
-                            # Отправляем реакцию
-                            await client(SendReactionRequest(
-                                peer=channel_entity,
-                                msg_id=post_id,
-                                reaction=[ReactionEmoji(emoticon=cur_reaction)]
-                            ))
-                            
-                            app_logger.info(f"Установлена реакция {cur_reaction} на пост {post_id} в канале {orig_channel_id} (аккаунт {account.phone})")
-                            
-                            # Сохраняем информацию о реакции
-                            reaction = AccountReaction(
-                                account_id=account.id,
-                                channel_id=channel.id,
-                                post_id=post_id,
-                                reaction=cur_reaction
-                            )
-                            self.session.add(reaction)
-                            await self.session.commit()
-                            
-                            # Увеличиваем счетчик реакций для этого поста
-                            post_reaction_counts[post_id] += 1
-                            
-                        except Exception as e:
-                            app_logger.error(f"Ошибка при установке реакции: {e}")
-                            
-                        # Задержка между реакциями
-                        await asyncio.sleep(5)
+                    app_logger.debug("Пробуем получить канал по ссылке t.me/c/%s", channel_id)
+                    peer = await client.get_entity(f"t.me/c/{channel_id}")
+                    app_logger.info("Канал получен через t.me/c/%s", channel_id)
                 except Exception as e:
-                    app_logger.error(f"Ошибка обработки канала {channel.id}: {e}")
-                    continue
+                    app_logger.debug("Не удалось получить канал через t.me/c/: %s", e)
+
+                    # Попытка получить через GetFullChannelRequest
+                    try:
+                        app_logger.debug("Пробуем получить через GetFullChannelRequest(%s)", channel_id)
+                        result = await client(GetFullChannelRequest(channel=PeerChannel(channel_id=channel_id)))
+                        if result and result.chats:
+                            peer = result.chats[0]
+                            app_logger.info("Канал получен через GetFullChannelRequest: %s", channel_id)
+                    except Exception as e:
+                        app_logger.debug("Не удалось получить через GetFullChannelRequest: %s", e)
+        return peer, failure_class
+
+    async def get_channel_state(self, account_id: int, channel_id: int) -> AccountChannelState:
+        """Состояние канала для аккаунта (создается при первом обращении)"""
+        state = await self.session.get(AccountChannelState, (account_id, channel_id))
+        if state is None:
+            state = AccountChannelState(account_id=account_id, channel_id=channel_id, last_message_id=0)
+            self.session.add(state)
+        return state
+
+    async def get_channel_states(self, account_id: int, channel_ids: List[int]) -> Dict[int, AccountChannelState]:
+        """Состояния каналов аккаунта одним запросом: UserChannel.id -> состояние"""
+        if not channel_ids:
+            return {}
+        result = await self.session.execute(
+            select(AccountChannelState).where(
+                AccountChannelState.account_id == account_id,
+                AccountChannelState.channel_id.in_(channel_ids)
+            )
+        )
+        return {state.channel_id: state for state in result.scalars().all()}
+
+    async def probe_channels(self, client: TelegramClient, account_id: int,
+                             peers: Dict[int, InputPeerChannel]) -> set:
+        """
+        Проверяет, появились ли в каналах посты новее курсора аккаунта: GetPeerDialogsRequest
+        возвращает top_message сразу для PEER_DIALOGS_BATCH каналов.
+
+        Args:
+            peers: UserChannel.id -> ссылка на канал
+
+        Returns:
+            Множество UserChannel.id каналов без новых постов. Каналы, которых нет среди
+            диалогов аккаунта (например, публичные без подписки), проверяются как обычно.
+        """
+        states = await self.get_channel_states(account_id, list(peers))
+        # Сравнивать есть с чем только у каналов, которые аккаунт уже проверял
+        probed = {
+            peer.channel_id: channel_id for channel_id, peer in peers.items()
+            if channel_id in states and states[channel_id].last_message_id
+        }
+        unchanged = set()
+        items = list(probed.items())
+        for start in range(0, len(items), PEER_DIALOGS_BATCH):
+            chunk = items[start:start + PEER_DIALOGS_BATCH]
+            result = await client(GetPeerDialogsRequest(
+                peers=[InputDialogPeer(peer=peers[channel_id]) for _, channel_id in chunk]
+            ))
+            for dialog in result.dialogs:
+                channel_id = probed.get(getattr(dialog.peer, "channel_id", None))
+                if channel_id is not None and dialog.top_message <= states[channel_id].last_message_id:
+                    unchanged.add(channel_id)
+        return unchanged
+
+    async def _scan_after_cursor(self, channel: UserChannel, client: TelegramClient, peer,
+                                 state: AccountChannelState) -> list[int]:
+        """
+        Получает посты новее курсора аккаунта. Если известен pts канала, используется
+        GetChannelDifferenceRequest (ровно новые сообщения с прошлой синхронизации),
+        иначе и при слишком большом отставании - история канала с min_id.
+        Новый курсор сохраняется в commit_scan после обработки постов.
+        """
+        messages = None
+        pts = state.pts
+        with tracer.span("fetch", channel=channel.id):
+            if pts:
+                messages, pts = await self._fetch_difference(channel, client, peer, pts)
+            if messages is None:
+                messages, pts = await self._fetch_history(channel, client, peer, state.last_message_id)
+        scan = self.scans[channel.id] = PostScan.from_messages(
+            message for message in messages if message.id > state.last_message_id
+        )
+
+        poll_scheduler.observe(channel.id, state.account_id, scan.posts())
+        self.pending_cursors[channel.id] = (max(scan.ids) if scan else state.last_message_id, pts)
+        return sorted(scan.ids, reverse=True)
+
+    async def commit_scan(self, account_id: int, channel_id: int, unprocessed: Iterable[int] = ()) -> None:
+        """
+        Сохраняет курсор аккаунта после обработки постов последней проверки канала.
+        Если часть постов не обработана (отброшена при перегрузке, реакция не удалась),
+        курсор останавливается перед самым старым из них, а pts сбрасывается: следующая
+        проверка прочитает эти посты из истории заново (повторных реакций не будет -
+        они отсекаются по AccountReaction).
+        """
+        pending = self.pending_cursors.pop(channel_id, None)
+        if pending is None:
+            return
+        last_message_id, pts = pending
+        state = await self.get_channel_state(account_id, channel_id)
+        unprocessed = [post_id for post_id in unprocessed if post_id > state.last_message_id]
+        if unprocessed:
+            last_message_id, pts = min(unprocessed) - 1, None
+        if last_message_id > state.last_message_id or pts != state.pts:
+            state.last_message_id = max(last_message_id, state.last_message_id)
+            state.pts = pts
+            await self.session.commit()
+
+    async def _fetch_difference(self, channel: UserChannel, client: TelegramClient, peer,
+                                pts: int) -> tuple[Optional[list], Optional[int]]:
+        """
+        Новые сообщения канала с момента pts и новый pts.
+        (None, None) - разница недоступна и посты нужно получить из истории.
+        """
+        messages = []
+        for _ in range(HISTORY_MAX_PAGES):
+            try:
+                difference = await client(GetChannelDifferenceRequest(
+                    channel=peer,
+                    filter=ChannelMessagesFilterEmpty(),
+                    pts=pts,
+                    limit=DIFFERENCE_LIMIT,
+                    force=False
+                ))
+            except FloodWaitError:
+                raise
+            except RPCError as e:
+                # Например, устаревший pts: синхронизируемся заново через историю
+                app_logger.warning("Не удалось получить разницу канала %s: %s", channel.channel_title, e)
+                return None, None
+            if isinstance(difference, ChannelDifferenceTooLong):
+                app_logger.info("Отставание в канале %s слишком большое, читаем историю", channel.channel_title)
+                return None, None
+            pts = difference.pts
+            if isinstance(difference, ChannelDifference):
+                messages.extend(difference.new_messages)
+            if difference.final:
+                return messages, pts
+        app_logger.warning(
+            "Разница канала %s не получена полностью за %s запросов, продолжим в следующей проверке",
+            channel.channel_title, HISTORY_MAX_PAGES
+        )
+        return messages, pts
+
+    async def _fetch_history(self, channel: UserChannel, client: TelegramClient, peer,
+                             min_id: int) -> tuple[list, Optional[int]]:
+        """
+        Сообщения новее min_id из истории канала (GetHistoryRequest с min_id), при большом
+        отставании - постранично, не больше HISTORY_MAX_PAGES страниц. Возвращает их и pts канала.
+        """
+        pts = None
+        messages = []
+        offset_id = 0
+        for page_number in range(HISTORY_MAX_PAGES):
+            history = await client(GetHistoryRequest(
+                peer=peer,
+                offset_id=offset_id,
+                offset_date=None,
+                add_offset=0,
+                limit=HISTORY_PAGE_SIZE,
+                max_id=0,
+                min_id=min_id,
+                hash=0
+            ))
+            if page_number == 0 and getattr(history, "pts", None):
+                # pts на момент первой страницы: более новые сообщения вернет GetChannelDifferenceRequest
+                pts = history.pts
+            page = [message for message in history.messages if message.id > min_id]
+            messages.extend(page)
+            if len(history.messages) < HISTORY_PAGE_SIZE or not page:
+                break
+            offset_id = min(message.id for message in page)
+        else:
+            app_logger.warning(
+                "В канале %s больше %s новых постов, более старые пропущены",
+                channel.channel_title, HISTORY_PAGE_SIZE * HISTORY_MAX_PAGES
+            )
+        return messages, pts
 
     async def search_channels(self, query: str) -> List[UserChannel]:
         """Ищет каналы по названию или юзернейму"""
@@ -602,5 +925,5 @@ class ChannelManager:
             )
             return result.scalars().all()
         except Exception as e:
-            app_logger.error(f"Ошибка при поиске каналов: {e}")
+            app_logger.error("Ошибка при поиске каналов: %s", e)
             return [] 
\ No newline at end of file
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import sys
+from typing import AsyncIterator, Dict, List, Optional
+
+from config_data.config import BASE_DIR, ENGINE_SOCKET, ENGINE_RESTART_DELAY
+from loader import app_logger, bot
+from services import change_feed as changes
+from services.change_feed import change_feed
+from services.channel_manager import invalidate_channel_caches
+from services.metrics import metrics
+
+
+def partition_of(user_id: int, workers: int) -> int:
+    """
+    Воркер, которому принадлежат аккаунты пользователя. Аккаунты делятся по пользователю,
+    а не по аккаунту: передача постов между аккаунтами, карантин и предохранители каналов
+    живут в памяти процесса и должны видеть все аккаунты пользователя.
+    """
+    return int(user_id) % workers
+
+
+async def send_message(writer: asyncio.StreamWriter, message: dict):
+    """Отправляет сообщение: одна строка JSON"""
+    writer.write(json.dumps(message, ensure_ascii=False).encode() + b"\n")
+    await writer.drain()
+
+
+async def read_messages(reader: asyncio.StreamReader) -> AsyncIterator[dict]:
+    """Читает сообщения до закрытия соединения"""
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            app_logger.error("Некорректное сообщение IPC: %r", line[:200])
+
+
+def change_to_message(change) -> dict:
+    return {
+        "type": "change",
+        **{name: getattr(change, name) for name in change.__slots__ if name not in ("version", "origin")}
+    }
+
+
+def message_to_fields(message: dict) -> dict:
+    """Поля изменения из сообщения "change" (кроме вида и пользователя)"""
+    return {key: value for key, value in message.items() if key not in ("type", "kind", "user_id")}
+
+
+class EngineSupervisor:
+    """
+    Процесс бота при ENGINE_WORKERS > 0: запускает воркеры движка активности
+    (engine_worker.py), пересылает им изменения из ленты изменений и принимает от них
+    метрики, уведомления пользователям и изменения, сделанные самими воркерами
+    (деактивация канала и т.п.). Упавший воркер перезапускается.
+    """
+
+    def __init__(self, workers: int, socket_path: str = ENGINE_SOCKET):
+        self.workers = workers
+        self.socket_path = socket_path
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.writers: Dict[int, asyncio.StreamWriter] = {}
+        self.processes: Dict[int, asyncio.subprocess.Process] = {}
+        self.tasks: List[asyncio.Task] = []
+        self.stopping = False
+
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self.server = await asyncio.start_unix_server(self._handle_worker, path=self.socket_path)
+        queue = change_feed.subscribe()
+        self.tasks.append(asyncio.create_task(self._forward_changes(queue)))
+        for index in range(self.workers):
+            self.tasks.append(asyncio.create_task(self._run_worker(index)))
+        app_logger.info("Запущено воркеров движка активности: %s", self.workers)
+
+    async def stop(self):
+        self.stopping = True
+        for writer in list(self.writers.values()):
+            try:
+                await send_message(writer, {"type": "stop"})
+            except Exception:
+                pass
+        for process in self.processes.values():
+            try:
+                await asyncio.wait_for(process.wait(), 30)
+            except asyncio.TimeoutError:
+                process.kill()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    async def _run_worker(self, index: int):
+        """Запускает воркер и перезапускает его, если он завершился не по команде"""
+        env = dict(os.environ, LOG_FILE=f"engine-{index}.log")
+        while not self.stopping:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, os.path.join(BASE_DIR, "engine_worker.py"),
+                "--index", str(index), "--workers", str(self.workers), "--socket", self.socket_path,
+                cwd=BASE_DIR, env=env
+            )
+            self.processes[index] = process
+            code = await process.wait()
+            self.writers.pop(index, None)
+            metrics.remote.pop(str(index), None)
+            if self.stopping:
+                break
+            app_logger.error("Воркер движка %s завершился с кодом %s, перезапуск через %s сек",
+                             index, code, ENGINE_RESTART_DELAY)
+            await asyncio.sleep(ENGINE_RESTART_DELAY)
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        index = None
+        try:
+            async for message in read_messages(reader):
+                kind = message.get("type")
+                if kind == "hello":
+                    index = message["worker"]
+                    self.writers[index] = writer
+                    app_logger.info("Воркер движка %s подключен (pid %s)", index, message.get("pid"))
+                elif kind == "metrics":
+                    metrics.merge_remote(str(message["worker"]), message["metrics"])
+                elif kind == "notify":
+                    try:
+                        await bot.send_message(message["user_id"], message["text"])
+                    except Exception as e:
+                        app_logger.error("Ошибка отправки уведомления от воркера движка: %s", e)
+                elif kind == "change":
+                    await self._apply_worker_change(index, message)
+        finally:
+            if index is not None and self.writers.get(index) is writer:
+                del self.writers[index]
+            writer.close()
+
+    @staticmethod
+    async def _apply_worker_change(index: Optional[int], message: dict):
+        """
+        Изменение, сделанное воркером: сбрасывает кэши бота и публикует изменение
+        в ленту процесса бота (обратно воркеру оно не пересылается)
+        """
+        try:
+            if message["kind"] in (changes.CHANNEL_ADDED, changes.CHANNEL_UPDATED, changes.CHANNEL_DELETED):
+                await invalidate_channel_caches(message["user_id"], message.get("channel_id"))
+            change_feed.publish(message["kind"], message["user_id"], origin=f"worker-{index}",
+                                **message_to_fields(message))
+        except Exception as e:
+            app_logger.error("Ошибка применения изменения от воркера движка %s: %s", index, e)
+
+    async def _forward_changes(self, queue: asyncio.Queue):
+        """Пересылает изменения аккаунтов и каналов воркеру, которому принадлежит пользователь"""
+        try:
+            while True:
+                change = await queue.get()
+                if change.origin is not None:
+                    # Изменение пришло от воркера - он его уже применил
+                    continue
+                writer = self.writers.get(partition_of(change.user_id, self.workers))
+                if writer is None:
+                    # Воркер перезапускается - после подключения он сверится с базой сам
+                    continue
+                try:
+                    await send_message(writer, change_to_message(change))
+                except Exception as e:
+                    app_logger.error("Ошибка отправки изменения воркеру движка: %s", e)
+        finally:
+            change_feed.unsubscribe(queue)
@@ -0,0 +1,115 @@
+import random
+from typing import Dict
+
+from config_data.config import (
+    CHECK_INTERVAL_MIN,
+    CHECK_INTERVAL_MAX,
+    HEALTH_MIN_INTERVAL,
+    HEALTH_MAX_INTERVAL,
+    HEALTH_SCORE_ALPHA
+)
+from services.metrics import ACCOUNT_HEALTH
+
+
+class CycleReport:
+    """Итоги одного цикла активности аккаунта: запросы к API, ошибки и полезная работа"""
+    __slots__ = ("requests", "errors", "flood_waits", "flood_seconds", "timeouts", "reactions", "views", "failed")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.flood_waits = 0
+        self.flood_seconds = 0   # Самый долгий FloodWait за цикл, сек
+        self.timeouts = 0
+        self.reactions = 0
+        self.views = 0
+        self.failed = False      # Цикл не выполнен (не удалось подключиться, исключение)
+
+    def record_request(self, outcome: str, flood_seconds: int = 0):
+        """Учитывает результат запроса к API (outcome - как в метрике tg_rpc_requests_total)"""
+        self.requests += 1
+        if outcome == "flood_wait":
+            self.flood_waits += 1
+            self.flood_seconds = max(self.flood_seconds, flood_seconds)
+        elif outcome == "timeout":
+            self.timeouts += 1
+        elif outcome != "ok":
+            self.errors += 1
+
+    @property
+    def work_done(self) -> int:
+        return self.reactions + self.views
+
+    @property
+    def error_ratio(self) -> float:
+        if not self.requests:
+            return 0.0
+        return (self.errors + self.timeouts + self.flood_waits) / self.requests
+
+
+class AccountHealth:
+    """
+    Здоровье аккаунта по последним циклам.
+
+    score - экспоненциальное скользящее среднее успешности циклов (1 - все запросы успешны,
+    0 - цикл провален). Неудачные циклы подряд увеличивают интервал экспоненциально,
+    циклы с найденной работой подряд - сокращают его.
+    """
+
+    def __init__(self):
+        self.score = 1.0
+        self.failures = 0      # Неудачных циклов подряд
+        self.busy_streak = 0   # Циклов с полезной работой подряд
+        self.flood_seconds = 0
+
+    def update(self, report: CycleReport):
+        if report.failed:
+            cycle_score = 0.0
+        else:
+            cycle_score = max(0.0, 1.0 - report.error_ratio - (0.5 if report.flood_waits else 0.0))
+        self.score += HEALTH_SCORE_ALPHA * (cycle_score - self.score)
+        self.flood_seconds = report.flood_seconds
+
+        if report.failed or report.flood_waits or report.error_ratio > 0.5:
+            self.failures += 1
+            self.busy_streak = 0
+        else:
+            self.failures = 0
+            self.busy_streak = self.busy_streak + 1 if report.work_done else 0
+
+    def next_interval(self) -> int:
+        """Интервал до следующего цикла, сек"""
+        if self.failures:
+            # Экспоненциальная задержка, но не меньше последнего FloodWait
+            interval = max(CHECK_INTERVAL_MAX * 2 ** (self.failures - 1), self.flood_seconds)
+        elif self.busy_streak:
+            # Аккаунт находит работу - проверяем чаще
+            interval = random.randint(CHECK_INTERVAL_MIN, CHECK_INTERVAL_MAX) / 2 ** min(self.busy_streak, 4)
+        else:
+            interval = random.randint(CHECK_INTERVAL_MIN, CHECK_INTERVAL_MAX)
+        # Чем хуже здоровье, тем реже проверки
+        interval /= max(self.score, 0.25)
+        return int(min(max(interval, HEALTH_MIN_INTERVAL), HEALTH_MAX_INTERVAL))
+
+
+class HealthTracker:
+    """Здоровье всех аккаунтов, для которых запущен цикл активности"""
+
+    def __init__(self):
+        self.accounts: Dict[int, AccountHealth] = {}
+
+    def get(self, account_id: int) -> AccountHealth:
+        health = self.accounts.get(account_id)
+        if health is None:
+            health = self.accounts[account_id] = AccountHealth()
+        return health
+
+    def record(self, account_id: int, report: CycleReport) -> AccountHealth:
+        health = self.get(account_id)
+        health.update(report)
+        ACCOUNT_HEALTH.set(str(account_id), value=health.score)
+        return health
+
+    def forget(self, account_id: int):
+        self.accounts.pop(account_id, None)
+        ACCOUNT_HEALTH.values.pop((str(account_id),), None)
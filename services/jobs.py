@@ -0,0 +1,188 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy import select
+
+from config_data.config import JOB_WORKERS, JOB_PROGRESS_INTERVAL
+from database.models import Job, async_session
+from loader import app_logger, bot
+
+
+class JobContext:
+    """Контекст выполняемой задачи: данные задачи и сообщение с прогрессом"""
+
+    def __init__(self, job: Job):
+        self.job_id = job.id
+        self.kind = job.kind
+        self.user_id = job.user_id
+        self.chat_id = job.chat_id
+        self.message_id = job.message_id
+        self.payload = job.payload or {}
+        self._last_progress = 0.0
+
+    async def progress(self, text: str, reply_markup: InlineKeyboardMarkup = None, force: bool = False):
+        """
+        Обновляет сообщение с прогрессом задачи.
+        Без force сообщение редактируется не чаще раза в JOB_PROGRESS_INTERVAL секунд.
+        """
+        now = asyncio.get_running_loop().time()
+        if not force and now - self._last_progress < JOB_PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+
+        try:
+            if self.message_id:
+                await bot.edit_message_text(
+                    text, chat_id=self.chat_id, message_id=self.message_id, reply_markup=reply_markup
+                )
+            else:
+                message = await bot.send_message(self.chat_id, text, reply_markup=reply_markup)
+                self.message_id = message.message_id
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                app_logger.warning("Не удалось обновить прогресс задачи %s: %s", self.job_id, e)
+
+        async with async_session() as session:
+            job = await session.get(Job, self.job_id)
+            if job:
+                job.progress = text
+                job.message_id = self.message_id
+                await session.commit()
+
+    async def save_payload(self, **fields):
+        """
+        Дополняет данные задачи и сохраняет их в базе: задача, перезапущенная после рестарта,
+        продолжит с сохраненного места
+        """
+        self.payload = {**self.payload, **fields}
+        async with async_session() as session:
+            job = await session.get(Job, self.job_id)
+            if job:
+                job.payload = self.payload
+                await session.commit()
+
+
+class JobRunner:
+    """
+    Фоновые задачи бота: очередь в памяти, записи о задачах в базе и пул воркеров.
+
+    Хендлер ставит задачу в очередь через enqueue() и сразу возвращается, а функция задачи,
+    зарегистрированная декоратором job(), выполняется воркером и сообщает о ходе работы
+    через JobContext.progress(). Незавершенные задачи перезапускаются при старте бота,
+    поэтому функции задач должны быть идемпотентными.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.handlers: Dict[str, Callable[[JobContext], Awaitable[None]]] = {}
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.worker_tasks: List[asyncio.Task] = []
+        self.pending_ids: Set[int] = set()  # Задачи в очереди или в работе
+
+    def job(self, kind: str):
+        """Декоратор для регистрации функции задачи"""
+        def decorator(func: Callable[[JobContext], Awaitable[None]]):
+            self.handlers[kind] = func
+            return func
+        return decorator
+
+    async def enqueue(self, kind: str, user_id: int, chat_id: int, payload: dict = None,
+                      message_id: Optional[int] = None, text: str = "⏳ Задача поставлена в очередь...") -> int:
+        """Создает задачу и ставит ее в очередь. Возвращает ID задачи"""
+        if kind not in self.handlers:
+            raise ValueError(f"Неизвестный тип задачи: {kind}")
+
+        if message_id:
+            await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id)
+        else:
+            message_id = (await bot.send_message(chat_id, text)).message_id
+
+        async with async_session() as session:
+            job = Job(
+                kind=kind,
+                user_id=user_id,
+                chat_id=chat_id,
+                message_id=message_id,
+                payload=payload,
+                status="queued",
+                progress=text
+            )
+            session.add(job)
+            await session.commit()
+            job_id = job.id
+
+        await self._put(job_id)
+        app_logger.info("Задача %s #%s поставлена в очередь (пользователь %s)", kind, job_id, user_id)
+        return job_id
+
+    async def start(self):
+        """Запускает воркеры и возвращает в очередь задачи, не завершенные до перезапуска"""
+        async with async_session() as session:
+            result = await session.execute(
+                select(Job.id).where(Job.status.in_(("queued", "running"))).order_by(Job.id)
+            )
+            pending = [job_id for job_id in result.scalars().all() if job_id not in self.pending_ids]
+        for job_id in pending:
+            await self._put(job_id)
+        if pending:
+            app_logger.info("Восстановлено %s незавершенных задач", len(pending))
+
+        for _ in range(self.workers):
+            self.worker_tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        """Останавливает воркеры (прерванные задачи будут перезапущены при следующем старте)"""
+        for task in self.worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+        self.worker_tasks.clear()
+
+    async def _put(self, job_id: int):
+        self.pending_ids.add(job_id)
+        await self.queue.put(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                app_logger.error("Ошибка воркера задач при выполнении задачи #%s: %s", job_id, e)
+            finally:
+                self.pending_ids.discard(job_id)
+                self.queue.task_done()
+
+    async def _run(self, job_id: int):
+        async with async_session() as session:
+            job = await session.get(Job, job_id)
+            if not job or job.status not in ("queued", "running"):
+                return
+            job.status = "running"
+            await session.commit()
+            context = JobContext(job)
+
+        handler = self.handlers.get(context.kind)
+        status, error = "done", None
+        try:
+            if handler is None:
+                raise ValueError(f"Неизвестный тип задачи: {context.kind}")
+            await handler(context)
+            app_logger.info("Задача %s #%s выполнена", context.kind, job_id)
+        except asyncio.CancelledError:
+            # Задача останется в статусе running и будет перезапущена при следующем старте
+            raise
+        except Exception as e:
+            status, error = "failed", str(e)
+            app_logger.error("Ошибка при выполнении задачи %s #%s: %s", context.kind, job_id, e)
+            await context.progress("❌ Произошла ошибка. Попробуйте позже", force=True)
+
+        async with async_session() as session:
+            job = await session.get(Job, job_id)
+            if job:
+                job.status = status
+                job.error = error
+                await session.commit()
@@ -0,0 +1,95 @@
+import asyncio
+from typing import Callable, Iterable, Optional
+
+from config_data.config import (
+    SHED_PROBE_INTERVAL,
+    SHED_LAG_THRESHOLDS,
+    SHED_CYCLE_BUDGET,
+    SHED_LAG_ALPHA
+)
+from loader import app_logger
+from services.metrics import ENGINE_LAG, SHED_LEVEL, SHED_SKIPPED
+
+# Работа, от которой движок отказывается на каждом уровне нагрузки (по возрастанию ценности)
+SHED_FEATURES = (
+    frozenset(),
+    frozenset({"saved_messages"}),
+    frozenset({"saved_messages", "presence", "views"}),
+    frozenset({"saved_messages", "presence", "views", "old_posts"}),
+)
+
+
+class LoadShedder:
+    """
+    Отслеживает отставание движка активности и отключает малоценную работу.
+
+    Отставание - максимум из трех величин: задержка цикла событий (пробная задача
+    просыпается позже, чем должна), самая большая просрочка запуска цикла аккаунта
+    (цикл должен был начаться, но еще не начался) и сглаженное превышение длительности
+    цикла над SHED_CYCLE_BUDGET. Уровень растет, когда отставание превышает порог
+    SHED_LAG_THRESHOLDS, и снижается, когда оно падает ниже половины порога.
+    Реакции на свежие посты не отключаются ни на одном уровне.
+    """
+
+    def __init__(self, runtimes: Callable[[], Iterable], interval: float = SHED_PROBE_INTERVAL):
+        self.runtimes = runtimes   # Состояния аккаунтов (AccountRuntime) для расчета просрочки
+        self.interval = interval
+        self.level = 0
+        self.loop_lag = 0.0
+        self.overrun = 0.0
+        self.lag = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def allows(self, feature: str) -> bool:
+        """Выполнять ли работу feature при текущей нагрузке"""
+        if feature in SHED_FEATURES[self.level]:
+            SHED_SKIPPED.inc(feature)
+            return False
+        return True
+
+    def observe_cycle(self, duration: float):
+        """Учитывает длительность завершенного цикла активности"""
+        self.overrun += SHED_LAG_ALPHA * (max(duration - SHED_CYCLE_BUDGET, 0.0) - self.overrun)
+
+    def overdue(self, now: float) -> float:
+        """Самая большая просрочка запуска цикла среди аккаунтов, сек"""
+        worst = 0.0
+        for runtime in self.runtimes():
+            # next_run_at сбрасывается в начале цикла, поэтому заданное значение в прошлом - это просрочка
+            next_run_at = runtime.next_run_at
+            if next_run_at is not None and now > next_run_at:
+                worst = max(worst, now - next_run_at)
+        return worst
+
+    async def _probe_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            self.loop_lag += SHED_LAG_ALPHA * (max(now - expected, 0.0) - self.loop_lag)
+            self.update(max(self.loop_lag, self.overdue(now), self.overrun))
+
+    def update(self, lag: float):
+        """Пересчитывает уровень по текущему отставанию (с гистерезисом)"""
+        self.lag = lag
+        level = self.level
+        while level < len(SHED_LAG_THRESHOLDS) and lag > SHED_LAG_THRESHOLDS[level]:
+            level += 1
+        while level > 0 and lag < SHED_LAG_THRESHOLDS[level - 1] / 2:
+            level -= 1
+        if level != self.level:
+            log = app_logger.warning if level > self.level else app_logger.info
+            log("Уровень сброса нагрузки %s -> %s (отставание %.1f сек)", self.level, level, lag)
+            self.level = level
+        ENGINE_LAG.set(value=lag)
+        SHED_LEVEL.set(value=level)
@@ -0,0 +1,263 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from aiohttp import web
+from sqlalchemy import event
+
+from services.quarantine import quarantine
+from services.tracing import tracer
+
+# Границы бакетов гистограмм по умолчанию, сек
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Монотонно растущий счетчик"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, value: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self, values: Dict[tuple, float] = None, extra: str = "") -> Iterable[str]:
+        """Строки метрики (values - значения другого процесса, extra - дополнительная метка)"""
+        for labels, value in (self.values if values is None else values).items():
+            yield f"{self.name}{_format_labels(self.labels, labels, extra)} {value}"
+
+
+class Gauge(Counter):
+    """Значение, которое может расти и уменьшаться; может вычисляться в момент сбора метрик"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self.functions: Dict[tuple, Callable[[], float]] = {}
+
+    def set(self, *labels: str, value: float):
+        self.values[labels] = value
+
+    def set_function(self, *labels: str, function: Callable[[], float]):
+        self.functions[labels] = function
+
+    def remove(self, *labels: str):
+        """Удаляет значение с этими метками (например, остановленного аккаунта)"""
+        self.values.pop(labels, None)
+        self.functions.pop(labels, None)
+
+    def refresh(self):
+        for labels, function in self.functions.items():
+            try:
+                self.values[labels] = function()
+            except Exception:
+                continue
+
+    def render(self, values: Dict[tuple, float] = None, extra: str = "") -> Iterable[str]:
+        if values is None:
+            self.refresh()
+        yield from super().render(values, extra)
+
+
+class Histogram:
+    """Гистограмма распределения значений (длительностей)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # labels -> [счетчики по бакетам (последний - +Inf), сумма]
+        self.values: Dict[tuple, list] = {}
+
+    def observe(self, *labels: str, value: float):
+        data = self.values.get(labels)
+        if data is None:
+            data = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        data[0][bisect_left(self.buckets, value)] += 1
+        data[1] += value
+
+    def render(self, values: Dict[tuple, list] = None, extra: str = "") -> Iterable[str]:
+        for labels, (counts, total) in (self.values if values is None else values).items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_label = f'{extra},le="{le}"' if extra else f'le="{le}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, bucket_label)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels, extra)} {total}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels, extra)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Реестр метрик с выводом в текстовом формате Prometheus"""
+
+    def __init__(self):
+        self.metrics: List = []
+        # Снимки метрик процессов-воркеров движка: воркер -> {метрика: {метки: значение}}
+        self.remote: Dict[str, Dict[str, dict]] = {}
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def _register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+            # Значения воркеров движка выводятся с меткой worker
+            for worker, snapshot in self.remote.items():
+                values = snapshot.get(metric.name)
+                if values:
+                    lines.extend(metric.render(values, f'worker="{worker}"'))
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, list]:
+        """Значения всех метрик в виде, пригодном для JSON (для передачи из воркера движка)"""
+        result = {}
+        for metric in self.metrics:
+            if isinstance(metric, Gauge):
+                metric.refresh()
+            if metric.values:
+                result[metric.name] = [[list(labels), value] for labels, value in metric.values.items()]
+        return result
+
+    def merge_remote(self, worker: str, snapshot: Dict[str, list]):
+        """Сохраняет снимок метрик воркера движка"""
+        self.remote[worker] = {
+            name: {tuple(labels): value for labels, value in values} for name, values in snapshot.items()
+        }
+
+
+metrics = MetricsRegistry()
+
+CYCLE_DURATION = metrics.histogram(
+    "tg_activity_cycle_duration_seconds", "Длительность цикла активности аккаунта"
+)
+ACCOUNT_CYCLE_DURATION = metrics.gauge(
+    "tg_account_last_cycle_duration_seconds", "Длительность последнего цикла активности аккаунта",
+    labels=("account",)
+)
+RPC_REQUESTS = metrics.counter(
+    "tg_rpc_requests_total", "Запросы к Telegram API по методам и результату", labels=("method", "outcome")
+)
+RPC_DURATION = metrics.histogram(
+    "tg_rpc_duration_seconds", "Длительность запросов к Telegram API", labels=("method",)
+)
+FLOOD_WAIT_SECONDS = metrics.counter(
+    "tg_flood_wait_seconds_total", "Суммарное время FloodWait по методам", labels=("method",)
+)
+FLOOD_QUARANTINES = metrics.counter(
+    "tg_flood_quarantines_total", "Карантины аккаунтов после FloodWait по методам и области", labels=("method", "scope")
+)
+POSTS_HANDED_OFF = metrics.counter("tg_posts_handed_off_total", "Посты, переданные другим аккаунтам из-за FloodWait")
+REACTIONS_SENT = metrics.counter("tg_reactions_sent_total", "Отправленные реакции")
+VIEWS_SENT = metrics.counter("tg_views_sent_total", "Накрученные просмотры")
+POSTS_DISCOVERED = metrics.counter("tg_posts_discovered_total", "Найденные новые посты")
+CHANNEL_FAILURES = metrics.counter(
+    "tg_channel_failures_total", "Ошибки доступа к каналам по классам", labels=("error",)
+)
+CHANNEL_POLLS = metrics.counter(
+    "tg_channel_polls_total", "Проверки каналов (polled) и пропущенные по частоте публикаций (skipped)",
+    labels=("result",)
+)
+DB_QUERY_DURATION = metrics.histogram(
+    "db_query_duration_seconds", "Длительность запросов к базе данных", labels=("statement",)
+)
+SCHEDULER_LATENESS = metrics.histogram(
+    "tg_scheduler_lateness_seconds", "Опоздание запуска цикла активности относительно плана"
+)
+ACCOUNT_HEALTH = metrics.gauge(
+    "tg_account_health_score", "Оценка здоровья аккаунта (1 - все запросы успешны)", labels=("account",)
+)
+ENGINE_LAG = metrics.gauge("tg_engine_lag_seconds", "Отставание движка активности от плана")
+SHED_LEVEL = metrics.gauge("tg_shed_level", "Уровень сброса нагрузки (0 - вся работа выполняется)")
+SHED_SKIPPED = metrics.counter(
+    "tg_shed_skipped_total", "Пропущенная из-за перегрузки работа по видам", labels=("feature",)
+)
+SESSION_DECRYPTS = metrics.counter(
+    "tg_session_decrypts_total", "Запросы расшифрованных сессий (hit - из кэша, miss - расшифровка)", labels=("result",)
+)
+POOL_SIZE = metrics.gauge("tg_pool_size", "Размеры пулов (задачи, клиенты, соединения БД)", labels=("pool",))
+
+
+def request_name(request) -> str:
+    """Имя TL-запроса для метрик (для списков запросов - имя первого)"""
+    if isinstance(request, (list, tuple)):
+        request = request[0] if request else None
+    return type(request).__name__
+
+
+def observe_db_queries(engine):
+    """Подключает замер длительности запросов к движку SQLAlchemy"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        DB_QUERY_DURATION.observe(statement.lstrip()[:6].upper(), value=time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """
+    Запускает HTTP-сервер с метриками (GET /metrics), трассировкой
+    (GET /traces.json - формат Chrome trace, GET /traces.jsonl - JSON Lines)
+    и событиями карантина после FloodWait (GET /quarantine.json)
+    """
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    async def handle_traces(request: web.Request) -> web.Response:
+        return web.json_response(tracer.to_chrome_trace())
+
+    async def handle_traces_jsonl(request: web.Request) -> web.Response:
+        return web.Response(text=tracer.to_jsonl(), content_type="application/x-ndjson", charset="utf-8")
+
+    async def handle_quarantine(request: web.Request) -> web.Response:
+        return web.json_response(list(quarantine.events))
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/traces.json", handle_traces)
+    app.router.add_get("/traces.jsonl", handle_traces_jsonl)
+    app.router.add_get("/quarantine.json", handle_quarantine)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,112 @@
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from config_data.config import (
+    POLL_RATE_ALPHA,
+    POLL_CHECKS_PER_POST,
+    POLL_MIN_INTERVAL,
+    POLL_MAX_INTERVAL,
+    POLL_BURST_SECONDS
+)
+from services.metrics import CHANNEL_POLLS
+
+
+class ChannelRate:
+    """Оценка частоты публикаций одного канала"""
+    __slots__ = ("interval", "last_post_id", "last_post_at", "burst_until", "polled")
+
+    def __init__(self):
+        self.interval: Optional[float] = None    # Сглаженный интервал между постами (EWMA), сек
+        self.last_post_id = 0                    # Самый свежий известный пост
+        self.last_post_at: Optional[float] = None
+        self.burst_until = 0.0                   # До этого момента канал проверяется в каждом цикле
+        self.polled: Dict[int, float] = {}       # Аккаунт -> время его последней проверки канала
+
+
+class PollScheduler:
+    """
+    Частота проверки каналов по наблюдаемой частоте публикаций.
+
+    Для каждого канала ведется EWMA интервалов между постами. Канал проверяется
+    аккаунтом не чаще, чем раз в interval / POLL_CHECKS_PER_POST (в пределах
+    POLL_MIN_INTERVAL..POLL_MAX_INTERVAL); если канал давно молчит, интервал растет
+    вместе с временем тишины. После нового поста канал POLL_BURST_SECONDS секунд
+    проверяется в каждом цикле, а аккаунты, не видевшие этот пост, проверяют канал сразу.
+    """
+
+    def __init__(self):
+        self.channels: Dict[int, ChannelRate] = {}
+
+    def poll_interval(self, channel_id: int, now: float = None) -> float:
+        """Как часто аккаунту проверять канал, сек"""
+        rate = self.channels.get(channel_id)
+        if rate is None or rate.last_post_at is None:
+            return POLL_MIN_INTERVAL
+        now = time.time() if now is None else now
+        if now < rate.burst_until:
+            return POLL_MIN_INTERVAL
+        interval = max(rate.interval or 0.0, now - rate.last_post_at)
+        return min(max(interval / POLL_CHECKS_PER_POST, POLL_MIN_INTERVAL), POLL_MAX_INTERVAL)
+
+    def due(self, channel_id: int, account_id: int, now: float = None) -> bool:
+        """Пора ли аккаунту проверить канал"""
+        rate = self.channels.get(channel_id)
+        if rate is None:
+            return True
+        polled = rate.polled.get(account_id)
+        if polled is None:
+            return True
+        now = time.time() if now is None else now
+        # Пост, найденный другим аккаунтом после нашей проверки, нужно забрать без ожидания
+        if rate.burst_until > polled:
+            return True
+        if now - polled >= self.poll_interval(channel_id, now):
+            return True
+        CHANNEL_POLLS.inc("skipped")
+        return False
+
+    def observe(self, channel_id: int, account_id: int, posts: Iterable[tuple], now: float = None):
+        """
+        Учитывает проверку канала аккаунтом. posts - пары (ID поста, дата) из проверки.
+        """
+        now = time.time() if now is None else now
+        CHANNEL_POLLS.inc("polled")
+        rate = self.channels.get(channel_id)
+        if rate is None:
+            rate = self.channels[channel_id] = ChannelRate()
+        rate.polled[account_id] = now
+
+        fresh = sorted(
+            (post_id, self._timestamp(date)) for post_id, date in posts
+            if post_id > rate.last_post_id and date is not None
+        )
+        if not fresh:
+            return
+        # Первая проверка канала: интервалы считаются по уже опубликованным постам
+        previous = rate.last_post_at if rate.last_post_id else None
+        for post_id, posted_at in fresh:
+            if previous is not None:
+                self._add_interval(rate, max(posted_at - previous, 0.0))
+            previous = posted_at
+        if rate.last_post_id:
+            rate.burst_until = now + POLL_BURST_SECONDS
+        rate.last_post_id, rate.last_post_at = fresh[-1]
+
+    def forget(self, channel_id: int):
+        """Сбрасывает состояние канала (после удаления)"""
+        self.channels.pop(channel_id, None)
+
+    @staticmethod
+    def _add_interval(rate: ChannelRate, interval: float):
+        if rate.interval is None:
+            rate.interval = interval
+        else:
+            rate.interval += POLL_RATE_ALPHA * (interval - rate.interval)
+
+    @staticmethod
+    def _timestamp(date) -> float:
+        return date.timestamp() if isinstance(date, datetime) else float(date)
+
+
+poll_scheduler = PollScheduler()
@@ -0,0 +1,71 @@
+from array import array
+from typing import Iterable, Iterator, Optional, Tuple
+
+from telethon.tl.types import MessageEmpty
+
+
+def reaction_total(message) -> int:
+    """Сумма реакций на сообщении (сырой TL-объект или сообщение Telethon)"""
+    reactions = getattr(message, "reactions", None)
+    if not reactions:
+        return 0
+    return sum(result.count for result in reactions.results)
+
+
+class PostScan:
+    """
+    Компактный результат проверки канала: ID, дата, сумма реакций и просмотры постов
+    в параллельных массивах вместо объектов Message.
+
+    Заполняется из сырых сообщений ответа GetHistoryRequest / GetChannelDifferenceRequest,
+    без построения высокоуровневых сообщений Telethon (отправитель, чат, пересылка, медиа),
+    сами сообщения после разбора не хранятся.
+    """
+    __slots__ = ("ids", "dates", "reactions", "views")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.dates = array("d")       # Дата публикации (timestamp)
+        self.reactions = array("l")   # Сумма реакций на момент проверки
+        self.views = array("l")       # Просмотры на момент проверки (-1 - неизвестно)
+
+    @classmethod
+    def from_messages(cls, messages: Iterable) -> "PostScan":
+        scan = cls()
+        for message in messages:
+            scan.add(message)
+        return scan
+
+    def add(self, message):
+        if isinstance(message, MessageEmpty):
+            return
+        self.ids.append(message.id)
+        self.dates.append(message.date.timestamp())
+        self.reactions.append(reaction_total(message))
+        views = getattr(message, "views", None)
+        self.views.append(-1 if views is None else views)
+
+    def _index(self, post_id: int) -> Optional[int]:
+        try:
+            return self.ids.index(post_id)
+        except ValueError:
+            return None
+
+    def reaction_count(self, post_id: int) -> Optional[int]:
+        """Сумма реакций на посте (None - поста нет в проверке)"""
+        index = self._index(post_id)
+        return None if index is None else self.reactions[index]
+
+    def view_count(self, post_id: int) -> Optional[int]:
+        """Просмотры поста (None - поста нет в проверке или просмотры неизвестны)"""
+        index = self._index(post_id)
+        if index is None or self.views[index] < 0:
+            return None
+        return self.views[index]
+
+    def posts(self) -> Iterator[Tuple[int, float]]:
+        """Пары (ID поста, timestamp публикации)"""
+        return zip(self.ids, self.dates)
+
+    def __len__(self) -> int:
+        return len(self.ids)
@@ -0,0 +1,126 @@
+import time
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from telethon.errors import FloodWaitError
+
+from config_data.config import QUARANTINE_ACCOUNT_SECONDS, QUARANTINE_EVENTS_SIZE, HANDOFF_TTL
+from loader import app_logger
+
+# Область карантина, которая закрывает аккаунту все запросы
+ACCOUNT_SCOPE = "*"
+
+
+class QuarantinedError(FloodWaitError):
+    """
+    Запрос не отправлен: аккаунт (или этот тип запроса) на карантине после FloodWait.
+    Наследуется от FloodWaitError, чтобы существующие обработчики FloodWait срабатывали и на него.
+    """
+
+    def __init__(self, request, seconds: int, scope: str):
+        super().__init__(request, capture=max(int(seconds), 1))
+        self.scope = scope
+
+
+class FloodQuarantine:
+    """
+    Карантин аккаунтов после FloodWait.
+
+    FloodWait на запрос закрывает аккаунту этот тип запроса (имя TL-запроса) на e.seconds секунд.
+    Если ожидание не меньше QUARANTINE_ACCOUNT_SECONDS, на карантин уходит весь аккаунт.
+    Пока карантин не истек, клиент не отправляет такие запросы в Telegram, а сразу
+    поднимает QuarantinedError. События карантина хранятся в кольцевом буфере.
+    """
+
+    def __init__(self, events_size: int = QUARANTINE_EVENTS_SIZE):
+        # (аккаунт, тип запроса или ACCOUNT_SCOPE) -> время окончания карантина (time.monotonic)
+        self.until: Dict[Tuple[int, str], float] = {}
+        self.events: deque = deque(maxlen=events_size)
+
+    def add(self, account_id: int, method: str, seconds: int) -> str:
+        """Помещает аккаунт на карантин после FloodWait. Возвращает область карантина"""
+        scope = ACCOUNT_SCOPE if seconds >= QUARANTINE_ACCOUNT_SECONDS else method
+        key = (account_id, scope)
+        self.until[key] = max(self.until.get(key, 0.0), time.monotonic() + seconds)
+        self.events.append({
+            "time": time.time(),
+            "account": account_id,
+            "method": method,
+            "seconds": seconds,
+            "scope": scope,
+        })
+        app_logger.warning(
+            "Аккаунт %s на карантине на %s сек после FloodWait в %s (%s)",
+            account_id, seconds, method, "все запросы" if scope == ACCOUNT_SCOPE else scope
+        )
+        return scope
+
+    def remaining(self, account_id: int, method: Optional[str] = None) -> Tuple[float, Optional[str]]:
+        """
+        Сколько секунд осталось до конца карантина аккаунта для запроса method
+        (без method - для аккаунта целиком) и область карантина
+        """
+        now = time.monotonic()
+        scopes = (ACCOUNT_SCOPE,) if method is None else (ACCOUNT_SCOPE, method)
+        for scope in scopes:
+            until = self.until.get((account_id, scope))
+            if until is None:
+                continue
+            if until > now:
+                return until - now, scope
+            del self.until[(account_id, scope)]
+        return 0.0, None
+
+    def is_quarantined(self, account_id: int, method: Optional[str] = None) -> bool:
+        return self.remaining(account_id, method)[0] > 0
+
+    def forget(self, account_id: int):
+        for key in [key for key in self.until if key[0] == account_id]:
+            del self.until[key]
+
+
+class PendingWork:
+    """
+    Посты, которые аккаунт не успел обработать из-за FloodWait.
+    Их забирают другие аккаунты того же пользователя в своем цикле активности.
+    """
+
+    def __init__(self, ttl: int = HANDOFF_TTL):
+        self.ttl = ttl
+        # (пользователь, канал) -> {пост: (аккаунт-источник, время передачи)}
+        self.posts: Dict[Tuple[int, int], Dict[int, Tuple[int, float]]] = {}
+
+    def hand_off(self, user_id: int, channel_id: int, post_ids: List[int], from_account: int) -> int:
+        """Передает посты другим аккаунтам. Возвращает количество переданных постов"""
+        if not post_ids:
+            return 0
+        now = time.monotonic()
+        pending = self.posts.setdefault((user_id, channel_id), {})
+        for post_id in post_ids:
+            pending[post_id] = (from_account, now)
+        return len(post_ids)
+
+    def take(self, user_id: int, channel_id: int, account_id: int) -> List[int]:
+        """Забирает переданные посты канала, кроме переданных самим аккаунтом"""
+        pending = self.posts.get((user_id, channel_id))
+        if not pending:
+            return []
+        deadline = time.monotonic() - self.ttl
+        taken = []
+        for post_id, (from_account, handed_at) in list(pending.items()):
+            if handed_at < deadline:
+                del pending[post_id]
+            elif from_account != account_id:
+                del pending[post_id]
+                taken.append(post_id)
+        if not pending:
+            del self.posts[(user_id, channel_id)]
+        return taken
+
+    def channels(self, user_id: int) -> Set[int]:
+        """Каналы пользователя, в которых есть переданные посты"""
+        return {channel_id for (owner, channel_id) in self.posts if owner == user_id}
+
+
+quarantine = FloodQuarantine()
+pending_work = PendingWork()
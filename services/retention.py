@@ -0,0 +1,221 @@
+import asyncio
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select, delete, and_, func
+
+from config_data.config import (
+    FIRST_CHECK_POSTS,
+    RETENTION_DAYS,
+    RETENTION_BATCH_SIZE,
+    RETENTION_BATCH_PAUSE,
+    RETENTION_INTERVAL,
+    ARCHIVE_DIR
+)
+from database.models import AccountReaction, AccountChannelState, Job, async_session, engine
+from loader import app_logger
+
+# Сколько страниц освобождать за один PRAGMA incremental_vacuum
+VACUUM_PAGES_PER_STEP = 1000
+
+
+class ReactionRetention:
+    """
+    Периодическая очистка account_reactions и завершенных фоновых задач.
+
+    Удаляются записи о реакциях и служебные маркеры старше RETENTION_DAYS дней, если движок
+    больше не прочитает пост: все аккаунты уже сдвинули курсор канала дальше него
+    (отстающий аккаунт дочитывает посты новее своего курсора из истории), и пост не входит
+    в последние FIRST_CHECK_POSTS постов, которые читает первая проверка канала аккаунтом.
+    Записи с настройками реакций канала (reaction = NULL) не трогаются.
+    Удаляемые записи сначала выгружаются в сжатый файл JSON Lines в ARCHIVE_DIR.
+    Задачи (jobs) в статусе done/failed, не менявшиеся RETENTION_DAYS дней, удаляются без выгрузки.
+    Удаление идет небольшими транзакциями с паузами, после чего база сжимается
+    (PRAGMA incremental_vacuum) и обновляется статистика (ANALYZE).
+    """
+
+    def __init__(self, days: int = RETENTION_DAYS, horizon: int = FIRST_CHECK_POSTS,
+                 batch_size: int = RETENTION_BATCH_SIZE, interval: int = RETENTION_INTERVAL,
+                 archive_dir: str = ARCHIVE_DIR):
+        self.days = days
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.interval = interval
+        self.archive_dir = archive_dir
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Запускает периодическую очистку"""
+        self.task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                app_logger.error("Ошибка при очистке старых реакций: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> int:
+        """Выполняет одну очистку. Возвращает количество удаленных записей"""
+        cutoff = datetime.utcnow() - timedelta(days=self.days)
+        jobs = await self._purge_jobs(cutoff)
+        thresholds = await self._channel_thresholds()
+
+        archive = None
+        archive_path = os.path.join(
+            self.archive_dir, f"account_reactions-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl.gz"
+        )
+        deleted = 0
+        try:
+            for channel_id, threshold in thresholds.items():
+                condition = and_(
+                    AccountReaction.channel_id == channel_id,
+                    AccountReaction.reaction.isnot(None),
+                    AccountReaction.reacted_at < cutoff,
+                    # Если постов меньше горизонта, удаляем только маркеры проверки канала (post_id = 0)
+                    AccountReaction.post_id < threshold if threshold is not None else AccountReaction.post_id == 0
+                )
+                while True:
+                    async with async_session() as session:
+                        rows = (await session.execute(
+                            select(AccountReaction).where(condition).order_by(AccountReaction.id).limit(self.batch_size)
+                        )).scalars().all()
+                        if not rows:
+                            break
+
+                        # Выгружаем записи до удаления, чтобы при ошибке данные не потерялись
+                        if archive is None:
+                            os.makedirs(self.archive_dir, exist_ok=True)
+                            archive = await asyncio.to_thread(gzip.open, archive_path, "at", encoding="utf8")
+                        lines = "".join(json.dumps(self._as_dict(row), ensure_ascii=False) + "\n" for row in rows)
+                        await asyncio.to_thread(archive.write, lines)
+                        await asyncio.to_thread(archive.flush)
+
+                        await session.execute(
+                            delete(AccountReaction).where(AccountReaction.id.in_([row.id for row in rows]))
+                        )
+                        await session.commit()
+                    deleted += len(rows)
+                    await asyncio.sleep(RETENTION_BATCH_PAUSE)
+        finally:
+            if archive is not None:
+                await asyncio.to_thread(archive.close)
+
+        if deleted:
+            app_logger.info("Удалено %s старых записей о реакциях, выгрузка: %s", deleted, archive_path)
+        if deleted or jobs:
+            await self._compact()
+        return deleted + jobs
+
+    async def _purge_jobs(self, cutoff: datetime) -> int:
+        """Удаляет завершенные задачи, не менявшиеся с cutoff. Возвращает их количество"""
+        deleted = 0
+        while True:
+            async with async_session() as session:
+                ids = (await session.execute(
+                    select(Job.id)
+                    .where(Job.status.in_(("done", "failed")), Job.updated_at < cutoff)
+                    .order_by(Job.id)
+                    .limit(self.batch_size)
+                )).scalars().all()
+                if not ids:
+                    break
+                await session.execute(delete(Job).where(Job.id.in_(ids)))
+                await session.commit()
+            deleted += len(ids)
+            await asyncio.sleep(RETENTION_BATCH_PAUSE)
+        if deleted:
+            app_logger.info("Удалено %s завершенных задач старше %s дн.", deleted, self.days)
+        return deleted
+
+    async def _channel_thresholds(self) -> Dict[int, Optional[int]]:
+        """
+        Для каждого канала - ID поста, записи о постах старше которого можно удалять:
+        самый старый пост из последних horizon и пост сразу за самым отстающим курсором
+        аккаунтов (None, если записей о постах меньше horizon)
+        """
+        async with async_session() as session:
+            channel_ids = (await session.execute(
+                select(AccountReaction.channel_id).where(AccountReaction.channel_id.isnot(None)).distinct()
+            )).scalars().all()
+            cursors = dict((await session.execute(
+                # Аккаунты без курсора (0) читают только последние horizon постов
+                select(AccountChannelState.channel_id, func.min(AccountChannelState.last_message_id))
+                .where(AccountChannelState.last_message_id > 0)
+                .group_by(AccountChannelState.channel_id)
+            )).all())
+
+            thresholds = {}
+            for channel_id in channel_ids:
+                threshold = (await session.execute(
+                    select(AccountReaction.post_id)
+                    .where(AccountReaction.channel_id == channel_id, AccountReaction.post_id > 0)
+                    .distinct()
+                    .order_by(AccountReaction.post_id.desc())
+                    .offset(self.horizon - 1)
+                    .limit(1)
+                )).scalar_one_or_none()
+                cursor = cursors.get(channel_id)
+                if threshold is not None and cursor is not None:
+                    # Посты новее курсора аккаунт еще прочитает: их записи нужны для проверки дублей
+                    threshold = min(threshold, cursor + 1)
+                thresholds[channel_id] = threshold
+        return thresholds
+
+    async def _compact(self):
+        """Возвращает освободившиеся страницы и обновляет статистику планировщика запросов"""
+        if engine.dialect.name != "sqlite":
+            return
+        async with engine.connect() as connection:
+            auto_vacuum = (await connection.exec_driver_sql("PRAGMA auto_vacuum")).scalar()
+            free_pages = (await connection.exec_driver_sql("PRAGMA freelist_count")).scalar()
+        if auto_vacuum == 2:  # INCREMENTAL
+            # Соединение берется на каждый шаг, чтобы не держать его из пула все время сжатия
+            while free_pages:
+                left = await self._vacuum_step(VACUUM_PAGES_PER_STEP)
+                if left >= free_pages:
+                    break
+                free_pages = left
+                await asyncio.sleep(RETENTION_BATCH_PAUSE)
+        else:
+            app_logger.info("В базе выключен auto_vacuum=INCREMENTAL, место освободится только после VACUUM")
+        async with engine.connect() as connection:
+            await connection.exec_driver_sql("ANALYZE account_reactions")
+            await connection.commit()
+
+    @staticmethod
+    async def _vacuum_step(pages: int) -> int:
+        """
+        Освобождает до pages страниц. Возвращает, сколько свободных страниц осталось.
+
+        PRAGMA incremental_vacuum освобождает одну страницу за шаг выполнения запроса,
+        а execute делает только один шаг, поэтому прагма выполняется через executescript,
+        который доводит ее до конца.
+        """
+        async with engine.connect() as connection:
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+            return (await connection.exec_driver_sql("PRAGMA freelist_count")).scalar()
+
+    @staticmethod
+    def _as_dict(row: AccountReaction) -> dict:
+        return {
+            "id": row.id,
+            "account_id": row.account_id,
+            "channel_id": row.channel_id,
+            "post_id": row.post_id,
+            "reaction": row.reaction,
+            "reacted_at": row.reacted_at.isoformat() if row.reacted_at else None,
+        }
@@ -1,9 +1,13 @@
 # Инициализация сервисов
 from config_data.config import ENCRYPTION_KEY
 from services.account_manager import AccountService, UserActivityManager
+from services.jobs import JobRunner
+from services.retention import ReactionRetention
 
 service = AccountService(ENCRYPTION_KEY)
 activity_manager = UserActivityManager()
+job_runner = JobRunner()
+retention = ReactionRetention()
 
 # Устанавливаем account_service для channel_manager
 from services.channel_manager import account_service
@@ -0,0 +1,60 @@
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Union
+
+from config_data.config import SESSION_CACHE_SIZE
+
+
+class SessionCache:
+    """
+    Ограниченный по размеру LRU-кэш расшифрованных сессий.
+
+    Ключ - хэш зашифрованной сессии, поэтому новая сессия аккаунта не попадет на старую
+    запись. Сессии хранятся в bytearray и затираются нулями при вытеснении и удалении
+    (строки, уже выданные вызывающему коду, затереть нельзя - они живут, пока нужны клиенту).
+    """
+
+    def __init__(self, capacity: int = SESSION_CACHE_SIZE):
+        self.capacity = capacity
+        self.items: "OrderedDict[bytes, bytearray]" = OrderedDict()
+
+    @staticmethod
+    def key(encrypted: Union[str, bytes]) -> bytes:
+        if isinstance(encrypted, str):
+            encrypted = encrypted.encode()
+        return hashlib.blake2b(encrypted, digest_size=16).digest()
+
+    def get(self, encrypted: Union[str, bytes]) -> Optional[str]:
+        key = self.key(encrypted)
+        value = self.items.get(key)
+        if value is None:
+            return None
+        self.items.move_to_end(key)
+        return value.decode()
+
+    def put(self, encrypted: Union[str, bytes], session_str: str):
+        key = self.key(encrypted)
+        old = self.items.pop(key, None)
+        if old is not None:
+            self._wipe(old)
+        self.items[key] = bytearray(session_str.encode())
+        while len(self.items) > self.capacity:
+            _, evicted = self.items.popitem(last=False)
+            self._wipe(evicted)
+
+    def discard(self, encrypted: Union[str, bytes]):
+        value = self.items.pop(self.key(encrypted), None)
+        if value is not None:
+            self._wipe(value)
+
+    def clear(self):
+        for value in self.items.values():
+            self._wipe(value)
+        self.items.clear()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @staticmethod
+    def _wipe(value: bytearray):
+        value[:] = bytes(len(value))
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from telethon import TelegramClient
+from telethon.errors import FloodWaitError, RPCError
+
+from services.metrics import RPC_REQUESTS, RPC_DURATION, FLOOD_WAIT_SECONDS, FLOOD_QUARANTINES, request_name
+from services.quarantine import QuarantinedError, quarantine
+
+
+class InstrumentedTelegramClient(TelegramClient):
+    """
+    TelegramClient, который учитывает все запросы к API в метриках и в итогах цикла активности.
+    FloodWait помещает аккаунт на карантин: пока он не истек, запросы не отправляются в Telegram.
+    """
+
+    cycle_report = None  # CycleReport текущего цикла активности (см. services/health.py)
+    account_id = None    # Аккаунт для карантина после FloodWait (None - без карантина)
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        method = request_name(request)
+        if self.account_id is not None:
+            seconds, scope = quarantine.remaining(self.account_id, method)
+            if seconds:
+                RPC_REQUESTS.inc(method, "quarantined")
+                raise QuarantinedError(request, seconds, scope)
+
+        outcome = "ok"
+        flood_seconds = 0
+        started = time.perf_counter()
+        try:
+            return await super().__call__(request, ordered=ordered, flood_sleep_threshold=flood_sleep_threshold)
+        except FloodWaitError as e:
+            outcome = "flood_wait"
+            flood_seconds = e.seconds
+            FLOOD_WAIT_SECONDS.inc(method, value=e.seconds)
+            if self.account_id is not None:
+                scope = quarantine.add(self.account_id, method, e.seconds)
+                FLOOD_QUARANTINES.inc(method, scope)
+            raise
+        except (asyncio.TimeoutError, TimeoutError):
+            outcome = "timeout"
+            raise
+        except RPCError:
+            outcome = "rpc_error"
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            RPC_REQUESTS.inc(method, outcome)
+            RPC_DURATION.observe(method, value=time.perf_counter() - started)
+            if self.cycle_report is not None:
+                self.cycle_report.record_request(outcome, flood_seconds)
@@ -0,0 +1,113 @@
+import itertools
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from config_data.config import TRACE_ENABLED, TRACE_BUFFER_SIZE
+
+
+class Span:
+    """Отрезок выполнения (этап цикла активности)"""
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "started_at", "start_ns", "duration_ns", "attrs")
+
+    def __init__(self, name: str, trace_id: int, span_id: int, parent_id: Optional[int], attrs: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.started_at = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.duration_ns = 0
+        self.attrs = attrs
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ns / 1e6,
+            "attrs": self.attrs,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Легковесная трассировка этапов цикла активности.
+
+    Завершенные отрезки складываются в кольцевой буфер и выгружаются в JSON Lines
+    или в формате Chrome trace (chrome://tracing, Perfetto).
+    """
+
+    def __init__(self, capacity: int = TRACE_BUFFER_SIZE, enabled: bool = TRACE_ENABLED):
+        self.enabled = enabled
+        self.spans: deque = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Optional[Span]]:
+        """Замеряет этап; вложенные этапы попадают в ту же трассу, что и внешний"""
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        span_id = next(self._ids)
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else span_id,
+            span_id=span_id,
+            parent_id=parent.span_id if parent else None,
+            attrs=attrs
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration_ns = time.perf_counter_ns() - span.start_ns
+            _current_span.reset(token)
+            self.spans.append(span)
+
+    def snapshot(self) -> List[Span]:
+        return list(self.spans)
+
+    def to_jsonl(self) -> str:
+        """Отрезки в формате JSON Lines (по одному на строку)"""
+        return "".join(json.dumps(span.as_dict(), ensure_ascii=False) + "\n" for span in self.snapshot())
+
+    def to_chrome_trace(self) -> dict:
+        """Отрезки в формате Chrome trace: каждая трасса (цикл) - отдельная дорожка"""
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": span.started_at * 1e6,
+                "dur": span.duration_ns / 1e3,
+                "pid": 1,
+                "tid": span.trace_id,
+                "args": span.attrs,
+            }
+            for span in self.snapshot()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str):
+        """Выгружает отрезки в файл: .jsonl - JSON Lines, иначе Chrome trace"""
+        with open(path, "w", encoding="utf8") as file:
+            if path.endswith(".jsonl"):
+                file.write(self.to_jsonl())
+            else:
+                json.dump(self.to_chrome_trace(), file, ensure_ascii=False)
+
+
+tracer = Tracer()
@@ -0,0 +1,36 @@
+import asyncio
+
+from benchmarks.harness import prepare_environment
+
+# Временная база и переменные окружения нужны до импорта модулей бота
+prepare_environment()
+
+
+def run(coroutine):
+    """Выполняет корутину в новом цикле событий и закрывает соединения с базой после нее"""
+    async def wrapper():
+        from database.models import engine
+        try:
+            return await coroutine
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(wrapper())
+
+
+async def seed_channel_world(first_user_id: int, accounts: int = 1, posts: int = 0):
+    """
+    Пользователь с аккаунтами и одним каналом в базе и тот же канал в синтетическом Telegram.
+    Возвращает (данные сида, мир, канал мира)
+    """
+    from benchmarks.fake_telegram import FakeTelegram
+    from benchmarks.harness import create_schema, seed_database
+    from config_data.config import ENCRYPTION_KEY
+
+    await create_schema()
+    data = await seed_database(1, accounts, 1, ENCRYPTION_KEY, first_user_id=first_user_id)
+    channel = data["channels"][0]
+    world = FakeTelegram()
+    fake_channel = world.add_channel(abs(channel.channel_id), channel.channel_username, channel.channel_title)
+    fake_channel.publish(posts)
+    return data, world, fake_channel
@@ -0,0 +1,103 @@
+from telethon.errors import ChannelPrivateError, FloodWaitError
+
+from config_data.config import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_OPEN_SECONDS,
+    BREAKER_DEACTIVATE_AFTER
+)
+from services.channel_breaker import ChannelBreakers, classify_error, CLOSED, OPEN, HALF_OPEN
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def tripped(clock: Clock) -> ChannelBreakers:
+    """Предохранитель канала 1, разомкнутый ошибками подряд"""
+    breakers = ChannelBreakers(clock)
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        breakers.record_failure(1, "private")
+    return breakers
+
+
+def test_opens_after_consecutive_failures():
+    clock = Clock()
+    breakers = ChannelBreakers(clock)
+    for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+        assert not breakers.record_failure(1, "private")
+    assert breakers.breakers[1].state == CLOSED
+    assert breakers.allow(1, 10)
+
+    breakers.record_failure(1, "private")
+    assert breakers.breakers[1].state == OPEN
+    assert not breakers.allow(1, 10)
+    clock.now += BREAKER_OPEN_SECONDS - 1
+    assert not breakers.allow(1, 10)
+
+
+def test_half_open_allows_single_probe():
+    clock = Clock()
+    breakers = tripped(clock)
+    clock.now += BREAKER_OPEN_SECONDS
+
+    assert breakers.allow(1, 10)
+    assert breakers.breakers[1].state == HALF_OPEN
+    assert not breakers.allow(1, 11)
+    assert breakers.allow(1, 10)
+
+    # Пробная проверка так и не завершилась - право на нее переходит другому аккаунту
+    clock.now += BREAKER_OPEN_SECONDS + 1
+    assert breakers.allow(1, 11)
+    assert not breakers.allow(1, 10)
+
+
+def test_probe_success_closes_and_failure_reopens_with_doubled_pause():
+    clock = Clock()
+    breakers = tripped(clock)
+    clock.now += BREAKER_OPEN_SECONDS
+    assert breakers.allow(1, 10)
+    breakers.record_failure(1, "private")
+    breaker = breakers.breakers[1]
+    assert (breaker.state, breaker.trips, breaker.open_for) == (OPEN, 2, BREAKER_OPEN_SECONDS * 2)
+
+    clock.now += BREAKER_OPEN_SECONDS * 2
+    assert breakers.allow(1, 10)
+    breakers.record_success(1)
+    assert 1 not in breakers.breakers
+    assert breakers.allow(1, 11)
+
+
+def test_deactivates_only_after_repeated_trips_and_long_outage():
+    clock = Clock()
+    breakers = tripped(clock)
+
+    # Одно размыкание не деактивирует канал, даже если ошибки идут давно
+    clock.now += BREAKER_DEACTIVATE_AFTER
+    assert breakers.breakers[1].state == OPEN
+    assert not breakers.record_failure(1, "private")
+
+    # Повторное размыкание раньше BREAKER_DEACTIVATE_AFTER тоже не деактивирует
+    clock = Clock()
+    breakers = tripped(clock)
+    clock.now += BREAKER_OPEN_SECONDS
+    breakers.allow(1, 10)
+    assert not breakers.record_failure(1, "private")
+    assert breakers.breakers[1].trips == 2
+
+    clock.now = 1000.0 + BREAKER_DEACTIVATE_AFTER
+    assert breakers.record_failure(1, "private")
+
+
+def test_flood_wait_is_not_a_channel_failure():
+    error = FloodWaitError(None, capture=30)
+    assert classify_error(error) is None
+    assert classify_error(ChannelPrivateError(None)) == "private"
+
+    breakers = ChannelBreakers(Clock())
+    for _ in range(BREAKER_FAILURE_THRESHOLD * 2):
+        assert not breakers.record_failure(1, classify_error(error))
+    assert breakers.breakers == {}
@@ -0,0 +1,29 @@
+from services.channel_cards import ChannelCardCache
+
+
+def test_invalidate_bumps_version_and_drops_cards():
+    cache = ChannelCardCache(max_size=4)
+    cache.put(1, 0, 2, "card", None)
+    cache.put(2, 0, 2, "other", None)
+    cache.invalidate(1)
+    assert cache.version(1) == 1
+    assert cache.get(1, 0, 2) is None
+    assert cache.get(2, 0, 2) == ("other", None)
+
+
+def test_versions_are_evicted_with_cards():
+    """Инвалидация множества каналов не растит кэш версий без предела"""
+    cache = ChannelCardCache(max_size=4)
+    cache.put(1, 0, 1, "card", None)
+    for channel_id in range(100, 200):
+        cache.invalidate(channel_id)
+    assert len(cache._versions) == 4 and len(cache._cards) == 0
+
+    # Карточка живет, пока жива версия ее канала; обращение к карточке продлевает версию
+    cache.put(1, 0, 1, "card", None)
+    cache.invalidate(300)
+    assert cache.get(1, 0, 1) == ("card", None)
+    assert list(cache._versions)[-2:] == [300, 1]
+    for channel_id in range(400, 404):
+        cache.invalidate(channel_id)
+    assert 1 not in cache._versions and cache.get(1, 0, 1) is None
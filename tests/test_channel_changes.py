@@ -0,0 +1,43 @@
+import asyncio
+
+from benchmarks.harness import create_schema, seed_database
+from config_data.config import ENCRYPTION_KEY
+from database.models import async_session
+from services import change_feed as changes
+from services.account_manager import UserActivityManager
+from services.change_feed import change_feed
+from services.channel_manager import ChannelManager
+from tests.conftest import run
+
+
+def test_add_channel_wakes_owner_accounts():
+    """Добавление канала будит аккаунты владельца: изменение публикуется с Telegram ID, а не User.id"""
+    async def scenario():
+        await create_schema()
+        data = await seed_database(2, 1, 0, ENCRYPTION_KEY, first_user_id=20_000)
+        owner, other = data["users"]
+        assert owner.id != owner.user_id
+
+        manager = UserActivityManager()
+        owner_wakeup, other_wakeup = asyncio.Event(), asyncio.Event()
+        manager.wakeups[data["accounts"][0].id] = (owner.user_id, owner_wakeup)
+        manager.wakeups[data["accounts"][1].id] = (other.user_id, other_wakeup)
+
+        queue = change_feed.subscribe()
+        try:
+            async with async_session() as session:
+                channel_id = await ChannelManager(session).add_channel(
+                    owner.id, 1_500_000, "test_channel", "Тестовый канал", 1, 5, ["👍"]
+                )
+            change = queue.get_nowait()
+        finally:
+            change_feed.unsubscribe(queue)
+
+        assert change.kind == changes.CHANNEL_ADDED
+        assert change.user_id == owner.user_id
+        assert change.channel_id == channel_id
+        await manager._apply_change(change, None)
+        assert owner_wakeup.is_set()
+        assert not other_wakeup.is_set()
+
+    run(scenario())
@@ -0,0 +1,46 @@
+from benchmarks.harness import create_schema, seed_database
+from config_data.config import ENCRYPTION_KEY
+from database.models import async_session
+from services.channel_manager import ChannelManager
+from tests.conftest import run
+
+
+async def seed_cursor(cursor: int):
+    data = await seed_database(1, 1, 1, ENCRYPTION_KEY, first_user_id=50_000 + cursor)
+    account, channel = data["accounts"][0], data["channels"][0]
+    async with async_session() as session:
+        manager = ChannelManager(session)
+        state = await manager.get_channel_state(account.id, channel.id)
+        state.last_message_id, state.pts = cursor, 100
+        await session.commit()
+    return account.id, channel.id
+
+
+async def commit_and_read(account_id: int, channel_id: int, pending: tuple, unprocessed=()):
+    async with async_session() as session:
+        manager = ChannelManager(session)
+        manager.pending_cursors[channel_id] = pending
+        await manager.commit_scan(account_id, channel_id, unprocessed)
+    async with async_session() as session:
+        state = await ChannelManager(session).get_channel_state(account_id, channel_id)
+        return state.last_message_id, state.pts
+
+
+def test_cursor_advances_past_processed_posts():
+    async def scenario():
+        await create_schema()
+        account_id, channel_id = await seed_cursor(5)
+        assert await commit_and_read(account_id, channel_id, (10, 120)) == (10, 120)
+
+    run(scenario())
+
+
+def test_cursor_stops_before_unprocessed_posts():
+    """Отброшенные при перегрузке и неудачные посты остаются новее курсора"""
+    async def scenario():
+        await create_schema()
+        account_id, channel_id = await seed_cursor(6)
+        # Пост 3 старше курсора (например, передан другим аккаунтом) и на курсор не влияет
+        assert await commit_and_read(account_id, channel_id, (10, 120), [9, 8, 3]) == (7, None)
+
+    run(scenario())
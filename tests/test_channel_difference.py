@@ -0,0 +1,44 @@
+from benchmarks.fake_telegram import FakeTelegramClient
+from config_data.config import DIFFERENCE_LIMIT
+from database.models import async_session
+from services.channel_manager import ChannelManager
+from tests.conftest import run, seed_channel_world
+
+
+def test_difference_returns_posts_after_cursor_and_falls_back_when_too_long():
+    async def scenario():
+        data, world, fake_channel = await seed_channel_world(110_000, posts=2)
+        account = data["accounts"][0]
+        client = FakeTelegramClient(world, "session")
+
+        async with async_session() as session:
+            manager = ChannelManager(session)
+            channel = await manager.get_channel(data["channels"][0].id)
+            await manager.check_new_posts(channel, client, account.id)
+            await manager.commit_scan(account.id, channel.id)
+            state = await manager.get_channel_state(account.id, channel.id)
+            assert (state.last_message_id, state.pts) == (2, fake_channel.next_id)
+
+            # Курсор с pts: новые посты приходят из GetChannelDifference, без истории
+            fake_channel.publish(2)
+            history = world.requests["GetHistoryRequest"]
+            assert sorted(await manager.check_new_posts(channel, client, account.id)) == [3, 4]
+            await manager.commit_scan(account.id, channel.id)
+            assert world.requests["GetChannelDifferenceRequest"] == 1
+            assert world.requests["GetHistoryRequest"] == history
+            assert (state.last_message_id, state.pts) == (4, fake_channel.next_id)
+
+            # Пустая разница - ни постов, ни запроса истории
+            assert await manager.check_new_posts(channel, client, account.id) == []
+            await manager.commit_scan(account.id, channel.id)
+            assert world.requests["GetHistoryRequest"] == history
+
+            # Отставание больше DIFFERENCE_LIMIT: ChannelDifferenceTooLong, посты читаются из истории
+            fake_channel.publish(DIFFERENCE_LIMIT + 5)
+            posts = await manager.check_new_posts(channel, client, account.id)
+            assert sorted(posts) == list(range(5, fake_channel.next_id))
+            assert world.requests["GetHistoryRequest"] > history
+            await manager.commit_scan(account.id, channel.id)
+            assert (state.last_message_id, state.pts) == (fake_channel.next_id - 1, fake_channel.next_id)
+
+    run(scenario())
@@ -0,0 +1,35 @@
+from telethon.tl.types import InputPeerChannel
+
+from benchmarks.fake_telegram import FakeTelegramClient
+from database.models import async_session
+from services.channel_manager import ChannelManager
+from tests.conftest import run, seed_channel_world
+
+
+def test_probe_marks_channels_without_new_posts_unchanged():
+    async def scenario():
+        data, world, fake_channel = await seed_channel_world(100_000, posts=3)
+        account = data["accounts"][0]
+        client = FakeTelegramClient(world, "session")
+        peer = InputPeerChannel(channel_id=fake_channel.id, access_hash=fake_channel.access_hash)
+
+        async with async_session() as session:
+            manager = ChannelManager(session)
+            channel = await manager.get_channel(data["channels"][0].id)
+            peers = {channel.id: peer}
+
+            # Аккаунт еще не проверял канал - сравнивать не с чем, запроса нет
+            assert await manager.probe_channels(client, account.id, peers) == set()
+            assert world.requests["GetPeerDialogsRequest"] == 0
+
+            await manager.check_new_posts(channel, client, account.id)
+            await manager.commit_scan(account.id, channel.id)
+            assert await manager.probe_channels(client, account.id, peers) == {channel.id}
+            assert world.requests["GetPeerDialogsRequest"] == 1
+
+            # Новый пост: top_message новее курсора, канал проверяется
+            fake_channel.publish(1)
+            assert await manager.probe_channels(client, account.id, peers) == set()
+            assert await manager.check_new_posts(channel, client, account.id) == [4]
+
+    run(scenario())
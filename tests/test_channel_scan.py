@@ -0,0 +1,33 @@
+from benchmarks.fake_telegram import FakeTelegramClient
+from database.models import async_session
+from services.channel_manager import ChannelManager
+from services.tracing import tracer
+from tests.conftest import run, seed_channel_world
+
+
+def test_check_new_posts_traces_resolve_fetch_and_dedup():
+    """Этапы проверки канала видны в трассе отдельными отрезками"""
+    async def scenario():
+        data, world, fake_channel = await seed_channel_world(80_000, posts=3)
+        account = data["accounts"][0]
+        client = FakeTelegramClient(world, "session")
+
+        async with async_session() as session:
+            manager = ChannelManager(session)
+            channel = await manager.get_channel(data["channels"][0].id)
+
+            tracer.spans.clear()
+            assert sorted(await manager.check_new_posts(channel, client, account.id)) == [1, 2, 3]
+            await manager.commit_scan(account.id, channel.id)
+            names = [span.name for span in tracer.spans]
+            assert names.count("resolve") == 1
+            assert names.count("fetch") == 1
+            assert names.count("dedup") == 6  # Два запроса на каждый из трех постов
+
+            # Повторная проверка: канал уже известен, посты новее курсора
+            fake_channel.publish(1)
+            tracer.spans.clear()
+            assert await manager.check_new_posts(channel, client, account.id) == [4]
+            assert [span.name for span in tracer.spans] == ["fetch"]
+
+    run(scenario())
@@ -0,0 +1,65 @@
+import pytest
+
+from benchmarks.harness import create_schema, seed_database
+from config_data.config import ENCRYPTION_KEY
+from database.models import async_session
+from handlers.custom_handlers import channel_handlers
+from services.channel_manager import ChannelManager
+from tests.conftest import run
+
+
+class FakeJob:
+    """JobContext без базы и бота: payload переживает "рестарт" задачи"""
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+        self.messages = []
+
+    async def save_payload(self, **fields):
+        self.payload = {**self.payload, **fields}
+
+    async def progress(self, text, reply_markup=None, force=False):
+        self.messages.append(text)
+
+
+class Crash(Exception):
+    pass
+
+
+def test_restarted_delete_job_leaves_remaining_accounts(monkeypatch):
+    """Задача, прерванная после удаления канала из базы, при перезапуске доотписывает оставшиеся аккаунты"""
+    async def scenario():
+        await create_schema()
+        data = await seed_database(1, 2, 1, ENCRYPTION_KEY, first_user_id=60_000)
+        first, second = (account.phone for account in data["accounts"])
+        channel = data["channels"][0]
+        calls = []
+
+        async def crashing_leave(target, account_service, on_leave_result=None, skip_phones=()):
+            calls.append(sorted(set(target["phones"]) - set(skip_phones)))
+            account = next(account for account in data["accounts"] if account.phone == first)
+            await on_leave_result(account, None, 1, 2)
+            raise Crash()
+
+        async def leave(target, account_service, on_leave_result=None, skip_phones=()):
+            remaining = [account for account in data["accounts"] if account.phone not in skip_phones]
+            calls.append(sorted(account.phone for account in remaining))
+            for done, account in enumerate(remaining, 1):
+                await on_leave_result(account, None, done, len(remaining))
+            return len(remaining)
+
+        job = FakeJob({"channel_id": channel.id})
+        monkeypatch.setattr(ChannelManager, "leave_channel", staticmethod(crashing_leave))
+        with pytest.raises(Crash):
+            await channel_handlers.delete_channel_job(job)
+        async with async_session() as session:
+            assert await ChannelManager(session).get_channel(channel.id) is None
+
+        monkeypatch.setattr(ChannelManager, "leave_channel", staticmethod(leave))
+        await channel_handlers.delete_channel_job(job)
+
+        assert calls == [sorted([first, second]), [second]]
+        assert sorted(job.payload["left"]) == sorted([first, second])
+        assert job.messages[-1] == "Канал удален. Отписка аккаунтов: 2/2"
+
+    run(scenario())
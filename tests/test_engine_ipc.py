@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from benchmarks.harness import create_schema, seed_database
+from config_data.config import ENCRYPTION_KEY
+from database.models import async_session
+from services import change_feed as changes
+from services import channel_manager
+from services.change_feed import change_feed
+from services.channel_manager import ChannelManager
+from services.engine_ipc import EngineSupervisor, partition_of
+from tests.conftest import run
+
+
+class FakeWriter:
+    """Сторона сокета воркера: собирает отправленные сообщения"""
+
+    def __init__(self):
+        self.messages = []
+
+    def write(self, data: bytes):
+        self.messages.extend(json.loads(line) for line in data.splitlines())
+
+    async def drain(self):
+        pass
+
+
+async def seed_user_with_distinct_partitions(workers: int):
+    """Пользователь, у которого User.id и Telegram ID попадают в разные воркеры"""
+    # Соседние User.id: Telegram ID через один, чтобы разность сменила четность
+    for first_user_id in (30_000, 30_002):
+        data = await seed_database(1, 1, 0, ENCRYPTION_KEY, first_user_id=first_user_id)
+        user = data["users"][0]
+        if partition_of(user.id, workers) != partition_of(user.user_id, workers):
+            return user
+    raise AssertionError("Не удалось подобрать пользователя")
+
+
+def test_channel_change_routed_to_owner_worker():
+    """Изменение канала уходит воркеру, которому принадлежит Telegram ID владельца"""
+    async def scenario():
+        await create_schema()
+        user = await seed_user_with_distinct_partitions(2)
+
+        supervisor = EngineSupervisor(2)
+        supervisor.writers = {0: FakeWriter(), 1: FakeWriter()}
+        task = asyncio.create_task(supervisor._forward_changes(change_feed.subscribe()))
+        try:
+            async with async_session() as session:
+                channel_id = await ChannelManager(session).add_channel(
+                    user.id, 1_600_000, "routed_channel", "Канал", 1, 5, ["👍"]
+                )
+            await asyncio.sleep(0)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        owner = supervisor.writers[partition_of(user.user_id, 2)]
+        stranger = supervisor.writers[partition_of(user.id, 2)]
+        assert owner.messages == [{
+            "type": "change", "kind": changes.CHANNEL_ADDED, "user_id": user.user_id,
+            "account_id": None, "phone": None, "is_active": True, "channel_id": channel_id,
+        }]
+        assert stranger.messages == []
+
+    run(scenario())
+
+
+def test_worker_change_invalidates_bot_caches():
+    """Изменение от воркера сбрасывает кэши бота и не пересылается обратно воркерам"""
+    async def scenario():
+        await create_schema()
+        data = await seed_database(1, 1, 1, ENCRYPTION_KEY, first_user_id=40_000)
+        user, channel = data["users"][0], data["channels"][0]
+
+        async with async_session() as session:
+            manager = ChannelManager(session)
+            assert await manager.count_user_channels(user.id) == 1
+        version = channel_manager.channel_cards.version(channel.id)
+        assert user.id in channel_manager._channels_count_cache
+
+        supervisor = EngineSupervisor(1)
+        supervisor.writers = {0: FakeWriter()}
+        queue = change_feed.subscribe()
+        task = asyncio.create_task(supervisor._forward_changes(change_feed.subscribe()))
+        try:
+            await supervisor._apply_worker_change(0, {
+                "type": "change", "kind": changes.CHANNEL_UPDATED, "user_id": user.user_id,
+                "account_id": None, "phone": None, "is_active": False, "channel_id": channel.id,
+            })
+            await asyncio.sleep(0)
+            change = queue.get_nowait()
+        finally:
+            change_feed.unsubscribe(queue)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        assert channel_manager.channel_cards.version(channel.id) > version
+        assert user.id not in channel_manager._channels_count_cache
+        assert (change.kind, change.user_id, change.is_active, change.origin) == (
+            changes.CHANNEL_UPDATED, user.user_id, False, "worker-0"
+        )
+        assert supervisor.writers[0].messages == []
+
+    run(scenario())
@@ -0,0 +1,55 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from telethon.errors import FloodWaitError
+from telethon.sessions import StringSession
+from telethon.tl.functions.messages import SendReactionRequest
+from telethon.tl.types import InputPeerEmpty, ReactionEmoji
+
+from services.account_manager import UserActivityManager
+from services.account_runtime import AccountRuntime
+from services.quarantine import pending_work, quarantine
+from services.services import service
+
+
+class FloodingSender:
+    """MTProto-отправитель, на каждый запрос отвечающий FloodWait"""
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.sent = 0
+
+    def send(self, request, ordered=False):
+        self.sent += 1
+        future = asyncio.get_running_loop().create_future()
+        future.set_exception(FloodWaitError(request, capture=self.seconds))
+        return future
+
+
+def test_short_flood_wait_quarantines_and_hands_off_posts():
+    """FloodWait короче минуты не пережидается внутри Telethon: метод уходит на карантин, посты - другому аккаунту"""
+    async def scenario():
+        client = await service._create_client(StringSession().save())
+        client._sender = FloodingSender(10)
+        client.account_id = 901
+        request = SendReactionRequest(peer=InputPeerEmpty(), msg_id=5, reaction=[ReactionEmoji(emoticon="👍")])
+
+        with pytest.raises(FloodWaitError) as error:
+            await asyncio.wait_for(client(request), 2)
+        assert client._sender.sent == 1
+        assert quarantine.is_quarantined(901, "SendReactionRequest")
+
+        manager = UserActivityManager()
+        flooded = AccountRuntime(901, "+79000000901", user_id=90_000)
+        sibling_wakeup = asyncio.Event()
+        manager.wakeups[901] = (90_000, asyncio.Event())
+        manager.wakeups[902] = (90_000, sibling_wakeup)
+        manager._hand_off(flooded, SimpleNamespace(id=77, channel_title="Канал"), [5, 6], error.value)
+
+        assert sibling_wakeup.is_set()
+        assert pending_work.take(90_000, 77, 901) == []
+        assert sorted(pending_work.take(90_000, 77, 902)) == [5, 6]
+        quarantine.forget(901)
+
+    asyncio.run(scenario())
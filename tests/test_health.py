@@ -0,0 +1,87 @@
+import pytest
+
+from config_data.config import (
+    CHECK_INTERVAL_MIN,
+    CHECK_INTERVAL_MAX,
+    HEALTH_MIN_INTERVAL,
+    HEALTH_MAX_INTERVAL,
+    HEALTH_SCORE_ALPHA
+)
+from services.health import CycleReport, HealthTracker
+from services.metrics import ACCOUNT_HEALTH
+
+
+def report(requests: int = 10, errors: int = 0, flood_seconds: int = 0, reactions: int = 0,
+           failed: bool = False) -> CycleReport:
+    cycle = CycleReport()
+    for _ in range(requests - errors):
+        cycle.record_request("ok")
+    for _ in range(errors):
+        cycle.record_request("rpc_error")
+    if flood_seconds:
+        cycle.record_request("flood_wait", flood_seconds)
+    cycle.reactions = reactions
+    cycle.failed = failed
+    return cycle
+
+
+def test_score_is_ewma_of_cycle_success():
+    tracker = HealthTracker()
+    health = tracker.record(1, report(failed=True))
+    assert health.score == pytest.approx(1 - HEALTH_SCORE_ALPHA)
+    assert ACCOUNT_HEALTH.values[("1",)] == pytest.approx(health.score)
+
+    # Цикл с 20% ошибок тянет оценку к 0.8
+    previous = health.score
+    tracker.record(1, report(errors=2))
+    assert health.score == pytest.approx(previous + HEALTH_SCORE_ALPHA * (0.8 - previous))
+    assert health.failures == 0
+
+    # Тот же аккаунт - тот же объект, forget убирает и метрику
+    assert tracker.get(1) is health
+    tracker.forget(1)
+    assert 1 not in tracker.accounts and ("1",) not in ACCOUNT_HEALTH.values
+
+
+def test_failures_back_off_exponentially_and_respect_flood_wait():
+    tracker = HealthTracker()
+    health = tracker.record(2, report(failed=True))
+    assert health.next_interval() == int(CHECK_INTERVAL_MAX / health.score)
+
+    tracker.record(2, report(failed=True))
+    assert health.failures == 2
+    assert health.next_interval() == int(CHECK_INTERVAL_MAX * 2 / health.score)
+
+    # FloodWait длиннее экспоненциальной задержки задает интервал сам
+    tracker.record(2, report(flood_seconds=5000))
+    assert health.failures == 3
+    assert health.next_interval() == int(max(CHECK_INTERVAL_MAX * 4, 5000) / max(health.score, 0.25))
+
+    for _ in range(10):
+        tracker.record(2, report(failed=True))
+    assert health.next_interval() == HEALTH_MAX_INTERVAL
+
+    # Первый же успешный цикл сбрасывает серию ошибок
+    tracker.record(2, report())
+    assert health.failures == 0
+
+
+def test_busy_streak_shortens_interval():
+    tracker = HealthTracker()
+    health = tracker.record(3, report(reactions=1))
+    assert health.busy_streak == 1
+    for _ in range(20):
+        interval = health.next_interval()
+        assert HEALTH_MIN_INTERVAL <= interval <= CHECK_INTERVAL_MAX / 2
+
+    for _ in range(5):
+        tracker.record(3, report(reactions=1))
+    assert health.busy_streak == 6
+    # Ускорение ограничено 16 разами и снизу HEALTH_MIN_INTERVAL
+    assert CHECK_INTERVAL_MAX / 16 < HEALTH_MIN_INTERVAL
+    assert {health.next_interval() for _ in range(20)} == {HEALTH_MIN_INTERVAL}
+
+    # Цикл без работы обрывает серию
+    tracker.record(3, report())
+    assert health.busy_streak == 0
+    assert CHECK_INTERVAL_MIN <= health.next_interval() <= CHECK_INTERVAL_MAX
@@ -0,0 +1,69 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from config_data.config import SHED_LAG_THRESHOLDS, SHED_CYCLE_BUDGET, SHED_LAG_ALPHA
+from services.load_shedder import LoadShedder
+from services.metrics import SHED_LEVEL, SHED_SKIPPED
+
+
+def test_level_rises_and_falls_with_hysteresis():
+    shedder = LoadShedder(lambda: ())
+    low, middle, high = SHED_LAG_THRESHOLDS
+
+    shedder.update(low + 1)
+    assert shedder.level == 1
+    # Скачок отставания поднимает сразу на несколько уровней
+    shedder.update(high + 1)
+    assert shedder.level == 3 and SHED_LEVEL.values[()] == 3
+
+    # Ниже порога, но выше его половины - уровень держится
+    shedder.update(high / 2 + 1)
+    assert shedder.level == 3
+    shedder.update(middle / 2 + 1)
+    assert shedder.level == 2
+    shedder.update(0)
+    assert shedder.level == 0
+
+
+def test_allows_drops_low_value_work_only():
+    shedder = LoadShedder(lambda: ())
+    assert shedder.allows("views") and shedder.allows("saved_messages")
+
+    skipped = SHED_SKIPPED.values.get(("saved_messages",), 0)
+    shedder.update(SHED_LAG_THRESHOLDS[0] + 1)
+    assert not shedder.allows("saved_messages")
+    assert shedder.allows("views")
+    assert SHED_SKIPPED.values[("saved_messages",)] == skipped + 1
+
+    shedder.update(SHED_LAG_THRESHOLDS[2] + 1)
+    assert not shedder.allows("views") and not shedder.allows("old_posts")
+    # Реакции на свежие посты не сбрасываются никогда
+    assert shedder.allows("reactions")
+
+
+def test_lag_sources():
+    runtimes = [SimpleNamespace(next_run_at=None), SimpleNamespace(next_run_at=100.0),
+                SimpleNamespace(next_run_at=130.0), SimpleNamespace(next_run_at=500.0)]
+    shedder = LoadShedder(lambda: runtimes)
+    assert shedder.overdue(150.0) == 50.0
+
+    shedder.observe_cycle(SHED_CYCLE_BUDGET - 10)
+    assert shedder.overrun == 0.0
+    shedder.observe_cycle(SHED_CYCLE_BUDGET + 100)
+    assert shedder.overrun == pytest.approx(SHED_LAG_ALPHA * 100)
+
+
+def test_probe_loop_updates_level():
+    async def scenario():
+        runtimes = [SimpleNamespace(next_run_at=asyncio.get_running_loop().time() - SHED_LAG_THRESHOLDS[1] - 1)]
+        shedder = LoadShedder(lambda: runtimes, interval=0.01)
+        shedder.start()
+        await asyncio.sleep(0.05)
+        await shedder.stop()
+        return shedder
+
+    shedder = asyncio.run(scenario())
+    assert shedder.task is None
+    assert shedder.level == 2
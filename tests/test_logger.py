@@ -0,0 +1,43 @@
+import logging
+import queue
+
+from utils.logger import LazyQueueHandler
+
+
+class Mutable:
+    """Объект, который меняется после записи в лог (как ORM-объект после commit)"""
+
+    def __init__(self, value: str):
+        self.value = value
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class Unprintable:
+    def __str__(self) -> str:
+        raise RuntimeError("lazy load")
+
+
+def make_record(msg, args) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_prepare_freezes_non_primitive_args():
+    handler = LazyQueueHandler(queue.SimpleQueue())
+    channel = Mutable("до")
+    record = handler.prepare(make_record("Канал %s, постов %d, доля %.1f", (channel, 3, 0.5)))
+    channel.value = "после"
+
+    assert record.args == ("до", 3, 0.5)
+    assert record.getMessage() == "Канал до, постов 3, доля 0.5"
+    assert record.msg == "Канал %s, постов %d, доля %.1f"  # Шаблон остается ключом RateLimitFilter
+
+
+def test_prepare_freezes_mapping_and_unprintable_args():
+    handler = LazyQueueHandler(queue.SimpleQueue())
+    record = handler.prepare(make_record("%(name)s", ({"name": Mutable("канал")},)))
+    assert record.args == {"name": "канал"}
+
+    record = handler.prepare(make_record("%s", (Unprintable(),)))
+    assert record.args[0].startswith("<")
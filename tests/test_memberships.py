@@ -0,0 +1,33 @@
+from benchmarks.fake_telegram import FakeTelegramClient
+from database.models import async_session
+from services.channel_manager import ChannelManager
+from tests.conftest import run, seed_channel_world
+
+
+def test_record_memberships_stores_access_hash_for_each_account():
+    """Аккаунты, вступившие в канал при добавлении, проверяют его без повторного поиска"""
+    async def scenario():
+        data, world, fake_channel = await seed_channel_world(120_000, accounts=2, posts=2)
+        first, second = data["accounts"]
+        channel_id = data["channels"][0].id
+
+        async with async_session() as session:
+            await ChannelManager(session).record_memberships(channel_id, {
+                first.id: fake_channel.entity(),
+                second.id: object()  # Сущность без access_hash
+            })
+
+        async with async_session() as session:
+            manager = ChannelManager(session)
+            states = await manager.get_channel_states(first.id, [channel_id])
+            assert states[channel_id].is_member
+            assert states[channel_id].access_hash == fake_channel.access_hash
+            state = await manager.get_channel_state(second.id, channel_id)
+            assert state.is_member and state.access_hash is None
+
+            channel = await manager.get_channel(channel_id)
+            client = FakeTelegramClient(world, "session")
+            assert sorted(await manager.check_new_posts(channel, client, first.id)) == [1, 2]
+            assert world.requests["get_entity"] == 0
+
+    run(scenario())
@@ -0,0 +1,11 @@
+from services.metrics import Gauge
+
+
+def test_gauge_remove_drops_label():
+    gauge = Gauge("test_cycle_seconds", "Длительность цикла", ("account",))
+    gauge.set("1", value=2.5)
+    gauge.set("2", value=1.0)
+    gauge.remove("1")
+    gauge.remove("3")
+    assert gauge.values == {("2",): 1.0}
+    assert not any('account="1"' in line for line in gauge.render())
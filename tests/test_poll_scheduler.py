@@ -0,0 +1,50 @@
+import pytest
+
+from config_data.config import (
+    POLL_RATE_ALPHA,
+    POLL_CHECKS_PER_POST,
+    POLL_MIN_INTERVAL,
+    POLL_MAX_INTERVAL,
+    POLL_BURST_SECONDS
+)
+from services.poll_scheduler import PollScheduler
+
+
+def test_unknown_channel_is_always_due():
+    scheduler = PollScheduler()
+    assert scheduler.due(1, 10, now=0.0)
+    assert scheduler.poll_interval(1, now=0.0) == POLL_MIN_INTERVAL
+
+
+def test_interval_follows_posting_rate_and_silence():
+    scheduler = PollScheduler()
+    # Первая проверка: интервалы берутся из уже опубликованных постов
+    scheduler.observe(1, 10, [(1, 0.0), (2, 1000.0), (3, 2000.0)], now=2000.0)
+    rate = scheduler.channels[1]
+    assert rate.interval == 1000.0 and rate.burst_until == 0.0
+
+    assert scheduler.poll_interval(1, now=2000.0) == 1000.0 / POLL_CHECKS_PER_POST
+    assert not scheduler.due(1, 10, now=2000.0 + 1000.0 / POLL_CHECKS_PER_POST - 1)
+    assert scheduler.due(1, 10, now=2000.0 + 1000.0 / POLL_CHECKS_PER_POST)
+
+    # Канал молчит - интервал растет вместе с тишиной, но не выше POLL_MAX_INTERVAL
+    assert scheduler.poll_interval(1, now=10000.0) == 8000.0 / POLL_CHECKS_PER_POST
+    assert scheduler.poll_interval(1, now=1e9) == POLL_MAX_INTERVAL
+
+
+def test_new_post_starts_burst_and_wakes_other_accounts():
+    scheduler = PollScheduler()
+    scheduler.observe(1, 10, [(1, 0.0), (2, 1000.0)], now=1000.0)
+    scheduler.observe(1, 20, [(1, 0.0), (2, 1000.0)], now=1000.0)
+    assert not scheduler.due(1, 10, now=1001.0)
+
+    # Аккаунт 20 нашел новый пост - аккаунт 10 проверяет канал сразу
+    scheduler.observe(1, 20, [(2, 1000.0), (3, 1900.0)], now=2000.0)
+    rate = scheduler.channels[1]
+    assert rate.interval == pytest.approx(1000.0 + POLL_RATE_ALPHA * (900.0 - 1000.0))
+    assert rate.burst_until == 2000.0 + POLL_BURST_SECONDS
+    assert scheduler.due(1, 10, now=2001.0)
+    assert scheduler.poll_interval(1, now=2001.0) == POLL_MIN_INTERVAL
+
+    scheduler.forget(1)
+    assert scheduler.due(1, 10, now=2001.0)
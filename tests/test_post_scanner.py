@@ -0,0 +1,29 @@
+from telethon.tl.types import MessageEmpty
+
+from benchmarks.fake_telegram import FakeChannel
+from services.post_scanner import PostScan
+
+
+def test_scan_keeps_posts_in_parallel_arrays():
+    channel = FakeChannel(1, "scan_channel", "Scan")
+    channel.publish(3)
+    channel.posts[1]["reactions"] = {"👍": 2, "🔥": 3}
+    channel.posts[2]["views"] = 40
+    messages = [channel.message(1), MessageEmpty(id=5, peer_id=None), channel.message(2), channel.message(3)]
+    messages[3].views = None
+
+    scan = PostScan.from_messages(messages)
+    assert len(scan) == 3 and list(scan.ids) == [1, 2, 3]
+    assert [scan.reaction_count(post_id) for post_id in (1, 2, 3)] == [5, 0, 0]
+    assert scan.view_count(2) == 40
+    assert list(scan.views) == [0, 40, -1]
+
+    # Неизвестные просмотры и отсутствующий пост различаются только по reaction_count
+    assert scan.view_count(3) is None
+    assert scan.view_count(5) is None and scan.reaction_count(5) is None
+    assert list(scan.posts()) == [(post_id, channel.posts[post_id]["date"].timestamp()) for post_id in (1, 2, 3)]
+
+
+def test_empty_scan_is_falsy():
+    scan = PostScan.from_messages([MessageEmpty(id=1, peer_id=None)])
+    assert not scan and list(scan.posts()) == []
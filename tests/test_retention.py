@@ -0,0 +1,98 @@
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from benchmarks.harness import create_schema, seed_database
+from config_data.config import ENCRYPTION_KEY
+from database.models import AccountChannelState, AccountReaction, Job, async_session, engine
+from services.retention import ReactionRetention
+from tests.conftest import run
+
+
+async def free_pages_after_delete(rows: int) -> int:
+    """Заполняет и очищает временную таблицу, возвращает число свободных страниц"""
+    async with engine.connect() as connection:
+        await connection.exec_driver_sql("CREATE TABLE IF NOT EXISTS vacuum_scratch (payload TEXT)")
+        for _ in range(rows):
+            await connection.exec_driver_sql("INSERT INTO vacuum_scratch VALUES (?)", ("x" * 1000,))
+        await connection.exec_driver_sql("DELETE FROM vacuum_scratch")
+        await connection.commit()
+        return (await connection.exec_driver_sql("PRAGMA freelist_count")).scalar()
+
+
+def test_vacuum_step_frees_requested_pages():
+    """Один шаг сжатия освобождает столько страниц, сколько запрошено, а не одну"""
+    async def scenario():
+        await create_schema()
+        async with engine.connect() as connection:
+            assert (await connection.exec_driver_sql("PRAGMA auto_vacuum")).scalar() == 2
+        free = await free_pages_after_delete(2000)
+        assert free > 300
+
+        left = await ReactionRetention._vacuum_step(100)
+        assert free - left == 100
+        left_after = await ReactionRetention._vacuum_step(100)
+        assert left - left_after == 100
+
+        await ReactionRetention()._compact()
+        async with engine.connect() as connection:
+            assert (await connection.exec_driver_sql("PRAGMA freelist_count")).scalar() == 0
+
+    run(scenario())
+
+
+def test_reactions_newer_than_lagging_cursor_are_kept():
+    """Записи о постах, которые отстающий аккаунт еще прочитает из истории, не удаляются"""
+    async def scenario():
+        await create_schema()
+        data = await seed_database(1, 2, 1, ENCRYPTION_KEY, first_user_id=70_000)
+        leader, lagging = data["accounts"]
+        channel_id = data["channels"][0].id
+        old = datetime.utcnow() - timedelta(days=30)
+        async with async_session() as session:
+            for post_id in range(1, 101):
+                session.add(AccountReaction(account_id=leader.id, channel_id=channel_id, post_id=post_id,
+                                            reaction="👍", reacted_at=old))
+            session.add(AccountChannelState(account_id=leader.id, channel_id=channel_id, last_message_id=100))
+            session.add(AccountChannelState(account_id=lagging.id, channel_id=channel_id, last_message_id=40))
+            await session.commit()
+
+        retention = ReactionRetention(horizon=20, archive_dir=tempfile.mkdtemp(prefix="tg_archive_"))
+        assert (await retention._channel_thresholds())[channel_id] == 41
+        await retention.run_once()
+
+        async with async_session() as session:
+            kept = (await session.execute(
+                select(AccountReaction.post_id).where(AccountReaction.channel_id == channel_id,
+                                                      AccountReaction.reaction == "👍")
+            )).scalars().all()
+        assert sorted(kept) == list(range(41, 101))
+
+    run(scenario())
+
+
+def test_finished_jobs_older_than_retention_are_deleted():
+    """Старые выполненные и упавшие задачи удаляются, незавершенные и свежие остаются"""
+    async def scenario():
+        await create_schema()
+        old = datetime.utcnow() - timedelta(days=30)
+        async with async_session() as session:
+            jobs = [
+                Job(kind="add_channel", status="done", updated_at=old),
+                Job(kind="add_channel", status="failed", updated_at=old),
+                Job(kind="add_channel", status="running", updated_at=old),
+                Job(kind="add_channel", status="done"),
+            ]
+            session.add_all(jobs)
+            await session.commit()
+        ids = [job.id for job in jobs]
+
+        retention = ReactionRetention(archive_dir=tempfile.mkdtemp(prefix="tg_archive_"))
+        assert await retention._purge_jobs(datetime.utcnow() - timedelta(days=retention.days)) == 2
+
+        async with async_session() as session:
+            kept = (await session.execute(select(Job.id).where(Job.id.in_(ids)))).scalars().all()
+        assert sorted(kept) == ids[2:]
+
+    run(scenario())
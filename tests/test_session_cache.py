@@ -0,0 +1,39 @@
+from services.session_cache import SessionCache
+
+
+def test_lru_eviction_wipes_evicted_session():
+    cache = SessionCache(capacity=2)
+    cache.put("enc-1", "session-1")
+    cache.put(b"enc-2", "session-2")
+    first = cache.items[cache.key("enc-1")]
+
+    # Обращение к enc-1 делает вытесняемой enc-2
+    assert cache.get(b"enc-1") == "session-1"
+    second = cache.items[cache.key("enc-2")]
+    cache.put("enc-3", "session-3")
+
+    assert len(cache) == 2
+    assert cache.get("enc-2") is None
+    assert second == bytes(len("session-2"))
+    assert cache.get("enc-1") == "session-1" and first == b"session-1"
+
+
+def test_replace_discard_and_clear_wipe_values():
+    cache = SessionCache(capacity=10)
+    cache.put("enc", "old-session")
+    old = cache.items[cache.key("enc")]
+    cache.put("enc", "new-session")
+    assert old == bytes(len("old-session"))
+    assert cache.get("enc") == "new-session"
+
+    current = cache.items[cache.key("enc")]
+    cache.discard("enc")
+    cache.discard("missing")
+    assert current == bytes(len("new-session")) and len(cache) == 0
+
+    cache.put("a", "session-a")
+    cache.put("b", "session-b")
+    values = list(cache.items.values())
+    cache.clear()
+    assert len(cache) == 0
+    assert all(value == bytes(len(value)) for value in values)
@@ -0,0 +1,137 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional
+
+# Аккаунт, для которого выполняется текущая задача asyncio (ставится в начале цикла активности)
+log_account: ContextVar[Optional[str]] = ContextVar("log_account", default=None)
+
+
+class ContextFilter(logging.Filter):
+    """Добавляет в запись лога аккаунт текущей задачи"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.account = log_account.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничивает повторяющиеся сообщения: не больше rate записей с одним шаблоном
+    для одного аккаунта за period секунд. Записи уровня ERROR и выше не ограничиваются.
+    Число отброшенных записей добавляется к следующей записи окна (поле suppressed).
+    """
+
+    def __init__(self, rate: int, period: float, max_keys: int = 10000):
+        super().__init__()
+        self.rate = rate
+        self.period = period
+        self.max_keys = max_keys
+        # (логгер, уровень, шаблон, аккаунт) -> [начало окна, записей в окне, отброшено]
+        self.windows: Dict[tuple, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.suppressed = 0
+        if record.levelno >= logging.ERROR:
+            return True
+
+        key = (record.name, record.levelno, record.msg, getattr(record, "account", None))
+        window = self.windows.get(key)
+        if window is None or record.created - window[0] >= self.period:
+            if window is None and len(self.windows) >= self.max_keys:
+                self.windows.clear()
+            record.suppressed = window[2] if window else 0
+            self.windows[key] = [record.created, 1, 0]
+            return True
+        if window[1] < self.rate:
+            window[1] += 1
+            return True
+        window[2] += 1
+        return False
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler, который не форматирует запись в вызывающем потоке:
+    сообщение собирается из шаблона и аргументов уже в потоке QueueListener.
+
+    Аргументы, кроме строк и чисел, заранее приводятся к строке: объекты ORM и Telethon
+    могут измениться или обратиться к базе, пока запись ждет в очереди.
+    """
+
+    PRIMITIVES = (str, int, float, bool, type(None))
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if isinstance(record.args, dict):
+            record.args = {key: self._freeze(value) for key, value in record.args.items()}
+        elif record.args:
+            record.args = tuple(self._freeze(value) for value in record.args)
+        return record
+
+    @classmethod
+    def _freeze(cls, value):
+        if isinstance(value, cls.PRIMITIVES):
+            return value
+        try:
+            return str(value)
+        except Exception:
+            return object.__repr__(value)
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись лога как одну строку JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "account", None):
+            entry["account"] = record.account
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class CompressedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler, который сжимает ротированные файлы в gzip"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source: str, dest: str):
+        with open(source, "rb") as source_file, gzip.open(dest, "wb") as dest_file:
+            shutil.copyfileobj(source_file, dest_file)
+        os.remove(source)
+
+
+def setup_queue_logging(logger: logging.Logger, handlers: List[logging.Handler],
+                        rate: int, period: float) -> QueueListener:
+    """
+    Подключает к логгеру очередь: вызывающий код только кладет запись в очередь,
+    а форматирование и запись в файл/консоль выполняет поток QueueListener.
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(RateLimitFilter(rate, period))
+    logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener